@@ -39,6 +39,49 @@ def get_db():
 def init_db():
     """Initialize database tables"""
     from models import (User, UserSettings, ExchangeAccount, Signal, Position, PositionTarget, TradeLog,
-                        HouseSignal, HouseSignalPosition, VerificationToken, Payment, DeviceToken)
+                        HouseSignal, HouseSignalPosition, VerificationToken, Payment, DeviceToken, SignalClaim)
     Base.metadata.create_all(bind=engine)
+    ensure_worker_schema()
     print("✅ Database initialized successfully")
+
+
+# Columns added to signal_claims after it was first created
+SIGNAL_CLAIM_COLUMNS = {
+    "attempts": "INTEGER DEFAULT 0",
+    "last_error": "TEXT",
+    "dead": "BOOLEAN DEFAULT FALSE",
+}
+
+
+def ensure_worker_schema():
+    """
+    Objects the trading workers rely on that create_all won't add to an
+    existing database: the signal claim table (and its later columns) and
+    the unique (user_id, signal_id) index on positions
+    """
+    from sqlalchemy import inspect, text
+    from models import SignalClaim
+    SignalClaim.__table__.create(bind=engine, checkfirst=True)
+    
+    existing = {column["name"] for column in inspect(engine).get_columns("signal_claims")}
+    with engine.begin() as conn:
+        for name, ddl in SIGNAL_CLAIM_COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE signal_claims ADD COLUMN {name} {ddl}"))
+    
+    with engine.begin() as conn:
+        # The index can't be built over duplicates; keep starting without it
+        duplicates = conn.execute(text(
+            "SELECT user_id, signal_id, COUNT(*) FROM positions WHERE signal_id IS NOT NULL "
+            "GROUP BY user_id, signal_id HAVING COUNT(*) > 1"
+        )).fetchall()
+        if duplicates:
+            sample = ", ".join(f"user {user_id}/signal {signal_id} ({count}x)"
+                               for user_id, signal_id, count in duplicates[:5])
+            print(f"❌ uq_positions_user_signal not created: {len(duplicates)} (user_id, signal_id) pairs have "
+                  f"several positions ({sample}). Resolve them, then restart; until then a retried signal "
+                  f"claim relies only on the executor's check for already opened positions.")
+            return
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_positions_user_signal ON positions (user_id, signal_id)"
+        ))
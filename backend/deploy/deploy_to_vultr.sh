@@ -110,15 +110,19 @@ source /root/api_server_env.sh
 echo "🔧 Step 6: Installing systemd services..."
 cp $API_DIR/backend/deploy/verzek_api.service /etc/systemd/system/
 cp $API_DIR/backend/deploy/verzek_worker.service /etc/systemd/system/
+cp $API_DIR/backend/deploy/verzek_worker@.service /etc/systemd/system/
+cp $API_DIR/backend/deploy/verzek_price_publisher.service /etc/systemd/system/
 
 # Step 7: Reload systemd and enable services
 echo "🔄 Step 7: Enabling services..."
 systemctl daemon-reload
 systemctl enable verzek_api.service
 systemctl enable verzek_worker.service
+systemctl enable verzek_price_publisher.service
 
 # Step 8: Restart services
 echo "♻️  Step 8: Restarting services..."
+systemctl restart verzek_price_publisher.service
 systemctl restart verzek_api.service
 systemctl restart verzek_worker.service
 
@@ -126,6 +130,7 @@ systemctl restart verzek_worker.service
 echo "✅ Step 9: Checking service status..."
 systemctl status verzek_api.service --no-pager || true
 systemctl status verzek_worker.service --no-pager || true
+systemctl status verzek_price_publisher.service --no-pager || true
 
 # Step 10: Test API endpoints
 echo "🧪 Step 10: Testing API endpoints..."
@@ -207,7 +212,7 @@ cat >> "$DEPLOY_LOG" << EOF
 Deployment: $(date '+%Y-%m-%d %H:%M:%S %Z')
 Version: 2.1
 Health Status: $HEALTH_STATUS
-Services: verzek_api.service, verzek_worker.service
+Services: verzek_api.service, verzek_worker.service, verzek_price_publisher.service
 Deployed by: $(whoami)
 ========================================
 
@@ -2,7 +2,7 @@
 Database models for Verzek AutoTrader
 All models are designed to work with both SQLite and PostgreSQL
 """
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, JSON, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, JSON, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db import Base
@@ -131,6 +131,28 @@ class Position(Base):
     user = relationship("User", back_populates="positions")
     signal = relationship("Signal", back_populates="positions")
     targets = relationship("PositionTarget", back_populates="position", cascade="all, delete-orphan")
+    
+    # One position per user per signal (idempotent fan-out across workers)
+    __table_args__ = (
+        Index("uq_positions_user_signal", "user_id", "signal_id", unique=True),
+    )
+
+
+class SignalClaim(Base):
+    """Worker lease on a signal for one user shard"""
+    __tablename__ = "signal_claims"
+    
+    signal_id = Column(Integer, ForeignKey("signals.id"), primary_key=True)
+    shard = Column(Integer, primary_key=True)  # 0..WORKER_SHARDS-1
+    
+    worker_id = Column(String(100))
+    lease_until = Column(DateTime, index=True)  # claim expires (worker died) after this
+    done = Column(Boolean, default=False, index=True)
+    done_at = Column(DateTime)
+    
+    attempts = Column(Integer, default=0)  # times claimed
+    last_error = Column(Text)
+    dead = Column(Boolean, default=False)  # given up after too many attempts (also done)
 
 
 class PositionTarget(Base):
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Verzek Price Publisher
+Single process that fetches prices (one bulk request per interval, or the
+Binance stream with PRICE_FEED_WEBSOCKET=true) and publishes them into the
+shared price table read by the API workers and the trading worker.
+
+Readers fall back to fetching on their own if this process stops for
+PRICE_PUBLISHER_TIMEOUT seconds, so it is safe to restart at any time.
+"""
+import os
+import sys
+import time
+
+# Add current directory to path
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils.price_feed import price_feed as feed
+from utils.shared_prices import SharedPriceTable, PRICE_TABLE_PATH, PRICE_TABLE_SLOTS
+from utils.logger import worker_logger
+
+PUBLISH_INTERVAL = float(os.getenv("PRICE_PUBLISH_INTERVAL", "1"))
+
+
+def main():
+    """Main publisher loop"""
+    table = SharedPriceTable.create(PRICE_TABLE_PATH, PRICE_TABLE_SLOTS)
+    # The publisher is the source of the table, never a reader of it
+    feed.shared_table_path = None
+    feed.ttl = PUBLISH_INTERVAL
+
+    worker_logger.info("=" * 60)
+    worker_logger.info(f"📡 Verzek Price Publisher started")
+    worker_logger.info(f"🗂️  Table: {PRICE_TABLE_PATH} ({PRICE_TABLE_SLOTS} slots)")
+    worker_logger.info(f"⏱️  Interval: {PUBLISH_INTERVAL}s")
+    worker_logger.info("=" * 60)
+
+    published_at = {}  # symbol -> fetched_at last written
+    while True:
+        try:
+            started = time.time()
+
+            # The stream keeps the cache current; REST only while it is down
+            if not feed.ws_connected:
+                feed.refresh_all()
+
+            written = 0
+            for symbol, quote in list(feed.cache.items()):
+                if published_at.get(symbol) == quote.fetched_at:
+                    continue
+                if table.put(symbol, quote.price, quote.fetched_at):
+                    published_at[symbol] = quote.fetched_at
+                    written += 1
+                elif symbol not in published_at:
+                    published_at[symbol] = quote.fetched_at
+                    worker_logger.warning(f"⚠️ No slot for {symbol} (table full or symbol too long)")
+
+            table.touch()
+            worker_logger.debug(f"Published {written} prices")
+
+            time.sleep(max(0.0, PUBLISH_INTERVAL - (time.time() - started)))
+
+        except KeyboardInterrupt:
+            worker_logger.info("⛔ Price publisher stopped by user (Ctrl+C)")
+            break
+
+        except Exception as e:
+            worker_logger.error(f"❌ Price publisher error: {e}", exc_info=True)
+            time.sleep(PUBLISH_INTERVAL)
+
+    table.close()
+
+
+if __name__ == "__main__":
+    main()
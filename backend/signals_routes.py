@@ -11,6 +11,7 @@ from db import SessionLocal
 from models import Signal, Position, TradeLog
 from broadcast import broadcast_signal, broadcast_target_hit, broadcast_stop_loss, broadcast_signal_cancelled
 from utils.logger import api_logger
+from utils.worker_wakeup import notify_worker
 from utils.rate_limiter import rate_limiter
 from utils.notifications import send_signal_notification, get_subscription_user_tokens
 
@@ -100,6 +101,9 @@ def create_signal():
         
         signal_id = signal.id
         
+        # Wake the auto-trade worker now instead of on its next poll
+        notify_worker("signal")
+        
         # Broadcast to Telegram
         signal_dict = {
             "symbol": signal.symbol,
@@ -0,0 +1,192 @@
+"""
+Signal Claims
+Lets several workers process NEW signals without doing the same work twice.
+
+A worker claims (signal, shard) pairs before fanning a signal out to its
+shard's users. A claim is a row in signal_claims with a lease: if the worker
+dies, the lease expires and another worker of the shard takes the signal
+over (the unique (user_id, signal_id) index keeps the retry from opening
+duplicates). On PostgreSQL candidates are locked with
+SELECT ... FOR UPDATE SKIP LOCKED so concurrent claimers never wait on each
+other; on SQLite, whose writers are serialized anyway, a conditional UPDATE
+on the lease does the same job.
+
+Every claim counts as an attempt. A claim that keeps failing (or keeps
+killing its worker) is given up after CLAIM_MAX_ATTEMPTS: it is marked done
+and dead with its last error, so the signal can still be finalized.
+
+A signal is marked OPENED once every shard has completed it.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import Signal, SignalClaim
+from trading.sharding import WorkerShard
+from utils.logger import worker_logger
+
+CLAIM_LEASE_SECONDS = int(os.getenv("SIGNAL_CLAIM_LEASE_SECONDS", "120"))
+CLAIM_BATCH = int(os.getenv("SIGNAL_CLAIM_BATCH", "50"))
+CLAIM_MAX_ATTEMPTS = int(os.getenv("SIGNAL_CLAIM_MAX_ATTEMPTS", "5"))
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def claim_signals(db: Session, shard: WorkerShard, limit: int = CLAIM_BATCH) -> List[Signal]:
+    """
+    Claim NEW signals this shard has not completed yet
+
+    Returns:
+        Claimed signals (oldest first); the claims are committed
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+
+    try:
+        # Make sure a claim row exists for every NEW signal of this shard
+        unclaimed = db.query(Signal.id).outerjoin(
+            SignalClaim, (SignalClaim.signal_id == Signal.id) & (SignalClaim.shard == shard.index)
+        ).filter(
+            Signal.status == 'NEW',
+            SignalClaim.signal_id.is_(None)
+        ).order_by(Signal.id).limit(limit).all()
+
+        if unclaimed:
+            insert = pg_insert if _is_postgres(db) else sqlite_insert
+            db.execute(
+                insert(SignalClaim).values([
+                    {"signal_id": signal_id, "shard": shard.index, "done": False} for (signal_id,) in unclaimed
+                ]).on_conflict_do_nothing()  # another worker of the shard created it first
+            )
+            db.commit()
+
+        dead_letter_claims(db, shard, now)
+
+        # Claimable: not done and not leased by a live worker
+        attempts = func.coalesce(SignalClaim.attempts, 0)
+        claimable = db.query(SignalClaim).join(Signal, Signal.id == SignalClaim.signal_id).filter(
+            SignalClaim.shard == shard.index,
+            SignalClaim.done == False,
+            Signal.status == 'NEW',
+            attempts < CLAIM_MAX_ATTEMPTS,
+            or_(SignalClaim.lease_until.is_(None), SignalClaim.lease_until < now)
+        ).order_by(SignalClaim.signal_id).limit(limit)
+
+        if _is_postgres(db):
+            claims = claimable.with_for_update(skip_locked=True, of=SignalClaim).all()
+            for claim in claims:
+                claim.worker_id = shard.worker_id
+                claim.lease_until = lease_until
+                claim.attempts = (claim.attempts or 0) + 1
+            claimed_ids = [claim.signal_id for claim in claims]
+            db.commit()
+        else:
+            claimed_ids = []
+            for claim in claimable.all():
+                # Conditional update: only one worker sees rowcount 1
+                updated = db.query(SignalClaim).filter(
+                    SignalClaim.signal_id == claim.signal_id,
+                    SignalClaim.shard == shard.index,
+                    SignalClaim.done == False,
+                    attempts < CLAIM_MAX_ATTEMPTS,
+                    or_(SignalClaim.lease_until.is_(None), SignalClaim.lease_until < now)
+                ).update({"worker_id": shard.worker_id, "lease_until": lease_until, "attempts": attempts + 1},
+                         synchronize_session=False)
+                if updated:
+                    claimed_ids.append(claim.signal_id)
+            db.commit()
+
+        if not claimed_ids:
+            return []
+        return db.query(Signal).filter(Signal.id.in_(claimed_ids)).order_by(Signal.id).all()
+
+    except Exception as e:
+        worker_logger.error(f"Claim signals error: {e}")
+        db.rollback()
+        return []
+
+
+def complete_claim(db: Session, signal_id: int, shard: WorkerShard):
+    """Mark this shard's claim done (commit with the signal's positions)"""
+    db.query(SignalClaim).filter(
+        SignalClaim.signal_id == signal_id,
+        SignalClaim.shard == shard.index
+    ).update({"done": True, "done_at": datetime.utcnow(), "lease_until": None}, synchronize_session=False)
+
+
+def fail_claim(db: Session, signal_id: int, shard: WorkerShard, error: str):
+    """Record why this shard's claim failed (it is retried once its lease expires)"""
+    try:
+        db.query(SignalClaim).filter(
+            SignalClaim.signal_id == signal_id,
+            SignalClaim.shard == shard.index
+        ).update({"last_error": error[:1000]}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        worker_logger.error(f"Fail claim error: {e}")
+        db.rollback()
+
+
+def dead_letter_claims(db: Session, shard: WorkerShard, now: datetime) -> int:
+    """
+    Give up this shard's claims whose attempts ran out (marked done and dead)
+
+    Returns:
+        Number of claims given up
+    """
+    dead = db.query(SignalClaim).filter(
+        SignalClaim.shard == shard.index,
+        SignalClaim.done == False,
+        func.coalesce(SignalClaim.attempts, 0) >= CLAIM_MAX_ATTEMPTS,
+        or_(SignalClaim.lease_until.is_(None), SignalClaim.lease_until < now)
+    ).all()
+    for claim in dead:
+        worker_logger.error(
+            f"❌ Giving up signal #{claim.signal_id} for shard {shard.index} after {claim.attempts} attempts: "
+            f"{claim.last_error or 'worker stopped while processing it'}"
+        )
+        claim.done = True
+        claim.dead = True
+        claim.done_at = now
+        claim.lease_until = None
+    if dead:
+        db.commit()
+    return len(dead)
+
+
+def finalize_signals(db: Session, shard_count: int) -> int:
+    """
+    Mark NEW signals OPENED once all shards completed them
+
+    Returns:
+        Number of signals marked
+    """
+    try:
+        done_ids = [
+            signal_id for (signal_id,) in db.query(SignalClaim.signal_id).join(
+                Signal, Signal.id == SignalClaim.signal_id
+            ).filter(
+                Signal.status == 'NEW',
+                SignalClaim.done == True
+            ).group_by(SignalClaim.signal_id).having(func.count(SignalClaim.shard) >= shard_count).all()
+        ]
+        if not done_ids:
+            return 0
+
+        db.query(Signal).filter(Signal.id.in_(done_ids), Signal.status == 'NEW').update(
+            {"status": 'OPENED'}, synchronize_session=False
+        )
+        db.commit()
+        return len(done_ids)
+
+    except Exception as e:
+        worker_logger.error(f"Finalize signals error: {e}")
+        db.rollback()
+        return 0
@@ -2,14 +2,18 @@
 Trade Executor - Auto-Trading Worker Logic
 Processes signals, opens positions, manages TP/SL for users with auto_trade_enabled=True
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
-from typing import List
-import requests
-import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-from models import User, UserSettings, Signal, Position, PositionTarget, TradeLog
+from models import User, UserSettings, Signal, Position, PositionTarget, TradeLog, DeviceToken
 from trading.paper_client import paper_client
+from trading.trigger_index import TriggerIndex, Trigger, take_profit_direction, stop_loss_direction
+from trading.signal_engine_notifier import signal_engine_notifier
+from trading.sharding import get_worker_shard
+from trading.order_dispatch import OrderJob, OrderResult, order_dispatcher
+from trading.claims import claim_signals, complete_claim, fail_claim, finalize_signals
 from utils.logger import worker_logger
 from utils.notifications import (
     send_trade_start_notification,
@@ -19,161 +23,60 @@ from utils.notifications import (
 from broadcast import broadcast_signal_cancelled
 
 
+# Pending TP/SL levels of open positions, kept across worker ticks
+trigger_index = TriggerIndex()
+
+
+class TradeAccount(NamedTuple):
+    """Auto-trade user and the settings the fan-out needs"""
+    user_id: int
+    max_concurrent: int
+    auto_reversal: bool
+    leverage: int
+    per_trade_usdt: float
+    notify: bool
+
+
+class SavedOrders(NamedTuple):
+    """What one transaction of a signal's fan-out wrote, as read before its commit"""
+    opened: List[Tuple[int, Position]]          # (user_id, new position)
+    cancelled: List[Tuple[int, Position]]       # (user_id, reversed position)
+    reversals: List[Tuple[Optional[int], str, str]]  # (signal_id, symbol, reason) to announce
+    notifications: List[Tuple[List[str], Dict]]      # (push tokens, position data)
+
+
+class MonitorTick(NamedTuple):
+    """Paper closes of one monitor tick and the Signal Engine events they raise, held until its commit"""
+    closes: List[Dict]                          # paper close results (undone if the commit fails)
+    liquidations: List[Dict]                    # paper liquidations (undone if the commit fails)
+    tp_hits: List[Tuple[str, float, int]]       # (signal_id, hit price, TP number)
+    closures: List[Tuple[str, float, str]]      # (signal_id, exit price, close reason)
+
+
 def notify_signal_engine_tp_hit(signal_id: str, hit_price: float, tp_number: int):
     """
-    Send webhook to Signal Engine to record TP hit with retry logic
+    Queue a TP hit for the Signal Engine (sent in the background, batched, deduplicated)
     
     Args:
         signal_id: Signal ID from signal engine
         hit_price: Price at which TP was hit
         tp_number: TP number (1-5)
     """
-    webhook_url = os.getenv('SIGNAL_ENGINE_WEBHOOK_URL', 'http://localhost:8050')
-    
-    payload = {
-        'signal_id': signal_id,
-        'hit_price': hit_price,
-        'tp_number': tp_number
-    }
-    
-    # Get webhook secret for authentication
-    webhook_secret = os.getenv('SIGNAL_ENGINE_WEBHOOK_SECRET', 'dev-secret-change-in-prod')
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'X-Webhook-Secret': webhook_secret
-    }
-    
-    # Retry up to 3 times with exponential backoff
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                f"{webhook_url}/api/signals/tp-hit",
-                json=payload,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                outcome = result.get('outcome', {})
-                is_final = outcome.get('is_final', False)
-                
-                worker_logger.info(
-                    f"✅ Signal Engine notified: TP{tp_number} hit for {signal_id[:8]} "
-                    f"(Final: {is_final})"
-                )
-                return True
-            else:
-                worker_logger.warning(
-                    f"⚠️ Signal Engine TP webhook failed (attempt {attempt + 1}/{max_retries}): "
-                    f"Status {response.status_code}, Response: {response.text}"
-                )
-                
-        except requests.exceptions.Timeout:
-            worker_logger.error(
-                f"⏱️  Signal Engine TP webhook timeout (attempt {attempt + 1}/{max_retries}) "
-                f"for {signal_id[:8]}"
-            )
-        except requests.exceptions.ConnectionError:
-            worker_logger.error(
-                f"🔌 Signal Engine TP webhook connection error (attempt {attempt + 1}/{max_retries}) "
-                f"for {signal_id[:8]} - Is webhook server running?"
-            )
-        except Exception as e:
-            worker_logger.error(
-                f"❌ Signal Engine TP webhook error (attempt {attempt + 1}/{max_retries}): {e}"
-            )
-        
-        # Wait before retry (exponential backoff: 1s, 2s, 4s)
-        if attempt < max_retries - 1:
-            import time
-            wait_time = 2 ** attempt
-            worker_logger.info(f"Retrying in {wait_time}s...")
-            time.sleep(wait_time)
-    
-    # All retries failed - log error but don't block execution
-    worker_logger.error(
-        f"🚨 Signal Engine TP webhook failed after {max_retries} attempts for {signal_id[:8]}! "
-        f"TP{tp_number} hit may not be tracked."
-    )
-    return False
+    signal_engine_notifier.tp_hit(signal_id, hit_price, tp_number)
+    return True
 
 
 def notify_signal_engine_closure(signal_id: str, exit_price: float, close_reason: str):
     """
-    Send webhook to Signal Engine to close tracked signal with retry logic
+    Queue a signal closure for the Signal Engine (sent in the background, batched, deduplicated)
     
     Args:
         signal_id: Signal ID from signal engine
         exit_price: Actual exit price
         close_reason: TP, SL, CANCEL, or REVERSAL
     """
-    webhook_url = os.getenv('SIGNAL_ENGINE_WEBHOOK_URL', 'http://localhost:8050')
-    
-    payload = {
-        'signal_id': signal_id,
-        'exit_price': exit_price,
-        'close_reason': close_reason
-    }
-    
-    # Get webhook secret for authentication
-    webhook_secret = os.getenv('SIGNAL_ENGINE_WEBHOOK_SECRET', 'dev-secret-change-in-prod')
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'X-Webhook-Secret': webhook_secret
-    }
-    
-    # Retry up to 3 times with exponential backoff
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                f"{webhook_url}/api/signals/close",
-                json=payload,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                worker_logger.info(f"✅ Signal Engine notified: {signal_id[:8]} closed ({close_reason})")
-                return True
-            else:
-                worker_logger.warning(
-                    f"⚠️ Signal Engine webhook failed (attempt {attempt + 1}/{max_retries}): "
-                    f"Status {response.status_code}, Response: {response.text}"
-                )
-                
-        except requests.exceptions.Timeout:
-            worker_logger.error(
-                f"⏱️  Signal Engine webhook timeout (attempt {attempt + 1}/{max_retries}) "
-                f"for {signal_id[:8]}"
-            )
-        except requests.exceptions.ConnectionError:
-            worker_logger.error(
-                f"🔌 Signal Engine webhook connection error (attempt {attempt + 1}/{max_retries}) "
-                f"for {signal_id[:8]} - Is webhook server running?"
-            )
-        except Exception as e:
-            worker_logger.error(
-                f"❌ Signal Engine webhook error (attempt {attempt + 1}/{max_retries}): {e}"
-            )
-        
-        # Wait before retry (exponential backoff: 1s, 2s, 4s)
-        if attempt < max_retries - 1:
-            import time
-            wait_time = 2 ** attempt
-            worker_logger.info(f"Retrying in {wait_time}s...")
-            time.sleep(wait_time)
-    
-    # All retries failed - log critical error
-    worker_logger.error(
-        f"🚨 CRITICAL: Signal Engine webhook failed after {max_retries} attempts! "
-        f"Signal {signal_id[:8]} may be stuck ACTIVE. Manual intervention required."
-    )
-    return False
+    signal_engine_notifier.closure(signal_id, exit_price, close_reason)
+    return True
 
 
 def run_once(db: Session):
@@ -191,376 +94,620 @@ def run_once(db: Session):
         
     except Exception as e:
         worker_logger.error(f"Worker execution error: {e}")
+    
+    finally:
+        # Step 3: Hand this cycle's TP hits/closures to the notifier's sender
+        # (sent in the background, monitoring never waits on the Signal Engine)
+        signal_engine_notifier.wake()
 
 
 def process_new_signals(db: Session):
     """
     Find signals with status='NEW' and create positions for eligible users
+    
+    Set-based: users, settings, open-position counts and open positions on
+    the signals' symbols are loaded in a few queries up front; eligibility
+    is computed in memory and each signal's positions, targets and logs are
+    inserted in one transaction.
+    
+    With several workers, each one claims the signals for its shard of users
+    (see trading/claims.py) and a signal becomes OPENED once every shard
+    has processed it.
     """
+    shard = get_worker_shard()
     try:
-        # Get all NEW signals
-        new_signals = db.query(Signal).filter(Signal.status == 'NEW').all()
+        # Claim NEW signals for this worker's shard
+        new_signals = claim_signals(db, shard)
         
         if not new_signals:
+            finalize_signals(db, shard.count)
             return
         
-        # Get all users with auto_trade enabled
-        auto_trade_users = db.query(User).filter(User.auto_trade_enabled == True).all()
+        # Auto-trade users with their settings (one query), as plain values so
+        # the per-signal commits don't expire and reload them
+        rows = db.query(User, UserSettings).join(
+            UserSettings, UserSettings.user_id == User.id
+        ).filter(User.auto_trade_enabled == True).order_by(User.id).all()
+        accounts = [
+            TradeAccount(
+                user_id=user.id,
+                max_concurrent=min(settings.max_concurrent_trades, 50),  # Cap at 50
+                auto_reversal=settings.auto_reversal_enabled,
+                leverage=settings.leverage,
+                per_trade_usdt=settings.per_trade_usdt,
+                notify=user.subscription_type == 'PREMIUM' and user.notifications_enabled
+            )
+            for user, settings in rows
+            if shard.owns(user.id)
+        ]
+        
+        if not accounts:
+            for signal in new_signals:
+                complete_claim(db, signal.id, shard)
+            db.commit()
+            finalize_signals(db, shard.count)
+            return
         
-        for signal in new_signals:
-            for user in auto_trade_users:
-                # Check if user can take this trade
-                if not can_user_trade(db, user.id):
-                    continue
-                
-                # Check for signal reversal (opposite direction on same symbol)
-                handle_signal_reversal(db, user.id, signal)
-                
-                # Open position
-                open_position_for_signal(db, user.id, signal)
-            
-            # Mark signal as OPENED after processing
-            signal.status = 'OPENED'
+        user_ids = [account.user_id for account in accounts]
         
-        db.commit()
+        # Positions already opened for these signals (a claim retried after a crash)
+        existing = set(
+            db.query(Position.user_id, Position.signal_id).filter(
+                Position.signal_id.in_([signal.id for signal in new_signals]),
+                Position.user_id.in_(user_ids)
+            ).all()
+        )
         
-    except Exception as e:
-        worker_logger.error(f"Process new signals error: {e}")
-        db.rollback()
-
-
-def can_user_trade(db: Session, user_id: int) -> bool:
-    """
-    Check if user can take a new trade
-    - Must have auto_trade_enabled
-    - Must not exceed max_concurrent_trades (50 max)
-    """
-    try:
-        settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
-        if not settings:
-            return False
+        # Active position counts per user (one aggregate query)
+        open_counts = dict(
+            db.query(Position.user_id, func.count(Position.id)).filter(
+                Position.user_id.in_(user_ids),
+                Position.status.in_(['OPEN', 'PARTIAL'])
+            ).group_by(Position.user_id).all()
+        )
         
-        # Count active positions
-        active_count = db.query(Position).filter(
-            Position.user_id == user_id,
+        # Active positions on the signals' symbols, for reversal checks (one query + targets)
+        symbols = {signal.symbol for signal in new_signals}
+        open_by_user_symbol: Dict[Tuple[int, str], List[Position]] = {}
+        for position in db.query(Position).options(selectinload(Position.targets)).filter(
+            Position.user_id.in_(user_ids),
+            Position.symbol.in_(symbols),
             Position.status.in_(['OPEN', 'PARTIAL'])
-        ).count()
+        ).all():
+            open_by_user_symbol.setdefault((position.user_id, position.symbol), []).append(position)
+        
+        # Push tokens of users who get trade start notifications (one query)
+        notify_ids = [account.user_id for account in accounts if account.notify]
+        push_tokens: Dict[int, List[str]] = {}
+        if notify_ids:
+            for user_id, token in db.query(DeviceToken.user_id, DeviceToken.push_token).filter(
+                DeviceToken.user_id.in_(notify_ids),
+                DeviceToken.is_active == True
+            ).all():
+                if token:
+                    push_tokens.setdefault(user_id, []).append(token)
         
-        max_concurrent = min(settings.max_concurrent_trades, 50)  # Cap at 50
+        for signal in new_signals:
+            open_positions_for_signal(db, signal, accounts, open_counts, open_by_user_symbol, push_tokens, existing)
         
-        return active_count < max_concurrent
+        finalize_signals(db, shard.count)
         
     except Exception as e:
-        worker_logger.error(f"Can user trade check error: {e}")
-        return False
+        worker_logger.error(f"Process new signals error: {e}")
+        db.rollback()
 
 
-def handle_signal_reversal(db: Session, user_id: int, new_signal: Signal):
+def open_positions_for_signal(db: Session, signal: Signal, accounts: List[TradeAccount],
+                              open_counts: Dict[int, int], open_by_user_symbol: Dict[Tuple[int, str], List[Position]],
+                              push_tokens: Dict[int, List[str]], existing: Optional[set] = None):
     """
-    Detect and handle signal reversals (opposite direction on same symbol)
-    If user has auto_reversal enabled and an opposite position exists within the reversal window,
-    close the existing position before opening the new one.
+    Fan one signal out to all eligible users, saved in a single transaction
     
-    Example: BTCUSDT LONG at 2:39 PM → BTCUSDT SHORT at 2:42 PM
-    Result: Close LONG position, then open SHORT position
+    Eligibility is decided in memory, then every user's orders (reversal
+    closes + open) are placed concurrently by the order dispatcher and the
+    results written to the database here, on the session's thread. If the
+    transaction fails, each user's results are saved on their own; the paper
+    closes and opens of those that still fail are undone.
+    
+    Args:
+        signal: NEW signal
+        accounts: Auto-trade users with their settings
+        open_counts: Active positions per user (updated in place)
+        open_by_user_symbol: Active positions per (user, symbol) (updated in place)
+        push_tokens: Push tokens of users with trade start notifications
+        existing: (user_id, signal_id) pairs that already have a position
     """
+    results: List[OrderResult] = []
+    unsaved: List[OrderResult] = []  # paper orders not in the database
     try:
-        # Get user settings
-        settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
-        if not settings or not settings.auto_reversal_enabled:
-            return  # Auto-reversal disabled
-        
-        # Find active positions for this symbol
-        active_positions = db.query(Position).filter(
-            Position.user_id == user_id,
-            Position.symbol == new_signal.symbol,
-            Position.status.in_(['OPEN', 'PARTIAL'])
-        ).all()
-        
-        if not active_positions:
-            return  # No active positions on this symbol
+        # One market price for every fill of this signal
+        live_price = paper_client.get_current_price(signal.symbol)
+        market_price = live_price or signal.entry
+        tp_prices = signal.tp if isinstance(signal.tp, list) else [signal.tp]
         
-        # Check if any position is in opposite direction (instant reversal, no time window)
-        for position in active_positions:
-            # Normalize sides to handle both BUY/SELL and LONG/SHORT formats
-            position_side = position.side.upper()
-            signal_side = new_signal.side.upper()
+        # 1. Decide in memory who trades and which positions they reverse
+        jobs: List[OrderJob] = []
+        reversing: Dict[int, List[Position]] = {}
+        for account in accounts:
+            user_id = account.user_id
             
-            # Map BUY/SELL to LONG/SHORT for consistency
-            if position_side == 'BUY':
-                position_side = 'LONG'
-            elif position_side == 'SELL':
-                position_side = 'SHORT'
-            
-            if signal_side == 'BUY':
-                signal_side = 'LONG'
-            elif signal_side == 'SELL':
-                signal_side = 'SHORT'
-            
-            # Check if direction is opposite
-            is_opposite = (
-                (position_side == 'LONG' and signal_side == 'SHORT') or
-                (position_side == 'SHORT' and signal_side == 'LONG')
-            )
-            
-            if not is_opposite:
-                continue  # Same direction, allow multiple positions (position stacking)
-            
-            # REVERSAL DETECTED - Close the opposite position immediately
-            time_diff = (datetime.utcnow() - position.created_at).total_seconds()
-            worker_logger.warning(
-                f"🔄 INSTANT SIGNAL REVERSAL DETECTED for user {user_id}: "
-                f"{position.symbol} {position_side} → {signal_side} "
-                f"(position age: {time_diff:.0f}s, no time restriction)"
-            )
+            # Already opened by an earlier attempt at this signal
+            if existing and (user_id, signal.id) in existing:
+                continue
             
-            # Get current market price for exit
-            current_price = paper_client.get_current_price(position.symbol)
-            if not current_price:
-                worker_logger.error(f"Failed to get current price for {position.symbol}, skipping reversal")
+            # Check if user can take this trade (max 50 concurrent)
+            if open_counts.get(user_id, 0) >= account.max_concurrent:
                 continue
             
-            # Close the opposite position at market price
-            close_result = paper_client.close_position(
-                user_id=user_id,
-                symbol=position.symbol,
-                side=position.side,
-                qty=position.remaining_qty,
-                entry_price=position.entry_price,
-                exit_price=current_price,
-                leverage=position.leverage
-            )
+            # Check for signal reversal (opposite direction on same symbol)
+            active = open_by_user_symbol.get((user_id, signal.symbol))
+            to_close = reversed_positions(signal, active) if active and account.auto_reversal else []
+            if to_close and not live_price:
+                worker_logger.error(f"Failed to get current price for {signal.symbol}, skipping reversal")
+                to_close = []
+            reversing[user_id] = to_close
             
-            if close_result.get('success'):
-                position.status = 'CANCELLED'
-                position.closed_at = datetime.utcnow()
-                position.remaining_qty = 0
-                position.pnl_usdt = close_result.get('pnl_usdt', 0)
-                position.pnl_pct = close_result.get('pnl_pct', 0)
-                
-                # Log reversal event
-                trade_log = TradeLog(
-                    user_id=user_id,
-                    position_id=position.id,
-                    signal_id=position.signal_id,
-                    type='REVERSAL',
-                    message=f"Position closed due to instant market reversal: {position_side} → {signal_side}",
-                    meta={
-                        'reversal_reason': 'market_direction_change',
-                        'new_signal_id': new_signal.id,
-                        'position_age_seconds': time_diff,
-                        'close_price': current_price,
-                        'instant_reversal': True,
-                        **close_result
-                    }
-                )
-                db.add(trade_log)
-                
-                worker_logger.info(
-                    f"✅ Reversed position #{position.id}: {position.side} @ {position.entry_price} → "
-                    f"Closed @ {current_price}, PnL: {close_result.get('pnl_usdt', 0):.2f} USDT"
-                )
-                
-                # Mark all targets as cancelled
-                for target in position.targets:
-                    if not target.hit:
-                        target.hit = True
-                        target.hit_at = datetime.utcnow()
-                
-                # Send Telegram cancellation notification
+            jobs.append(OrderJob(user_id, paper_client.mode, _order_job(
+                account, signal, market_price, [
+                    # Plain values: the job runs on another thread than the session
+                    dict(user_id=user_id, symbol=position.symbol, side=position.side,
+                         qty=position.remaining_qty, entry_price=position.entry_price,
+                         exit_price=live_price, leverage=position.leverage, position_id=position.id)
+                    for position in to_close
+                ]
+            )))
+        
+        # 2. Place every user's orders concurrently (exchange calls only)
+        results, batch = order_dispatcher.dispatch(jobs)
+        if batch:
+            worker_logger.info(
+                f"Signal #{signal.id} {signal.symbol}: {batch.orders} orders in {batch.elapsed * 1000:.0f}ms, "
+                f"fill spread {batch.spread * 1000:.0f}ms"
+            )
+        
+        # 3. Save the results on this thread: one transaction for the signal,
+        # or one per user if that fails, so one user's bad data can't make
+        # the whole signal fail on every retry of its claim
+        signal_id, symbol, shard = signal.id, signal.symbol, get_worker_shard()
+        filled = [result for result in results if not result.error]
+        unsaved = [result for result in results if result.value]
+        try:
+            saved = [save_order_results(db, signal, filled, reversing, tp_prices, live_price, push_tokens)]
+            complete_claim(db, signal_id, shard)
+            db.commit()
+            unsaved = []
+        except Exception as e:
+            db.rollback()
+            worker_logger.error(f"Saving signal #{signal_id} orders failed ({e}), saving them user by user")
+            saved, failed = [], 0
+            for result in filled:
                 try:
-                    signal = db.query(Signal).filter(Signal.id == position.signal_id).first()
-                    if signal:
-                        broadcast_signal_cancelled(
-                            signal_id=signal.id,
-                            symbol=position.symbol,
-                            reason=f"Signal Reversal: {position_side} → {signal_side}"
-                        )
-                        worker_logger.info(f"📢 Sent reversal notification to Telegram for {position.symbol}")
-                except Exception as broadcast_error:
-                    worker_logger.error(f"Telegram reversal notification failed: {broadcast_error}")
-                
-                # Notify Signal Engine that position closed (reversal)
-                if position.signal_id:
-                    notify_signal_engine_closure(position.signal_id, current_price, 'REVERSAL')
-                
-                db.flush()  # Commit the reversal before opening new position
-            else:
-                worker_logger.error(
-                    f"Failed to close position #{position.id} for reversal: {close_result.get('error')}"
-                )
+                    batch = save_order_results(db, signal, [result], reversing, tp_prices, live_price, push_tokens)
+                    db.commit()
+                    saved.append(batch)
+                except Exception as user_error:
+                    db.rollback()
+                    failed += 1
+                    worker_logger.error(f"Signal #{signal_id}: saving user {result.job.account}'s orders failed: "
+                                        f"{user_error}")
+                    undo_orders([result])
+                unsaved.remove(result)
+            
+            if failed and not saved:
+                # Nothing could be saved: retry the claim once its lease expires
+                fail_claim(db, signal_id, shard, str(e))
+                return
+            if failed:
+                worker_logger.error(f"Signal #{signal_id}: skipped {failed} users whose orders could not be saved")
+            complete_claim(db, signal_id, shard)
+            db.commit()
         
     except Exception as e:
-        worker_logger.error(f"Signal reversal handling error: {e}", exc_info=True)
+        worker_logger.error(f"Open positions error for signal #{signal.id}: {e}")
+        db.rollback()
+        
+        # Not saved: undo the paper closes and opens, so a retry of the claim
+        # doesn't pay the closed margin out twice
+        undo_orders(unsaved)
+        fail_claim(db, signal.id, get_worker_shard(), str(e))
+        return
+    
+    opened = 0
+    for batch in saved:
+        for user_id, position in batch.cancelled:
+            open_counts[user_id] = open_counts.get(user_id, 0) - 1
+            active = open_by_user_symbol[(user_id, symbol)]
+            active[:] = [p for p in active if p is not position]
+        for user_id, position in batch.opened:
+            open_counts[user_id] = open_counts.get(user_id, 0) + 1
+            open_by_user_symbol.setdefault((user_id, symbol), []).append(position)
+        opened += len(batch.opened)
+    
+    worker_logger.info(f"Signal #{signal_id} {symbol}: opened {opened}/{len(accounts)} positions")
+    
+    for batch in saved:
+        for reversed_signal_id, reversed_symbol, reason in batch.reversals:
+            announce_reversal(reversed_signal_id, reversed_symbol, reason, live_price)
+    
+    # Send trade start notifications (PREMIUM users only)
+    for batch in saved:
+        for tokens, position_data in batch.notifications:
+            try:
+                send_trade_start_notification(tokens, position_data)
+            except Exception as notif_error:
+                worker_logger.error(f"Trade start notification failed: {notif_error}")
 
 
-def open_position_for_signal(db: Session, user_id: int, signal: Signal):
+def save_order_results(db: Session, signal: Signal, results: List[OrderResult],
+                       reversing: Dict[int, List[Position]], tp_prices: List[float],
+                       live_price: Optional[float], push_tokens: Dict[int, List[str]]) -> SavedOrders:
     """
-    Open a position for a user based on a signal
+    Add the reversals, positions, targets and logs of placed orders to the
+    session (the caller commits)
     """
-    try:
-        settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
-        if not settings:
-            return
-        
-        # Calculate quantity based on per_trade_usdt and leverage
-        leverage = settings.leverage
-        per_trade = settings.per_trade_usdt
-        qty = (per_trade * leverage) / signal.entry
-        
-        # Open position via paper client
-        order = paper_client.open_position(
-            user_id=user_id,
-            symbol=signal.symbol,
-            side=signal.side,
-            qty=qty,
-            entry_price=signal.entry,
-            leverage=leverage
-        )
+    opened: List[Tuple[Position, Dict]] = []
+    cancelled: List[Tuple[int, Position]] = []
+    reversals: List[Tuple[Optional[int], str, str]] = []
+    for result in results:
+        user_id = result.job.account
+        closes, order = result.value
+        
+        for position, close_result in zip(reversing[user_id], closes):
+            if record_reversal(db, user_id, signal, position, close_result, live_price):
+                cancelled.append((user_id, position))
+                reversals.append((position.signal_id, position.symbol,
+                                  f"Signal Reversal: {_direction(position.side)} → {_direction(signal.side)}"))
         
         if not order.get('success'):
             worker_logger.warning(f"Failed to open position for user {user_id}: {order.get('error')}")
-            return
+            continue
+        order['fill_latency_ms'] = round(result.latency * 1000, 1)
         
-        # Create position record
+        # Position with its TP targets (qty split across targets)
+        qty = order['qty']
+        qty_per_target = qty / len(tp_prices)
         position = Position(
             user_id=user_id,
             signal_id=signal.id,
             symbol=signal.symbol,
             side=signal.side,
-            leverage=leverage,
+            leverage=order['leverage'],
             qty=qty,
             entry_price=order['entry_price'],
             remaining_qty=qty,
-            status='OPEN'
+            status='OPEN',
+            targets=[
+                PositionTarget(target_index=i, price=tp_price, qty=qty_per_target, hit=False)
+                for i, tp_price in enumerate(tp_prices, 1)
+            ]
         )
-        db.add(position)
-        db.flush()
-        
-        # Create TP targets (split qty across targets)
-        tp_prices = signal.tp if isinstance(signal.tp, list) else [signal.tp]
-        qty_per_target = qty / len(tp_prices)
-        
-        for i, tp_price in enumerate(tp_prices, 1):
-            target = PositionTarget(
-                position_id=position.id,
-                target_index=i,
-                price=tp_price,
-                qty=qty_per_target,
-                hit=False
-            )
-            db.add(target)
-        
-        # Log event
-        trade_log = TradeLog(
-            user_id=user_id,
+        opened.append((position, order))
+    
+    # Bulk insert positions + targets, then their logs
+    db.add_all([position for position, _ in opened])
+    db.flush()
+    db.add_all([
+        TradeLog(
+            user_id=position.user_id,
             position_id=position.id,
             signal_id=signal.id,
             type='OPEN',
-            message=f"Opened {signal.side} position: {qty:.4f} {signal.symbol} @ {order['entry_price']}",
+            message=f"Opened {signal.side} position: {position.qty:.4f} {signal.symbol} @ {order['entry_price']}",
             meta=order
         )
-        db.add(trade_log)
-        
-        db.commit()
-        
-        worker_logger.info(f"Position opened for user {user_id}, signal #{signal.id}")
-        
-        # Send trade start notification (PREMIUM users only)
+        for position, order in opened
+    ])
+    for position, order in opened:
+        paper_client.link_position(order.get('paper_id'), position.id)
+    
+    # Read what's needed after the commit now (commit expires the objects)
+    return SavedOrders(
+        opened=[(position.user_id, position) for position, _ in opened],
+        cancelled=cancelled,
+        reversals=reversals,
+        notifications=[
+            (push_tokens[position.user_id], {
+                "id": position.id,
+                "symbol": position.symbol,
+                "direction": position.side,
+                "entry_price": position.entry_price,
+            })
+            for position, _ in opened if push_tokens.get(position.user_id)
+        ]
+    )
+
+
+def undo_orders(results: List[OrderResult]):
+    """Undo the paper closes and opens of orders whose database records were not saved"""
+    for result in results:
+        if result.value:
+            closes, order = result.value
+            for close_result in closes:
+                paper_client.undo_close(close_result)
+            paper_client.cancel_position(order.get('paper_id'))
+
+
+
+def _order_job(account: TradeAccount, signal: Signal, market_price: float, closes: List[Dict]):
+    """
+    Exchange work for one user and signal: close reversed positions, then open
+    
+    Returns:
+        Callable returning (close results, open order)
+    """
+    # Calculate quantity based on per_trade_usdt and leverage
+    leverage = account.leverage
+    qty = (account.per_trade_usdt * leverage) / signal.entry
+    symbol, side, entry = signal.symbol, signal.side, signal.entry
+    
+    def run():
+        close_results = []
         try:
-            user = db.query(User).filter(User.id == user_id).first()
-            
-            if user and user.subscription_type == 'PREMIUM' and user.notifications_enabled:
-                tokens = get_user_push_tokens(db, user_id)
-                
-                if tokens:
-                    position_data = {
-                        "id": position.id,
-                        "symbol": position.symbol,
-                        "direction": position.side,
-                        "entry_price": position.entry_price,
-                    }
-                    send_trade_start_notification(tokens, position_data)
-                    worker_logger.info(f"📱 Sent trade start notification to user {user_id}")
-        except Exception as notif_error:
-            worker_logger.error(f"Trade start notification failed: {notif_error}")
-        
-    except Exception as e:
-        worker_logger.error(f"Open position error: {e}")
-        db.rollback()
+            for close in closes:
+                close_results.append(paper_client.close_position(**close))
+            order = paper_client.open_position(
+                user_id=account.user_id,
+                symbol=symbol,
+                side=side,
+                qty=qty,
+                entry_price=entry,
+                leverage=leverage,
+                market_price=market_price
+            )
+        except Exception:
+            # A failed job has no result to save: don't leave its reversal closes applied
+            for close_result in close_results:
+                paper_client.undo_close(close_result)
+            raise
+        return close_results, order
+    
+    return run
+
+
+def _direction(side: str) -> str:
+    """Normalize BUY/SELL and LONG/SHORT to LONG/SHORT"""
+    side = side.upper()
+    return {'BUY': 'LONG', 'SELL': 'SHORT'}.get(side, side)
+
+
+def reversed_positions(new_signal: Signal, active_positions: List[Position]) -> List[Position]:
+    """Active positions opposite to a new signal (instant reversal, no time window)"""
+    signal_side = _direction(new_signal.side)
+    return [
+        position for position in active_positions
+        if {_direction(position.side), signal_side} == {'LONG', 'SHORT'}
+    ]
+
+
+def record_reversal(db: Session, user_id: int, new_signal: Signal, position: Position,
+                    close_result: Dict, current_price: float) -> bool:
+    """
+    Record the exchange close of a reversed position
+    
+    Returns:
+        True if the close succeeded and the position was cancelled
+    """
+    position_side = _direction(position.side)
+    signal_side = _direction(new_signal.side)
+    
+    if not close_result.get('success'):
+        worker_logger.error(
+            f"Failed to close position #{position.id} for reversal: {close_result.get('error')}"
+        )
+        return False
+    
+    # REVERSAL DETECTED - the opposite position was closed immediately
+    time_diff = (datetime.utcnow() - position.created_at).total_seconds()
+    worker_logger.warning(
+        f"🔄 INSTANT SIGNAL REVERSAL DETECTED for user {user_id}: "
+        f"{position.symbol} {position_side} → {signal_side} "
+        f"(position age: {time_diff:.0f}s, no time restriction)"
+    )
+    
+    position.status = 'CANCELLED'
+    position.closed_at = datetime.utcnow()
+    position.remaining_qty = 0
+    position.pnl_usdt = close_result.get('pnl_usdt', 0)
+    position.pnl_pct = close_result.get('pnl_pct', 0)
+    
+    # Log reversal event
+    trade_log = TradeLog(
+        user_id=user_id,
+        position_id=position.id,
+        signal_id=position.signal_id,
+        type='REVERSAL',
+        message=f"Position closed due to instant market reversal: {position_side} → {signal_side}",
+        meta={
+            'reversal_reason': 'market_direction_change',
+            'new_signal_id': new_signal.id,
+            'position_age_seconds': time_diff,
+            'close_price': current_price,
+            'instant_reversal': True,
+            **close_result
+        }
+    )
+    db.add(trade_log)
+    
+    worker_logger.info(
+        f"✅ Reversed position #{position.id}: {position.side} @ {position.entry_price} → "
+        f"Closed @ {current_price}, PnL: {close_result.get('pnl_usdt', 0):.2f} USDT"
+    )
+    
+    # Mark all targets as cancelled
+    for target in position.targets:
+        if not target.hit:
+            target.hit = True
+            target.hit_at = datetime.utcnow()
+    
+    return True
+
+
+def announce_reversal(signal_id: Optional[int], symbol: str, reason: str, current_price: float):
+    """Tell Telegram and the Signal Engine about a recorded reversal (after its commit)"""
+    if not signal_id:
+        return
+    
+    # Send Telegram cancellation notification
+    try:
+        broadcast_signal_cancelled(signal_id=signal_id, symbol=symbol, reason=reason)
+        worker_logger.info(f"📢 Sent reversal notification to Telegram for {symbol}")
+    except Exception as broadcast_error:
+        worker_logger.error(f"Telegram reversal notification failed: {broadcast_error}")
+    
+    # Notify Signal Engine that position closed (reversal)
+    notify_signal_engine_closure(signal_id, current_price, 'REVERSAL')
 
 
 def monitor_positions(db: Session):
     """
     Monitor all open positions and check for TP/SL hits
+    
+    Pending TP/SL levels live in the trigger index across ticks. A tick
+    registers newly opened positions, fetches one price per symbol that has
+    pending levels, and loads/handles only the positions whose levels the
+    price crossed, so cost scales with symbols and fired triggers rather
+    than open positions. The same prices then mark the whole paper book to
+    market in one vectorized pass, which also finds liquidations.
+    
+    Paper closes are undone if the tick's commit fails, and the Signal Engine
+    hears about them only once the commit succeeded.
     """
+    fired: Dict[int, List[Trigger]] = {}
+    tick = MonitorTick(closes=[], liquidations=[], tp_hits=[], closures=[])
     try:
-        # Get all open/partial positions
-        open_positions = db.query(Position).filter(
-            Position.status.in_(['OPEN', 'PARTIAL'])
-        ).all()
-        
-        for position in open_positions:
-            check_position_targets(db, position)
+        # Open positions of this worker's users
+        shard = get_worker_shard()
+        open_ids = {
+            position_id for position_id, user_id in db.query(Position.id, Position.user_id).filter(
+                Position.status.in_(['OPEN', 'PARTIAL'])
+            ).all()
+            if shard.owns(user_id)
+        }
+        
+        # Forget closed positions, index new ones
+        for position_id in trigger_index.owners():
+            if position_id not in open_ids:
+                trigger_index.remove(position_id)
+        
+        new_ids = [position_id for position_id in open_ids if position_id not in trigger_index]
+        if new_ids:
+            for position in load_positions(db, new_ids):
+                register_position_triggers(position)
+        
+        # One price per symbol, then only the crossed levels
+        symbol_prices: Dict[str, float] = {}
+        for symbol in trigger_index.symbols():
+            current_price = paper_client.get_current_price(symbol)
+            if not current_price:
+                worker_logger.warning(f"No price for {symbol}, skipping its triggers this tick")
+                continue
+            
+            symbol_prices[symbol] = current_price
+            for trigger in trigger_index.update(symbol, current_price):
+                fired.setdefault(trigger.owner, []).append(trigger)
+        
+        if fired:
+            for position in load_positions(db, list(fired)):
+                apply_position_triggers(db, tick, position, fired[position.id], symbol_prices[position.symbol])
+        
+        # Paper book: PnL and liquidation for all positions at once
+        liquidations = {item['ref']: item for item in paper_client.mark_to_market(symbol_prices) if item['ref']}
+        tick.liquidations.extend(liquidations.values())
+        if liquidations:
+            for position in load_positions(db, list(liquidations)):
+                close_position_liquidated(db, position, liquidations[position.id])
+                fired.setdefault(position.id, [])
         
         db.commit()
         
     except Exception as e:
         worker_logger.error(f"Monitor positions error: {e}")
         db.rollback()
+        
+        # Nothing of this tick was saved: give the paper book its positions back
+        for close_result in tick.closes:
+            paper_client.undo_close(close_result)
+        for liquidation in tick.liquidations:
+            paper_client.undo_liquidation(liquidation)
+        return
+    
+    finally:
+        # Handled positions are re-indexed from the DB next tick (remaining targets, SL)
+        for position_id in fired:
+            trigger_index.remove(position_id)
+    
+    # Notify Signal Engine of the committed TP hits and closures
+    for signal_id, hit_price, tp_number in tick.tp_hits:
+        notify_signal_engine_tp_hit(signal_id=signal_id, hit_price=hit_price, tp_number=tp_number)
+    for signal_id, exit_price, close_reason in tick.closures:
+        notify_signal_engine_closure(signal_id, exit_price, close_reason)
 
 
-def check_position_targets(db: Session, position: Position):
+def load_positions(db: Session, position_ids: List[int]) -> List[Position]:
+    """Open positions with their signals and targets (3 queries)"""
+    return db.query(Position).options(
+        selectinload(Position.signal),
+        selectinload(Position.targets)
+    ).filter(
+        Position.id.in_(position_ids),
+        Position.status.in_(['OPEN', 'PARTIAL'])
+    ).all()
+
+
+def register_position_triggers(position: Position):
+    """
+    Index a position's unhit TP targets and its stop loss
     """
-    Check if position has hit any targets or stop loss
+    signal = position.signal
+    triggers = []
+    if signal:
+        tp_direction = take_profit_direction(position.side)
+        triggers = [
+            (position.symbol, ('TP', target.target_index), target.price, tp_direction)
+            for target in position.targets if not target.hit
+        ]
+        triggers.append((position.symbol, 'SL', signal.sl, stop_loss_direction(position.side)))
+    
+    trigger_index.register(position.id, triggers)
+
+
+def apply_position_triggers(db: Session, tick: MonitorTick, position: Position, triggers: List[Trigger],
+                            current_price: float):
+    """
+    Close what a position's fired triggers call for
+    
+    Args:
+        tick: Collects the paper closes and Signal Engine events
+        triggers: Fired triggers of this position
+        current_price: Price that fired them
     """
     try:
-        signal = db.query(Signal).filter(Signal.id == position.signal_id).first()
-        if not signal:
-            return
-        
-        # Get TP targets and SL
-        tp_prices = signal.tp if isinstance(signal.tp, list) else [signal.tp]
-        sl_price = signal.sl
-        
-        # Check current price
-        result = paper_client.check_price_targets(
-            symbol=position.symbol,
-            targets=tp_prices,
-            sl=sl_price,
-            entry=position.entry_price,
-            side=position.side
-        )
-        
-        current_price = result.get('current_price')
-        if not current_price:
-            return
-        
         # Handle stop loss hit
-        if result.get('hit_sl'):
-            close_position_sl(db, position, sl_price)
+        stop = next((trigger for trigger in triggers if trigger.tag == 'SL'), None)
+        if stop:
+            close_position_sl(db, tick, position, stop.level)
             return
         
-        # Handle target hit
-        target_index = result.get('hit_target_index')
-        if target_index:
-            close_position_target(db, position, target_index, current_price)
+        # Handle target hits (a gap may cross several at once)
+        for target_index in sorted(trigger.tag[1] for trigger in triggers):
+            if position.status not in ('OPEN', 'PARTIAL'):
+                break
+            close_position_target(db, tick, position, target_index, current_price)
         
     except Exception as e:
         worker_logger.error(f"Check position targets error: {e}")
 
 
-def close_position_target(db: Session, position: Position, target_index: int, price: float):
+def close_position_target(db: Session, tick: MonitorTick, position: Position, target_index: int, price: float):
     """
     Close partial position when target is hit
     """
     try:
-        # Find the target
-        target = db.query(PositionTarget).filter(
-            PositionTarget.position_id == position.id,
-            PositionTarget.target_index == target_index,
-            PositionTarget.hit == False
-        ).first()
+        # Find the target (targets are eager-loaded by monitor_positions)
+        target = next(
+            (t for t in position.targets if t.target_index == target_index and not t.hit),
+            None
+        )
         
         if not target:
             return
@@ -573,10 +720,13 @@ def close_position_target(db: Session, position: Position, target_index: int, pr
             qty=target.qty,
             entry_price=position.entry_price,
             exit_price=price,
-            leverage=position.leverage
+            leverage=position.leverage,
+            position_id=position.id
         )
         
         if close_result.get('success'):
+            tick.closes.append(close_result)
+            
             # Mark target as hit
             target.hit = True
             target.hit_at = datetime.utcnow()
@@ -608,7 +758,7 @@ def close_position_target(db: Session, position: Position, target_index: int, pr
             # Broadcast TP hit to Telegram
             try:
                 from broadcast import broadcast_target_hit
-                signal = db.query(Signal).filter(Signal.id == position.signal_id).first()
+                signal = position.signal
                 if signal:
                     broadcast_target_hit(
                         signal_id=signal.id,
@@ -621,16 +771,9 @@ def close_position_target(db: Session, position: Position, target_index: int, pr
             except Exception as tg_error:
                 worker_logger.error(f"Telegram TP notification failed: {tg_error}")
             
-            # Notify Signal Engine of TP hit for multi-TP tracking
+            # Notify Signal Engine of TP hit for multi-TP tracking (after the commit)
             if position.signal_id:
-                try:
-                    notify_signal_engine_tp_hit(
-                        signal_id=position.signal_id,
-                        hit_price=price,
-                        tp_number=target_index
-                    )
-                except Exception as se_error:
-                    worker_logger.error(f"Signal Engine TP notification failed: {se_error}")
+                tick.tp_hits.append((position.signal_id, price, target_index))
             
             # Send trade end notification when position fully closes (PREMIUM users only)
             if position.status == 'CLOSED':
@@ -652,15 +795,15 @@ def close_position_target(db: Session, position: Position, target_index: int, pr
                 except Exception as notif_error:
                     worker_logger.error(f"Trade end notification failed: {notif_error}")
                 
-                # Notify Signal Engine that position fully closed
+                # Notify Signal Engine that position fully closed (after the commit)
                 if position.signal_id:
-                    notify_signal_engine_closure(position.signal_id, price, 'TP')
+                    tick.closures.append((position.signal_id, price, 'TP'))
         
     except Exception as e:
         worker_logger.error(f"Close position target error: {e}")
 
 
-def close_position_sl(db: Session, position: Position, sl_price: float):
+def close_position_sl(db: Session, tick: MonitorTick, position: Position, sl_price: float):
     """
     Close entire position when stop loss is hit
     """
@@ -672,10 +815,12 @@ def close_position_sl(db: Session, position: Position, sl_price: float):
             qty=position.remaining_qty,
             entry_price=position.entry_price,
             exit_price=sl_price,
-            leverage=position.leverage
+            leverage=position.leverage,
+            position_id=position.id
         )
         
         if close_result.get('success'):
+            tick.closes.append(close_result)
             position.status = 'STOPPED'
             position.closed_at = datetime.utcnow()
             position.remaining_qty = 0
@@ -698,7 +843,7 @@ def close_position_sl(db: Session, position: Position, sl_price: float):
             # Broadcast SL hit to Telegram
             try:
                 from broadcast import broadcast_stop_loss
-                signal = db.query(Signal).filter(Signal.id == position.signal_id).first()
+                signal = position.signal
                 if signal:
                     broadcast_stop_loss(
                         signal_id=signal.id,
@@ -729,9 +874,38 @@ def close_position_sl(db: Session, position: Position, sl_price: float):
             except Exception as notif_error:
                 worker_logger.error(f"Trade end notification failed: {notif_error}")
             
-            # Notify Signal Engine that position closed (stop loss)
+            # Notify Signal Engine that position closed (stop loss, after the commit)
             if position.signal_id:
-                notify_signal_engine_closure(position.signal_id, sl_price, 'SL')
+                tick.closures.append((position.signal_id, sl_price, 'SL'))
         
     except Exception as e:
         worker_logger.error(f"Close position SL error: {e}")
+
+
+def close_position_liquidated(db: Session, position: Position, liquidation: Dict):
+    """
+    Record a position the paper engine liquidated (its margin is lost)
+    
+    Args:
+        liquidation: Entry returned by paper_client.mark_to_market
+    """
+    try:
+        position.status = 'STOPPED'
+        position.closed_at = datetime.utcnow()
+        position.remaining_qty = 0
+        position.pnl_usdt = (position.pnl_usdt or 0) + liquidation['pnl_usdt']
+        position.pnl_pct = -100.0
+        
+        db.add(TradeLog(
+            user_id=position.user_id,
+            position_id=position.id,
+            signal_id=position.signal_id,
+            type='LIQUIDATION',
+            message=f"Liquidated at {liquidation['price']:.6g}",
+            meta=liquidation
+        ))
+        
+        worker_logger.warning(f"💥 Position #{position.id} {position.symbol} liquidated at {liquidation['price']:.6g}, PnL: {liquidation['pnl_usdt']:.2f}")
+        
+    except Exception as e:
+        worker_logger.error(f"Close position liquidation error: {e}")
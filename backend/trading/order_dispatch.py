@@ -0,0 +1,174 @@
+"""
+Order Dispatch
+Places the per-user orders of a signal concurrently, so one slow exchange
+call no longer delays the entry of every user after it.
+
+Orders run on a bounded thread pool. At most ORDER_ACCOUNT_CONCURRENCY
+orders per exchange account and ORDER_EXCHANGE_CONCURRENCY orders per
+exchange are in flight at once. Jobs only talk to the exchange: the caller
+applies their results to the database afterwards, in one transaction on its
+own thread.
+
+Every batch records its fairness spread, the time between the first and the
+last user's fill.
+"""
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from utils.logger import worker_logger
+
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "16"))
+ORDER_EXCHANGE_CONCURRENCY = int(os.getenv("ORDER_EXCHANGE_CONCURRENCY", "8"))
+ORDER_ACCOUNT_CONCURRENCY = int(os.getenv("ORDER_ACCOUNT_CONCURRENCY", "1"))
+
+
+class OrderJob(NamedTuple):
+    """Exchange work for one account"""
+    account: Hashable           # e.g. user id
+    exchange: str               # limits are shared by all accounts of an exchange
+    run: Callable[[], Any]
+
+
+class OrderResult(NamedTuple):
+    job: OrderJob
+    value: Any                  # what run() returned (None if it raised)
+    error: Optional[str]
+    latency: float              # seconds from batch start to fill
+
+
+class BatchStats(NamedTuple):
+    orders: int
+    failed: int
+    first_fill: float           # seconds from batch start
+    last_fill: float
+    elapsed: float
+
+    @property
+    def spread(self) -> float:
+        """First-to-last fill latency"""
+        return self.last_fill - self.first_fill
+
+
+class OrderDispatcher:
+    """Bounded, per-exchange and per-account limited order pool"""
+
+    def __init__(self, max_workers: int = ORDER_WORKERS, per_exchange: int = ORDER_EXCHANGE_CONCURRENCY,
+                 per_account: int = ORDER_ACCOUNT_CONCURRENCY):
+        """
+        Args:
+            max_workers: Threads placing orders (1: place inline, one by one)
+            per_exchange: Orders in flight per exchange
+            per_account: Orders in flight per exchange account
+        """
+        self.max_workers = max(1, max_workers)
+        self.per_exchange = max(1, per_exchange)
+        self.per_account = max(1, per_account)
+        self.pool: Optional[ThreadPoolExecutor] = None
+
+        self._lock = threading.Lock()
+        self._exchange_limits: Dict[str, threading.Semaphore] = {}
+        # (exchange, account) -> [semaphore, jobs holding or waiting for it]; dropped when idle
+        self._account_limits: Dict[Tuple[str, Hashable], List] = {}
+
+        self.spreads = deque(maxlen=100)  # recent batches' fairness spreads
+        self.stats = {"batches": 0, "orders": 0, "errors": 0, "max_spread": 0.0}
+
+    def dispatch(self, jobs: List[OrderJob]) -> Tuple[List[OrderResult], Optional[BatchStats]]:
+        """
+        Run jobs concurrently within the limits and wait for all of them
+
+        Returns:
+            Results in job order, and the batch's fill statistics (None if no jobs)
+        """
+        if not jobs:
+            return [], None
+
+        started = time.monotonic()
+        if self.max_workers == 1 or len(jobs) == 1:
+            results = [self._run(job, started) for job in jobs]
+        else:
+            pool = self._pool()
+            futures = [pool.submit(self._run, job, started) for job in jobs]
+            results = [future.result() for future in futures]
+
+        latencies = [result.latency for result in results]
+        batch = BatchStats(
+            orders=len(results),
+            failed=sum(1 for result in results if result.error),
+            first_fill=min(latencies),
+            last_fill=max(latencies),
+            elapsed=time.monotonic() - started
+        )
+
+        with self._lock:
+            self.spreads.append(batch.spread)
+            self.stats["batches"] += 1
+            self.stats["orders"] += batch.orders
+            self.stats["errors"] += batch.failed
+            self.stats["max_spread"] = max(self.stats["max_spread"], batch.spread)
+
+        return results, batch
+
+    def get_stats(self) -> Dict:
+        """Counters and fairness spread of recent batches (seconds)"""
+        spreads = sorted(self.spreads)
+        return {
+            **self.stats,
+            "avg_spread": round(sum(spreads) / len(spreads), 4) if spreads else None,
+            "p95_spread": round(spreads[min(len(spreads) - 1, int(len(spreads) * 0.95))], 4) if spreads else None,
+        }
+
+    def shutdown(self):
+        if self.pool:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    # ------------------------------------------------------------------
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="order")
+        return self.pool
+
+    def _limits(self, job: OrderJob) -> Tuple[threading.Semaphore, threading.Semaphore]:
+        with self._lock:
+            exchange = self._exchange_limits.get(job.exchange)
+            if exchange is None:
+                exchange = self._exchange_limits[job.exchange] = threading.Semaphore(self.per_exchange)
+            key = (job.exchange, job.account)
+            account = self._account_limits.get(key)
+            if account is None:
+                account = self._account_limits[key] = [threading.Semaphore(self.per_account), 0]
+            account[1] += 1
+        return account[0], exchange
+
+    def _release_account(self, job: OrderJob):
+        """Forget an account's semaphore once no job holds or waits for it"""
+        with self._lock:
+            key = (job.exchange, job.account)
+            account = self._account_limits[key]
+            account[1] -= 1
+            if not account[1]:
+                del self._account_limits[key]
+
+    def _run(self, job: OrderJob, started: float) -> OrderResult:
+        account, exchange = self._limits(job)
+        try:
+            # Account first: a job waiting on its account doesn't hold an exchange slot
+            with account, exchange:
+                try:
+                    value, error = job.run(), None
+                except Exception as e:
+                    worker_logger.error(f"Order for account {job.account} on {job.exchange} failed: {e}")
+                    value, error = None, str(e)
+        finally:
+            self._release_account(job)
+        return OrderResult(job, value, error, time.monotonic() - started)
+
+
+# Global dispatcher instance
+order_dispatcher = OrderDispatcher()
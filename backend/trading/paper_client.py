@@ -2,12 +2,16 @@
 Paper Trading Client
 Simulates trading without real exchange connections
 Supports up to 50 concurrent positions per user
+
+Balances and open paper positions live in the columnar PaperEngine
+(trading/paper_engine.py), persisted across worker restarts.
 """
 import os
 from typing import Dict, Optional, List
 from datetime import datetime
 
 from utils.price_feed import price_feed
+from trading.paper_engine import PaperEngine
 from utils.logger import worker_logger
 
 
@@ -19,19 +23,51 @@ class PaperTradingClient:
     
     def __init__(self):
         self.mode = os.getenv("EXCHANGE_MODE", "paper")
-        self.user_balances = {}  # user_id -> balance
+        self.engine = PaperEngine()
         worker_logger.info(f"Paper trading client initialized (mode: {self.mode})")
     
     def get_balance(self, user_id: int) -> float:
         """Get user's virtual USDT balance"""
-        return self.user_balances.get(user_id, 0.0)
+        return self.engine.get_balance(user_id)
     
     def set_balance(self, user_id: int, balance: float):
         """Set user's virtual balance"""
-        self.user_balances[user_id] = balance
+        self.engine.set_balance(user_id, balance)
+    
+    def link_position(self, paper_id: Optional[int], position_id: int):
+        """Record which DB position a paper position belongs to"""
+        if paper_id:
+            self.engine.link(paper_id, position_id)
+    
+    def cancel_position(self, paper_id: Optional[int]):
+        """Undo an open whose DB position was not saved (margin is refunded)"""
+        if paper_id:
+            self.engine.cancel(paper_id)
+    
+    def undo_close(self, close: Dict):
+        """Undo a close whose DB record was not saved (what it paid out is taken back)"""
+        if not close.get("success"):
+            return
+        if close.get("paper_close"):
+            self.engine.reopen(close["paper_close"])
+        elif close.get("credited"):
+            self.engine.credit(close["user_id"], -close["credited"])
+    
+    def undo_liquidation(self, liquidation: Dict):
+        """Undo a liquidation whose DB record was not saved (the position and its margin come back)"""
+        self.engine.reopen(liquidation)
+    
+    def mark_to_market(self, prices: Dict[str, float]) -> List[Dict]:
+        """
+        Revalue all paper positions at this tick's prices
+        
+        Returns:
+            Positions liquidated at this tick
+        """
+        return self.engine.mark_to_market(prices)
     
     def open_position(self, user_id: int, symbol: str, side: str, qty: float, 
-                     entry_price: float, leverage: int = 1) -> Dict:
+                     entry_price: float, leverage: int = 1, market_price: Optional[float] = None) -> Dict:
         """
         Open a new position (simulated)
         
@@ -42,20 +78,22 @@ class PaperTradingClient:
             qty: Quantity in base currency
             entry_price: Entry price
             leverage: Leverage multiplier
+            market_price: Fill price already fetched by the caller (batch fills)
         
         Returns:
             Dict with order details
         """
         try:
             # Get current price (use entry_price or fetch live)
-            current_price = price_feed.get_price(symbol) or entry_price
+            current_price = market_price or price_feed.get_price(symbol) or entry_price
             
             # Calculate cost
             cost_usdt = (qty * current_price) / leverage
             
-            # Check if user has enough balance
-            balance = self.get_balance(user_id)
-            if cost_usdt > balance:
+            # Deduct from balance (refused if the balance is insufficient)
+            paper_id = self.engine.open(user_id, symbol, side, qty, current_price, leverage)
+            if paper_id is None:
+                balance = self.get_balance(user_id)
                 worker_logger.warning(f"Insufficient balance for user {user_id}: need {cost_usdt}, have {balance}")
                 return {
                     "success": False,
@@ -64,11 +102,9 @@ class PaperTradingClient:
                     "balance": balance
                 }
             
-            # Deduct from balance
-            self.user_balances[user_id] = balance - cost_usdt
-            
             order = {
                 "success": True,
+                "paper_id": paper_id,
                 "symbol": symbol,
                 "side": side,
                 "qty": qty,
@@ -88,10 +124,13 @@ class PaperTradingClient:
     
     def close_position(self, user_id: int, symbol: str, side: str, qty: float,
                       entry_price: float, exit_price: Optional[float] = None,
-                      leverage: int = 1) -> Dict:
+                      leverage: int = 1, position_id: Optional[int] = None) -> Dict:
         """
         Close a position (simulated)
         
+        Args:
+            position_id: DB position the paper position is linked to
+        
         Returns:
             Dict with PnL calculation
         """
@@ -99,21 +138,28 @@ class PaperTradingClient:
             # Get current price
             current_price = exit_price or price_feed.get_price(symbol) or entry_price
             
-            # Calculate PnL
-            if side == "LONG":
-                pnl_pct = ((current_price - entry_price) / entry_price) * 100 * leverage
-                pnl_usdt = ((current_price - entry_price) / entry_price) * (qty * entry_price)
-            else:  # SHORT
-                pnl_pct = ((entry_price - current_price) / entry_price) * 100 * leverage
-                pnl_usdt = ((entry_price - current_price) / entry_price) * (qty * entry_price)
-            
-            # Return cost to user balance
-            cost_usdt = (qty * entry_price) / leverage
-            balance = self.get_balance(user_id)
-            self.user_balances[user_id] = balance + cost_usdt + pnl_usdt
+            paper_id = self.engine.find(user_id, symbol, side, ref=position_id)
+            closed = self.engine.close(paper_id, qty, current_price) if paper_id else None
+            credited = None
+            if closed:
+                pnl_usdt, pnl_pct = closed["pnl_usdt"], closed["pnl_pct"]
+            else:
+                # Position not in the paper book (opened before it existed)
+                if side == "LONG":
+                    pnl_pct = ((current_price - entry_price) / entry_price) * 100 * leverage
+                    pnl_usdt = ((current_price - entry_price) / entry_price) * (qty * entry_price)
+                else:  # SHORT
+                    pnl_pct = ((entry_price - current_price) / entry_price) * 100 * leverage
+                    pnl_usdt = ((entry_price - current_price) / entry_price) * (qty * entry_price)
+                
+                # Return cost to user balance
+                cost_usdt = (qty * entry_price) / leverage
+                credited = cost_usdt + pnl_usdt
+                self.engine.credit(user_id, credited)
             
             result = {
                 "success": True,
+                "user_id": user_id,
                 "symbol": symbol,
                 "side": side,
                 "qty": qty,
@@ -121,8 +167,11 @@ class PaperTradingClient:
                 "exit_price": current_price,
                 "pnl_usdt": round(pnl_usdt, 2),
                 "pnl_pct": round(pnl_pct, 2),
-                "new_balance": round(self.user_balances[user_id], 2),
-                "timestamp": datetime.utcnow().isoformat()
+                "new_balance": round(self.get_balance(user_id), 2),
+                "timestamp": datetime.utcnow().isoformat(),
+                # For undo_close()
+                "paper_close": closed,
+                "credited": credited
             }
             
             worker_logger.info(f"Closed {side} position for user {user_id}: PnL {pnl_usdt:.2f} USDT ({pnl_pct:.2f}%)")
@@ -144,51 +193,6 @@ class PaperTradingClient:
             Current price or None if unavailable
         """
         return price_feed.get_price(symbol)
-    
-    def check_price_targets(self, symbol: str, targets: List[float], sl: float, 
-                           entry: float, side: str) -> Dict:
-        """
-        Check if current price has hit any targets or stop loss
-        
-        Returns:
-            Dict with hit_target_index, hit_sl, current_price
-        """
-        current_price = price_feed.get_price(symbol)
-        
-        if not current_price:
-            return {"current_price": None}
-        
-        result = {
-            "current_price": current_price,
-            "hit_target_index": None,
-            "hit_sl": False
-        }
-        
-        if side == "LONG":
-            # Check stop loss
-            if current_price <= sl:
-                result["hit_sl"] = True
-                return result
-            
-            # Check targets (ascending prices for LONG)
-            for i, target_price in enumerate(targets, 1):
-                if current_price >= target_price:
-                    result["hit_target_index"] = i
-                    break
-        
-        else:  # SHORT
-            # Check stop loss
-            if current_price >= sl:
-                result["hit_sl"] = True
-                return result
-            
-            # Check targets (descending prices for SHORT)
-            for i, target_price in enumerate(targets, 1):
-                if current_price <= target_price:
-                    result["hit_target_index"] = i
-                    break
-        
-        return result
 
 
 # Global paper trading client instance
@@ -0,0 +1,505 @@
+"""
+Paper Trading Engine
+Balances and open paper positions held in columnar numpy arrays, so
+mark-to-market, PnL and liquidation checks run for every position at once
+per price tick.
+
+State survives restarts: every change is appended to a write-ahead log
+(one JSON line per operation) and the arrays are snapshotted periodically
+(np.savez, on the first change after PAPER_SNAPSHOT_SECONDS), after which
+the log is truncated. On start the latest snapshot
+is loaded and the log replayed on top of it.
+
+Public methods are serialized by a lock, so orders may be placed from
+several threads (trading/order_dispatch.py).
+"""
+import os
+import json
+import time
+import functools
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+
+from trading.sharding import WORKER_SHARD, WORKER_SHARDS
+from utils.logger import worker_logger
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Each worker shard keeps the book of its own users
+PAPER_DATA_DIR = os.getenv("PAPER_DATA_DIR", os.path.join(
+    BASE_DIR, "data", "paper" if WORKER_SHARDS == 1 else f"paper_shard{WORKER_SHARD}"
+))
+PAPER_STARTING_BALANCE = float(os.getenv("PAPER_STARTING_BALANCE", "0"))
+PAPER_SNAPSHOT_SECONDS = float(os.getenv("PAPER_SNAPSHOT_SECONDS", "300"))
+MAINTENANCE_MARGIN = 0.005  # of notional, as on Binance's lowest tier
+
+LONG, SHORT = 1, -1
+
+# Position columns: name -> dtype
+COLUMNS = {
+    "pid": np.int64,       # paper position id (stable)
+    "ref": np.int64,       # linked DB position id (0 = not linked)
+    "user": np.int32,      # user row
+    "symbol": np.int32,    # symbol code
+    "side": np.int8,       # LONG / SHORT
+    "qty": np.float64,
+    "entry": np.float64,
+    "leverage": np.float64,
+    "margin": np.float64,  # per unit of qty
+    "liq": np.float64,     # liquidation price
+    "open": np.bool_,
+}
+
+
+def side_sign(side: str) -> int:
+    return LONG if str(side).upper() in ("LONG", "BUY") else SHORT
+
+
+def liquidation_price(entry: float, side: int, leverage: float, mmr: float = MAINTENANCE_MARGIN) -> float:
+    """Isolated-margin liquidation price"""
+    if side == LONG:
+        return entry * (1 - 1 / leverage + mmr)
+    return entry * (1 + 1 / leverage - mmr)
+
+
+def _locked(method):
+    """Serialize calls from concurrent order threads"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _mutating(method):
+    """Serialized like _locked; snapshots afterwards when due, so the WAL stays bounded"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            result = method(self, *args, **kwargs)
+            self.maybe_snapshot()
+            return result
+    return wrapper
+
+
+class PaperEngine:
+    """Columnar paper book with WAL + snapshot persistence"""
+
+    def __init__(self, data_dir: Optional[str] = PAPER_DATA_DIR, starting_balance: float = PAPER_STARTING_BALANCE,
+                 snapshot_seconds: float = PAPER_SNAPSHOT_SECONDS, capacity: int = 1024):
+        """
+        Args:
+            data_dir: Where the snapshot and WAL live (None: in memory only)
+            starting_balance: Balance a user gets on first use
+            snapshot_seconds: Minimum interval between snapshots
+            capacity: Initial position rows (grows by doubling)
+        """
+        self.data_dir = data_dir
+        self.starting_balance = starting_balance
+        self.snapshot_seconds = snapshot_seconds
+
+        self.user_rows: Dict[int, int] = {}
+        self.user_ids = np.zeros(64, dtype=np.int64)
+        self.balances = np.zeros(64, dtype=np.float64)
+        self.unrealized = np.zeros(64, dtype=np.float64)
+
+        self.symbol_codes: Dict[str, int] = {}
+        self.symbols: List[str] = []
+
+        self.cols = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.size = 0  # rows in use (open and closed until the next compaction)
+        self.pid_rows: Dict[int, int] = {}
+        self.next_pid = 1
+
+        self.seq = 0
+        self._lock = threading.RLock()
+        self._wal = None
+        self._replaying = False
+        self._snapshot_at = time.time()
+
+        if data_dir:
+            self._recover()
+
+    # ------------------------------------------------------------------
+    # Users and symbols
+    # ------------------------------------------------------------------
+
+    def _user_row(self, user_id: int) -> int:
+        row = self.user_rows.get(user_id)
+        if row is not None:
+            return row
+
+        row = len(self.user_rows)
+        if row == len(self.user_ids):
+            self.user_ids = np.resize(self.user_ids, row * 2)
+            self.balances = np.resize(self.balances, row * 2)
+            self.unrealized = np.zeros(row * 2, dtype=np.float64)
+        self.user_rows[user_id] = row
+        self.user_ids[row] = user_id
+        self.balances[row] = 0.0
+        if self.starting_balance and not self._replaying:
+            self.set_balance(user_id, self.starting_balance)
+        return row
+
+    def _symbol_code(self, symbol: str) -> int:
+        code = self.symbol_codes.get(symbol)
+        if code is None:
+            code = self.symbol_codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    @_locked
+    def get_balance(self, user_id: int) -> float:
+        """Free balance (margin of open positions excluded)"""
+        return float(self.balances[self._user_row(user_id)])
+
+    @_mutating
+    def set_balance(self, user_id: int, balance: float):
+        self.balances[self._user_row(user_id)] = balance
+        self._log({"op": "balance", "user": user_id, "balance": balance})
+
+    @_mutating
+    def credit(self, user_id: int, amount: float):
+        """Add to (or take from) a user's free balance"""
+        self.balances[self._user_row(user_id)] += amount
+        self._log({"op": "credit", "user": user_id, "amount": amount})
+
+    @_locked
+    def get_equity(self, user_id: int) -> float:
+        """Free balance + margin + unrealized PnL as of the last tick"""
+        row = self._user_row(user_id)
+        mask = self._open_mask() & (self.cols["user"][:self.size] == row)
+        margin = float(np.sum(self.cols["margin"][:self.size][mask] * self.cols["qty"][:self.size][mask]))
+        return float(self.balances[row]) + margin + float(self.unrealized[row])
+
+    # ------------------------------------------------------------------
+    # Positions
+    # ------------------------------------------------------------------
+
+    def _open_mask(self) -> np.ndarray:
+        return self.cols["open"][:self.size]
+
+    def _grow(self):
+        capacity = len(self.cols["pid"]) * 2
+        self.cols = {name: np.resize(column, capacity) for name, column in self.cols.items()}
+
+    @_mutating
+    def open(self, user_id: int, symbol: str, side: str, qty: float, price: float, leverage: float = 1,
+             pid: Optional[int] = None) -> Optional[int]:
+        """
+        Open a paper position, taking its margin from the free balance
+
+        Returns:
+            Paper position id, or None if the balance is insufficient
+        """
+        row_user = self._user_row(user_id)
+        leverage = max(float(leverage), 1.0)
+        margin = price / leverage  # per unit
+        cost = qty * margin
+        if cost > self.balances[row_user] and not self._replaying:
+            return None
+
+        pid = pid or self.next_pid
+        self._add_row(pid, row_user, symbol, side, qty, price, leverage)
+        self.balances[row_user] -= cost
+
+        self._log({"op": "open", "pid": pid, "user": user_id, "symbol": symbol, "side": side,
+                   "qty": qty, "price": price, "leverage": leverage})
+        return pid
+
+    def _add_row(self, pid: int, row_user: int, symbol: str, side: str, qty: float, price: float,
+                 leverage: float, ref: int = 0) -> int:
+        if self.size == len(self.cols["pid"]):
+            self._grow()
+
+        self.next_pid = max(self.next_pid, pid + 1)
+        sign = side_sign(side)
+        row = self.size
+        for name, value in (("pid", pid), ("ref", ref), ("user", row_user), ("symbol", self._symbol_code(symbol)),
+                            ("side", sign), ("qty", qty), ("entry", price), ("leverage", leverage),
+                            ("margin", price / leverage), ("liq", liquidation_price(price, sign, leverage)),
+                            ("open", True)):
+            self.cols[name][row] = value
+        self.size += 1
+        self.pid_rows[pid] = row
+        return row
+
+    @_mutating
+    def link(self, pid: int, ref: int):
+        """Attach the DB position id to a paper position"""
+        row = self.pid_rows.get(pid)
+        if row is None:
+            return
+        self.cols["ref"][row] = ref
+        self._log({"op": "link", "pid": pid, "ref": ref})
+
+    @_locked
+    def find(self, user_id: int, symbol: str, side: str, ref: Optional[int] = None) -> Optional[int]:
+        """Paper id of an open position, by DB id or else the oldest matching one"""
+        open_rows = self._open_mask()
+        if ref:
+            rows = np.flatnonzero(open_rows & (self.cols["ref"][:self.size] == ref))
+            if len(rows):
+                return int(self.cols["pid"][rows[0]])
+
+        if user_id not in self.user_rows or symbol not in self.symbol_codes:
+            return None
+        rows = np.flatnonzero(
+            open_rows
+            & (self.cols["user"][:self.size] == self.user_rows[user_id])
+            & (self.cols["symbol"][:self.size] == self.symbol_codes[symbol])
+            & (self.cols["side"][:self.size] == side_sign(side))
+        )
+        return int(self.cols["pid"][rows[0]]) if len(rows) else None
+
+    @_mutating
+    def close(self, pid: int, qty: float, price: float) -> Optional[Dict]:
+        """
+        Close (part of) a paper position, returning margin + PnL to the balance
+
+        Returns:
+            Dict with pnl_usdt, pnl_pct, closed qty and entry (everything reopen()
+            needs to undo the close), or None if not open
+        """
+        row = self.pid_rows.get(pid)
+        if row is None or not self.cols["open"][row]:
+            return None
+
+        c = self.cols
+        qty = min(qty, c["qty"][row])
+        entry, sign, leverage = float(c["entry"][row]), int(c["side"][row]), float(c["leverage"][row])
+        pnl_usdt = sign * (price - entry) * qty
+        pnl_pct = sign * (price - entry) / entry * 100 * leverage
+
+        self.balances[c["user"][row]] += qty * c["margin"][row] + pnl_usdt
+        c["qty"][row] -= qty
+        if c["qty"][row] <= 1e-12:
+            c["open"][row] = False
+
+        self._log({"op": "close", "pid": pid, "qty": qty, "price": price})
+        return {
+            "pid": pid, "ref": int(c["ref"][row]), "user_id": int(self.user_ids[c["user"][row]]),
+            "symbol": self.symbols[c["symbol"][row]], "side": "LONG" if sign == LONG else "SHORT",
+            "qty": float(qty), "entry_price": entry, "leverage": leverage, "price": float(price),
+            "pnl_usdt": float(pnl_usdt), "pnl_pct": float(pnl_pct)
+        }
+
+    @_mutating
+    def reopen(self, closed: Dict):
+        """
+        Undo a close whose DB record was not saved: the position gets its qty
+        back and the margin + PnL paid out are taken from the balance
+
+        Args:
+            closed: What close() returned
+        """
+        row_user = self._user_row(closed["user_id"])
+        row = self.pid_rows.get(closed["pid"])
+        if row is None:
+            # Closed row dropped by a snapshot since: add it back empty
+            row = self._add_row(closed["pid"], row_user, closed["symbol"], closed["side"], 0.0,
+                                closed["entry_price"], closed["leverage"], ref=closed["ref"])
+
+        c = self.cols
+        self.balances[row_user] -= closed["qty"] * c["margin"][row] + closed["pnl_usdt"]
+        c["qty"][row] += closed["qty"]
+        c["open"][row] = True
+        self._log({"op": "reopen", "closed": closed})
+
+    @_mutating
+    def cancel(self, pid: int):
+        """Drop a paper position and refund its margin (open that was never recorded)"""
+        row = self.pid_rows.get(pid)
+        if row is None or not self.cols["open"][row]:
+            return
+        self.balances[self.cols["user"][row]] += self.cols["qty"][row] * self.cols["margin"][row]
+        self.cols["open"][row] = False
+        self._log({"op": "cancel", "pid": pid})
+
+    # ------------------------------------------------------------------
+    # Vectorized tick
+    # ------------------------------------------------------------------
+
+    @_locked
+    def mark_to_market(self, prices: Dict[str, float]) -> List[Dict]:
+        """
+        Revalue every open position and liquidate those past their price
+
+        Args:
+            prices: {symbol: price} of this tick (symbols missing are skipped)
+
+        Returns:
+            Liquidated positions (pid, ref, user_id, symbol, side, qty, entry_price,
+            leverage, price, pnl_usdt), which reopen() can undo like a close
+        """
+        if not self.size:
+            return []
+
+        px = np.full(len(self.symbols), np.nan)
+        for symbol, price in prices.items():
+            code = self.symbol_codes.get(symbol)
+            if code is not None and price:
+                px[code] = price
+
+        c = {name: column[:self.size] for name, column in self.cols.items()}
+        price = px[c["symbol"]]
+        priced = c["open"] & ~np.isnan(price)
+        upnl = np.where(priced, c["side"] * (price - c["entry"]) * c["qty"], 0.0)
+
+        users = len(self.user_rows)
+        self.unrealized = np.zeros(len(self.user_ids), dtype=np.float64)
+        self.unrealized[:users] = np.bincount(c["user"], weights=upnl, minlength=users)[:users]
+
+        liquidated = priced & np.where(c["side"] == LONG, price <= c["liq"], price >= c["liq"])
+        results = []
+        for row in np.flatnonzero(liquidated):
+            # Isolated margin: the position's margin is lost, nothing is returned
+            qty = float(c["qty"][row])
+            c["qty"][row] = 0.0
+            c["open"][row] = False
+            pid = int(c["pid"][row])
+            self._log({"op": "liquidate", "pid": pid})
+            results.append({
+                "pid": pid,
+                "ref": int(c["ref"][row]),
+                "user_id": int(self.user_ids[c["user"][row]]),
+                "symbol": self.symbols[c["symbol"][row]],
+                "side": "LONG" if c["side"][row] == LONG else "SHORT",
+                "qty": qty,
+                "entry_price": float(c["entry"][row]),
+                "leverage": float(c["leverage"][row]),
+                "price": float(c["liq"][row]),
+                "pnl_usdt": -qty * float(c["margin"][row]),
+            })
+
+        self.maybe_snapshot()
+        return results
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.data_dir, "paper_snapshot.npz")
+
+    @property
+    def _wal_path(self) -> str:
+        return os.path.join(self.data_dir, "paper_wal.jsonl")
+
+    def _log(self, entry: Dict):
+        if self._replaying or not self.data_dir:
+            return
+        self.seq += 1
+        entry["seq"] = self.seq
+        self._wal.write(json.dumps(entry) + "\n")
+        self._wal.flush()
+
+    def maybe_snapshot(self):
+        if self._wal is not None and not self._replaying and time.time() - self._snapshot_at >= self.snapshot_seconds:
+            self.snapshot()
+
+    @_locked
+    def snapshot(self):
+        """Write open positions and balances, then truncate the WAL"""
+        if not self.data_dir:
+            return
+        try:
+            self._compact()
+            users = len(self.user_rows)
+            tmp_path = self._snapshot_path + ".tmp.npz"
+            np.savez(
+                tmp_path,
+                meta=np.array([self.seq, self.next_pid], dtype=np.int64),
+                user_ids=self.user_ids[:users],
+                balances=self.balances[:users],
+                symbols=np.array(self.symbols, dtype=str),
+                **{name: column[:self.size] for name, column in self.cols.items()}
+            )
+            os.replace(tmp_path, self._snapshot_path)
+
+            # Entries up to self.seq are in the snapshot
+            self._wal.close()
+            self._wal = open(self._wal_path, "w")
+            self._snapshot_at = time.time()
+        except Exception as e:
+            worker_logger.error(f"❌ Paper snapshot failed: {e}")
+
+    def _compact(self):
+        """Drop closed rows"""
+        keep = np.flatnonzero(self._open_mask())
+        self.cols = {name: np.resize(column[keep], max(len(keep) * 2, 1024)) for name, column in self.cols.items()}
+        self.size = len(keep)
+        self.pid_rows = {int(pid): row for row, pid in enumerate(self.cols["pid"][:self.size])}
+
+    def _recover(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        if os.path.exists(self._snapshot_path):
+            with np.load(self._snapshot_path) as data:
+                self.seq, self.next_pid = (int(v) for v in data["meta"])
+                self.symbols = [str(s) for s in data["symbols"]]
+                self.symbol_codes = {s: code for code, s in enumerate(self.symbols)}
+                users = len(data["user_ids"])
+                self.user_ids = np.resize(data["user_ids"].astype(np.int64), max(users * 2, 64))
+                self.balances = np.resize(data["balances"].astype(np.float64), max(users * 2, 64))
+                self.unrealized = np.zeros(len(self.user_ids), dtype=np.float64)
+                self.user_rows = {int(u): row for row, u in enumerate(data["user_ids"])}
+                self.size = len(data["pid"])
+                self.cols = {name: np.resize(data[name].astype(dtype), max(self.size * 2, 1024))
+                             for name, dtype in COLUMNS.items()}
+                self.pid_rows = {int(pid): row for row, pid in enumerate(self.cols["pid"][:self.size])}
+
+        replayed = 0
+        if os.path.exists(self._wal_path):
+            self._replaying = True
+            try:
+                with open(self._wal_path) as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            break  # torn last line
+                        if entry["seq"] <= self.seq:
+                            continue
+                        self._apply(entry)
+                        self.seq = entry["seq"]
+                        replayed += 1
+            finally:
+                self._replaying = False
+
+        self._wal = open(self._wal_path, "a")
+        open_positions = int(np.count_nonzero(self._open_mask()))
+        worker_logger.info(f"📒 Paper book loaded: {len(self.user_rows)} users, {open_positions} open positions "
+                           f"({replayed} WAL entries replayed)")
+
+    def _apply(self, entry: Dict):
+        op = entry["op"]
+        if op == "balance":
+            self.balances[self._user_row(entry["user"])] = entry["balance"]
+        elif op == "credit":
+            self.balances[self._user_row(entry["user"])] += entry["amount"]
+        elif op == "open":
+            self.open(entry["user"], entry["symbol"], entry["side"], entry["qty"], entry["price"],
+                      entry["leverage"], pid=entry["pid"])
+        elif op == "link":
+            self.link(entry["pid"], entry["ref"])
+        elif op == "close":
+            self.close(entry["pid"], entry["qty"], entry["price"])
+        elif op == "reopen":
+            self.reopen(entry["closed"])
+        elif op == "cancel":
+            self.cancel(entry["pid"])
+        elif op == "liquidate":
+            row = self.pid_rows.get(entry["pid"])
+            if row is not None:
+                self.cols["qty"][row] = 0.0
+                self.cols["open"][row] = False
+
+    @_locked
+    def close_files(self):
+        """Snapshot and close the WAL (clean shutdown)"""
+        if self._wal is not None:
+            self.snapshot()
+            self._wal.close()
+            self._wal = None
@@ -0,0 +1,75 @@
+"""
+Worker Sharding
+Users are partitioned across WORKER_SHARDS worker processes by consistent
+hashing, so each user's positions are opened and managed by exactly one
+worker and adding a worker only moves ~1/N of the users.
+
+Run one worker per shard with WORKER_SHARD=0..N-1 (see
+deploy/verzek_worker@.service). With the defaults (1 shard) a single worker
+owns every user, as before.
+"""
+import os
+import socket
+import hashlib
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+WORKER_SHARDS = int(os.getenv("WORKER_SHARDS", "1"))
+WORKER_SHARD = int(os.getenv("WORKER_SHARD", "0"))
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """Maps keys to shards via virtual nodes on a hash ring"""
+
+    def __init__(self, shards: int, replicas: int = 100):
+        points: List[Tuple[int, int]] = sorted(
+            (_hash(f"shard-{shard}-{replica}"), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in points]
+        self.shards = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> int:
+        i = bisect_right(self.hashes, _hash(key)) % len(self.hashes)
+        return self.shards[i]
+
+
+class WorkerShard:
+    """The slice of users one worker process owns"""
+
+    def __init__(self, index: int = WORKER_SHARD, count: int = WORKER_SHARDS):
+        if not 0 <= index < count:
+            raise ValueError(f"WORKER_SHARD must be in 0..{count - 1}, got {index}")
+        self.index = index
+        self.count = count
+        self.ring = ConsistentHashRing(count) if count > 1 else None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:shard{index}"
+
+    @property
+    def sharded(self) -> bool:
+        return self.count > 1
+
+    def owns(self, user_id: int) -> bool:
+        """True if this worker handles the user"""
+        if self.ring is None:
+            return True
+        return self.ring.shard_for(f"user-{user_id}") == self.index
+
+    def __repr__(self):
+        return f"shard {self.index + 1}/{self.count}"
+
+
+# Global shard of this process
+_worker_shard: Optional[WorkerShard] = None
+
+def get_worker_shard() -> WorkerShard:
+    """Get or create this process's shard (from WORKER_SHARD / WORKER_SHARDS)"""
+    global _worker_shard
+    if _worker_shard is None:
+        _worker_shard = WorkerShard()
+    return _worker_shard
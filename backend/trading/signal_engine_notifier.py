@@ -0,0 +1,364 @@
+"""
+Signal Engine Notifier - Batched closure/TP-hit webhooks
+Collects TP hits and closures and sends them to the Signal Engine webhook
+server in one request (flushed by size or age).
+Many users on the same house signal produce identical events; they are
+deduplicated by (signal_id, tp_number) and signal_id before sending.
+
+Sending happens on a background thread: queuing an event never waits on the
+network, so a slow or dead webhook server can't stall position monitoring.
+Queued events are appended to an outbox file and survive worker restarts;
+undelivered batches are retried with exponential backoff until they go
+through.
+"""
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from trading.sharding import WORKER_SHARD, WORKER_SHARDS
+from utils.logger import worker_logger
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIGNAL_ENGINE_OUTBOX = os.getenv("SIGNAL_ENGINE_OUTBOX", os.path.join(
+    BASE_DIR, "data",
+    "signal_engine_outbox.jsonl" if WORKER_SHARDS == 1 else f"signal_engine_outbox_shard{WORKER_SHARD}.jsonl"
+))
+SIGNAL_ENGINE_MAX_BACKOFF = float(os.getenv("SIGNAL_ENGINE_MAX_BACKOFF", "60"))
+
+
+class SignalEngineNotifier:
+    """Client-side batching notifier for the Signal Engine webhook server"""
+
+    def __init__(self, outbox_path: Optional[str] = SIGNAL_ENGINE_OUTBOX):
+        """
+        Args:
+            outbox_path: File queued events are kept in until sent (None: memory only)
+        """
+        self.webhook_url = os.getenv('SIGNAL_ENGINE_WEBHOOK_URL', 'http://localhost:8050')
+        self.webhook_secret = os.getenv('SIGNAL_ENGINE_WEBHOOK_SECRET', 'dev-secret-change-in-prod')
+        self.max_batch_size = int(os.getenv('SIGNAL_ENGINE_BATCH_SIZE', '50'))
+        self.max_batch_age = float(os.getenv('SIGNAL_ENGINE_BATCH_SECONDS', '2'))
+        self.max_flush_attempts = 3
+
+        # Keep-alive session shared by all flushes
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'X-Webhook-Secret': self.webhook_secret
+        })
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one send at a time
+        self._tp_hits: Dict[Tuple[str, int], Dict] = {}  # (signal_id, tp_number) -> event
+        self._closures: Dict[str, Dict] = {}  # signal_id -> event
+        self._first_event_at = None
+        self._failed_flushes = 0
+        self._retry_at = 0.0
+        self._batch_supported = True
+
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.events_queued = 0
+        self.events_deduplicated = 0
+        self.batches_sent = 0
+
+        self.outbox_path = outbox_path
+        self._outbox = None
+        if outbox_path:
+            self._load_outbox()
+
+    def tp_hit(self, signal_id: str, hit_price: float, tp_number: int):
+        """Queue a TP hit (identical hits from other users are dropped)"""
+        key = (str(signal_id), int(tp_number))
+        with self._lock:
+            if key in self._tp_hits:
+                self.events_deduplicated += 1
+            else:
+                event = self._tp_hits[key] = {
+                    'signal_id': key[0],
+                    'hit_price': hit_price,
+                    'tp_number': key[1]
+                }
+                self._mark_queued('tp_hit', event)
+        self.maybe_flush()
+
+    def closure(self, signal_id: str, exit_price: float, close_reason: str):
+        """Queue a signal closure (first closure per signal wins)"""
+        key = str(signal_id)
+        with self._lock:
+            if key in self._closures:
+                self.events_deduplicated += 1
+            else:
+                event = self._closures[key] = {
+                    'signal_id': key,
+                    'exit_price': exit_price,
+                    'close_reason': close_reason
+                }
+                self._mark_queued('closure', event)
+        self.maybe_flush()
+
+    def _mark_queued(self, kind: str, event: Dict):
+        """Update counters and the outbox for a newly queued event (lock held)"""
+        self.events_queued += 1
+        if self._first_event_at is None:
+            self._first_event_at = time.monotonic()
+        self._append_outbox(kind, event)
+
+    def pending_count(self) -> int:
+        """Number of queued events not yet sent"""
+        with self._lock:
+            return len(self._tp_hits) + len(self._closures)
+
+    def maybe_flush(self):
+        """Wake the sender when the batch is full (it sends by age on its own)"""
+        self.start()
+        if self.pending_count() >= self.max_batch_size:
+            self._wake.set()
+
+    def wake(self):
+        """Ask the sender to send what is queued now instead of at the batch age"""
+        if self.pending_count():
+            self.start()
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Background sender
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the sender thread (idempotent)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="signal-engine-notifier", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Stop the sender after one last attempt (unsent events stay in the outbox)"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join(timeout)
+        self._thread = None
+        if self.pending_count():
+            self.flush()
+
+    def _run(self):
+        while not self._stopping:
+            woken = self._wake.wait(self.max_batch_age)
+            self._wake.clear()
+            if self._stopping:
+                break
+
+            with self._lock:
+                pending = len(self._tp_hits) + len(self._closures)
+                age = time.monotonic() - self._first_event_at if self._first_event_at else 0
+            if not pending or time.monotonic() < self._retry_at:
+                continue
+            if woken or pending >= self.max_batch_size or age >= self.max_batch_age or self._failed_flushes:
+                try:
+                    self.flush()
+                except Exception as e:
+                    worker_logger.error(f"❌ Signal Engine notifier error: {e}")
+
+    def flush(self) -> bool:
+        """
+        Send all queued events in one batch request
+
+        Unsent events are kept (in memory and in the outbox) and retried
+        with exponential backoff up to SIGNAL_ENGINE_MAX_BACKOFF seconds.
+        """
+        with self._flush_lock:
+            with self._lock:
+                tp_hits = sorted(self._tp_hits.values(), key=lambda e: (e['signal_id'], e['tp_number']))
+                closures = list(self._closures.values())
+                if not tp_hits and not closures:
+                    return True
+                self._tp_hits = {}
+                self._closures = {}
+                self._first_event_at = None
+
+            sent_tp_hits, sent_closures = len(tp_hits), len(closures)
+            if self._batch_supported:
+                tp_hits, closures = self._send_batch(tp_hits, closures)
+            else:
+                tp_hits, closures = self._send_legacy(tp_hits, closures)
+
+            if not tp_hits and not closures:
+                with self._lock:
+                    self._failed_flushes = 0
+                    self._retry_at = 0.0
+                    self.batches_sent += 1
+                    self._rewrite_outbox()  # keep only events queued during the send
+                return True
+
+            with self._lock:
+                self._failed_flushes += 1
+                backoff = min(self.max_batch_age * 2 ** self._failed_flushes, SIGNAL_ENGINE_MAX_BACKOFF)
+                self._retry_at = time.monotonic() + backoff
+
+                if self._failed_flushes == self.max_flush_attempts:
+                    worker_logger.error(
+                        f"🚨 CRITICAL: Signal Engine batch failed {self._failed_flushes} times! "
+                        f"{len(tp_hits)} TP hits and {len(closures)} closures pending - "
+                        f"signals stay ACTIVE until the webhook server is reachable again."
+                    )
+
+                # Requeue the unsent events for the next flush (events queued meanwhile for the same key win)
+                for event in tp_hits:
+                    self._tp_hits.setdefault((event['signal_id'], event['tp_number']), event)
+                for event in closures:
+                    self._closures.setdefault(event['signal_id'], event)
+                if self._first_event_at is None:
+                    self._first_event_at = time.monotonic()
+                if len(tp_hits) < sent_tp_hits or len(closures) < sent_closures:
+                    self._rewrite_outbox()  # drop the events that did get through
+            return False
+
+    # ------------------------------------------------------------------
+    # Outbox (JSON lines, one queued event per line)
+    # ------------------------------------------------------------------
+
+    def _load_outbox(self):
+        """Requeue events left unsent by the previous run"""
+        try:
+            os.makedirs(os.path.dirname(self.outbox_path) or ".", exist_ok=True)
+            if os.path.exists(self.outbox_path):
+                with open(self.outbox_path) as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # torn last line
+                        event = entry.get('event') or {}
+                        if entry.get('kind') == 'tp_hit':
+                            self._tp_hits.setdefault((event['signal_id'], event['tp_number']), event)
+                        elif entry.get('kind') == 'closure':
+                            self._closures.setdefault(event['signal_id'], event)
+
+            pending = len(self._tp_hits) + len(self._closures)
+            if pending:
+                self._first_event_at = time.monotonic()
+                worker_logger.info(f"📬 Signal Engine outbox: {pending} unsent events requeued")
+            self._rewrite_outbox()
+
+        except Exception as e:
+            worker_logger.error(f"Signal Engine outbox unavailable ({e}), events kept in memory only")
+            self.outbox_path = None
+            self._outbox = None
+
+    def _append_outbox(self, kind: str, event: Dict):
+        """Record a queued event (lock held)"""
+        if self._outbox is None:
+            return
+        try:
+            self._outbox.write(json.dumps({'kind': kind, 'event': event}) + "\n")
+            self._outbox.flush()
+        except Exception as e:
+            worker_logger.error(f"Signal Engine outbox write error: {e}")
+
+    def _rewrite_outbox(self):
+        """Replace the outbox with the events still pending (lock held)"""
+        if not self.outbox_path:
+            return
+        if self._outbox is not None:
+            self._outbox.close()
+
+        tmp_path = f"{self.outbox_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for event in self._tp_hits.values():
+                f.write(json.dumps({'kind': 'tp_hit', 'event': event}) + "\n")
+            for event in self._closures.values():
+                f.write(json.dumps({'kind': 'closure', 'event': event}) + "\n")
+        os.replace(tmp_path, self.outbox_path)
+        self._outbox = open(self.outbox_path, "a")
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _send_batch(self, tp_hits: List[Dict], closures: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        POST events to /api/signals/batch
+
+        Returns:
+            (tp_hits, closures) that were not delivered
+        """
+        try:
+            response = self.session.post(
+                f"{self.webhook_url}/api/signals/batch",
+                json={'tp_hits': tp_hits, 'closures': closures},
+                timeout=5
+            )
+
+            if response.status_code == 404 and 'application/json' not in response.headers.get('Content-Type', ''):
+                # Older Signal Engine without batch endpoint
+                worker_logger.warning("Signal Engine has no batch endpoint, using per-event webhooks")
+                self._batch_supported = False
+                return self._send_legacy(tp_hits, closures)
+
+            if response.status_code in (200, 202):
+                worker_logger.info(
+                    f"✅ Signal Engine notified: {len(tp_hits)} TP hits, {len(closures)} closures (batched)"
+                )
+                return [], []
+
+            worker_logger.warning(
+                f"⚠️ Signal Engine batch webhook failed: "
+                f"Status {response.status_code}, Response: {response.text}"
+            )
+
+        except requests.exceptions.Timeout:
+            worker_logger.error("⏱️  Signal Engine batch webhook timeout")
+        except requests.exceptions.ConnectionError:
+            worker_logger.error("🔌 Signal Engine batch webhook connection error - Is webhook server running?")
+        except Exception as e:
+            worker_logger.error(f"❌ Signal Engine batch webhook error: {e}")
+
+        return tp_hits, closures
+
+    def _send_legacy(self, tp_hits: List[Dict], closures: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Send events one by one to the per-event endpoints
+
+        Returns:
+            (tp_hits, closures) that were not delivered
+        """
+        failed = ([], [])
+        for path, events, unsent in (('/api/signals/tp-hit', tp_hits, failed[0]),
+                                     ('/api/signals/close', closures, failed[1])):
+            for event in events:
+                try:
+                    response = self.session.post(f"{self.webhook_url}{path}", json=event, timeout=5)
+                    # 404 = already closed / out-of-order TP, nothing to retry
+                    if response.status_code not in (200, 404):
+                        unsent.append(event)
+                except Exception as e:
+                    worker_logger.error(f"❌ Signal Engine webhook error ({path}): {e}")
+                    unsent.append(event)
+        return failed
+
+    def get_stats(self) -> Dict:
+        """Get notifier statistics"""
+        return {
+            'events_queued': self.events_queued,
+            'events_deduplicated': self.events_deduplicated,
+            'batches_sent': self.batches_sent,
+            'failed_flushes': self._failed_flushes,
+            'sender_running': self._thread is not None and self._thread.is_alive(),
+            'pending': self.pending_count()
+        }
+
+
+# Global notifier instance
+signal_engine_notifier = SignalEngineNotifier()
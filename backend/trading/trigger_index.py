@@ -0,0 +1,156 @@
+"""
+Price Trigger Index
+Pending TP/SL/DCA levels of all active positions, kept per symbol in sorted
+arrays so a price update only touches the levels it crossed.
+
+Levels that fire when the price rises to them (LONG take profits, SHORT
+stop losses) and levels that fire when it falls to them (LONG stop losses,
+SHORT take profits) are kept apart; each update bisects both and pops the
+crossed ends, so a tick costs O(log n + k) for k fired triggers instead of
+rechecking every position.
+
+The backend worker is deployed on its own, so it ships an identical copy
+as backend/trading/trigger_index.py. Edit both together:
+tools/pre_push_guard.py fails when they differ.
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Tuple
+
+ABOVE = 'above'  # fires when price >= level
+BELOW = 'below'  # fires when price <= level
+
+
+class Trigger(NamedTuple):
+    symbol: Hashable  # symbol, or any price source key, e.g. (exchange, testnet, symbol)
+    owner: Hashable  # position or order id
+    tag: Hashable    # e.g. target number, 'stop_loss' or ('TP', 2)
+    level: float
+    direction: str
+
+
+def is_long(side: str) -> bool:
+    return str(side).upper() in ('LONG', 'BUY')
+
+
+def take_profit_direction(side: str) -> str:
+    """Take profits sit above a LONG entry and below a SHORT one"""
+    return ABOVE if is_long(side) else BELOW
+
+
+def stop_loss_direction(side: str) -> str:
+    """Stop losses (and DCA levels) sit on the adverse side of the entry"""
+    return BELOW if is_long(side) else ABOVE
+
+
+class _Levels:
+    """Sorted trigger levels of one symbol and direction"""
+
+    __slots__ = ('prices', 'triggers', 'seq')
+
+    def __init__(self):
+        self.prices: List[Tuple[float, int]] = []  # (level, seq) keeps equal levels in insertion order
+        self.triggers: Dict[int, Trigger] = {}
+        self.seq = 0
+
+    def add(self, trigger: Trigger) -> Tuple[float, int]:
+        self.seq += 1
+        key = (trigger.level, self.seq)
+        insort(self.prices, key)
+        self.triggers[self.seq] = trigger
+        return key
+
+    def discard(self, key: Tuple[float, int]):
+        i = bisect_left(self.prices, key)
+        if i < len(self.prices) and self.prices[i] == key:
+            del self.prices[i]
+            self.triggers.pop(key[1], None)
+
+    def pop_up_to(self, price: float) -> List[Trigger]:
+        """Levels <= price (rising triggers the price reached)"""
+        i = bisect_right(self.prices, (price, float('inf')))
+        return self._pop(0, i)
+
+    def pop_from(self, price: float) -> List[Trigger]:
+        """Levels >= price (falling triggers the price reached)"""
+        i = bisect_left(self.prices, (price, 0))
+        return self._pop(i, len(self.prices))
+
+    def _pop(self, start: int, end: int) -> List[Trigger]:
+        if start >= end:
+            return []
+        crossed = self.prices[start:end]
+        del self.prices[start:end]
+        return [self.triggers.pop(seq) for _, seq in crossed]
+
+
+class TriggerIndex:
+    """Pending price triggers of many positions, grouped by symbol"""
+
+    def __init__(self):
+        self._levels: Dict[Tuple[Hashable, str], _Levels] = {}
+        self._owners: Dict[Hashable, Dict[Hashable, Tuple[Trigger, Tuple[float, int]]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(levels.prices) for levels in self._levels.values())
+
+    def __contains__(self, owner: Hashable) -> bool:
+        return owner in self._owners
+
+    def owners(self) -> List[Hashable]:
+        """Registered owners (including those with no pending trigger left)"""
+        return list(self._owners)
+
+    def symbols(self) -> List[Hashable]:
+        """Symbols with at least one pending trigger"""
+        return list({symbol for (symbol, _), levels in self._levels.items() if levels.prices})
+
+    def register(self, owner: Hashable, triggers: Iterable[Tuple[Hashable, Hashable, float, str]] = ()):
+        """
+        Index an owner's pending levels (replaces what it had)
+
+        Args:
+            owner: Position or order id
+            triggers: (symbol, tag, level, direction) tuples; an owner may
+                      be registered with none so it is not reloaded
+        """
+        self.remove(owner)
+        pending = self._owners[owner] = {}
+        for symbol, tag, level, direction in triggers:
+            if level is None:
+                continue
+            trigger = Trigger(symbol, owner, tag, float(level), direction)
+            levels = self._levels.get((symbol, direction))
+            if levels is None:
+                levels = self._levels[(symbol, direction)] = _Levels()
+            pending[tag] = (trigger, levels.add(trigger))
+
+    def remove(self, owner: Hashable):
+        """Forget an owner and all its pending levels"""
+        pending = self._owners.pop(owner, None)
+        if not pending:
+            return
+        for trigger, key in pending.values():
+            levels = self._levels.get((trigger.symbol, trigger.direction))
+            if levels is not None:
+                levels.discard(key)
+
+    def update(self, symbol: Hashable, price: float) -> List[Trigger]:
+        """
+        Pop every trigger of a symbol the price has reached
+
+        Returns:
+            Fired triggers (each fires once; owners stay registered)
+        """
+        fired: List[Trigger] = []
+        rising = self._levels.get((symbol, ABOVE))
+        if rising is not None:
+            fired.extend(rising.pop_up_to(price))
+        falling = self._levels.get((symbol, BELOW))
+        if falling is not None:
+            fired.extend(falling.pop_from(price))
+
+        for trigger in fired:
+            pending = self._owners.get(trigger.owner)
+            if pending is not None:
+                pending.pop(trigger.tag, None)
+        return fired
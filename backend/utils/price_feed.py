@@ -1,44 +1,151 @@
 """
 Price feed for paper trading mode
 Fetches real-time cryptocurrency prices from public APIs
+
+All symbols are refreshed together with one bulk ticker request over a
+keep-alive session and served from memory for a short TTL, so any number of
+positions, users and API requests cost at most one Binance call per TTL.
+Concurrent lookups share the in-flight request (singleflight), and every
+quote carries its age so callers can tell a live price from a fallback.
+
+Optionally (PRICE_FEED_WEBSOCKET=true, needs `websocket-client`) prices are
+pushed by Binance's all-market mini-ticker stream and REST is only used
+while the stream is down.
+
+When price_publisher.py is running, every process reads prices from its
+shared memory table first (utils/shared_prices.py) and only fetches on its
+own if the publisher stops.
 """
+import os
+import json
+import time
+import threading
 import requests
-from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, NamedTuple, Optional
 from utils.logger import api_logger
+from utils.shared_prices import SharedPriceTable, PRICE_TABLE_PATH
 
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "2"))
+PRICE_MAX_STALE = float(os.getenv("PRICE_MAX_STALE", "60"))
+PRICE_FEED_WEBSOCKET = os.getenv("PRICE_FEED_WEBSOCKET", "false").lower() == "true"
+PRICE_PUBLISHER_TIMEOUT = float(os.getenv("PRICE_PUBLISHER_TIMEOUT", "10"))
+
+
+class PriceQuote(NamedTuple):
+    """A price with where and when it was obtained"""
+    symbol: str
+    price: float
+    fetched_at: float  # unix time
+    source: str        # 'bulk', 'single', 'ws' or 'shared'
+
+    @property
+    def age(self) -> float:
+        """Seconds since the price was obtained"""
+        return max(0.0, time.time() - self.fetched_at)
+
+    def is_stale(self, ttl: float = PRICE_CACHE_TTL) -> bool:
+        return self.age > ttl
+
+
+class _Flight:
+    """One in-flight fetch that concurrent callers wait on"""
 
-class PriceFeed:
-    """Fetch cryptocurrency prices from Binance or CoinGecko"""
-    
     def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+
+
+class PriceFeed:
+    """Fetch cryptocurrency prices from Binance (bulk, cached, pooled)"""
+
+    def __init__(self, ttl: float = PRICE_CACHE_TTL, max_stale: float = PRICE_MAX_STALE,
+                 use_websocket: bool = PRICE_FEED_WEBSOCKET, shared_table: Optional[str] = PRICE_TABLE_PATH):
+        """
+        Args:
+            ttl: Seconds a price is served without refreshing
+            max_stale: Oldest price returned when Binance is unreachable
+            use_websocket: Keep prices updated from the mini-ticker stream
+            shared_table: Path of the publisher's price table (None: don't read it)
+        """
         self.binance_base = "https://api.binance.com/api/v3"
-        self.cache = {}
-    
+        self.ws_url = "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.cache: Dict[str, PriceQuote] = {}
+
+        # Keep-alive connection pool shared by all threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=16, max_retries=1)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._bulk_at = 0.0
+        self.stats = {"bulk_requests": 0, "single_requests": 0, "cache_hits": 0, "shared_hits": 0,
+                      "coalesced": 0, "errors": 0}
+
+        self.shared_table_path = shared_table
+        self.shared: Optional[SharedPriceTable] = None
+        self._shared_checked = 0.0
+
+        self.ws_connected = False
+        if use_websocket:
+            self._start_websocket()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_quote(self, symbol: str, max_age: Optional[float] = None) -> Optional[PriceQuote]:
+        """
+        Get a price with staleness metadata
+
+        Args:
+            symbol: BTCUSDT, ETHUSDT, etc.
+            max_age: Refresh if the cached price is older (default: TTL)
+
+        Returns:
+            PriceQuote (possibly older than max_age if Binance is unreachable,
+            never older than max_stale), or None
+        """
+        symbol = symbol.upper()
+        max_age = self.ttl if max_age is None else max_age
+
+        # Publisher's table: no lock, no network
+        quote = self._shared_quote(symbol, max_age)
+        if quote:
+            return quote
+
+        quote = self.cache.get(symbol)
+        if quote and quote.age <= max_age:
+            self.stats["cache_hits"] += 1
+            return quote
+
+        # Prices of every symbol arrive with one bulk request
+        if not self._bulk_fresh(max_age):
+            self._singleflight("*", self._fetch_all)
+
+        quote = self.cache.get(symbol)
+        if not quote or quote.age > max_age:
+            # Not in the bulk answer (or bulk failed): ask for this symbol alone
+            self._singleflight(symbol, lambda: self._fetch_one(symbol))
+            quote = self.cache.get(symbol)
+
+        if quote and quote.age <= self.max_stale:
+            return quote
+        return None
+
     def get_price(self, symbol: str) -> Optional[float]:
         """
         Get current price for a symbol
         Symbol format: BTCUSDT, ETHUSDT, etc.
         """
-        try:
-            # Try Binance first
-            url = f"{self.binance_base}/ticker/price"
-            response = requests.get(url, params={"symbol": symbol.upper()}, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                price = float(data.get("price", 0))
-                self.cache[symbol] = price
-                return price
-            
-            # Fallback to cache
-            return self.cache.get(symbol)
-            
-        except Exception as e:
-            api_logger.error(f"Price feed error for {symbol}: {e}")
-            return self.cache.get(symbol)
-    
+        quote = self.get_quote(symbol)
+        return quote.price if quote else None
+
     def get_multiple_prices(self, symbols: list) -> Dict[str, float]:
-        """Get prices for multiple symbols"""
+        """Get prices for multiple symbols (one bulk request at most)"""
         prices = {}
         for symbol in symbols:
             price = self.get_price(symbol)
@@ -46,6 +153,163 @@ class PriceFeed:
                 prices[symbol] = price
         return prices
 
+    def refresh_all(self) -> bool:
+        """Bulk-refresh every symbol now unless it was refreshed within the TTL"""
+        if self._bulk_fresh(self.ttl):
+            return True
+        return self._singleflight("*", self._fetch_all)
+
+    def get_stats(self) -> Dict:
+        """Request counters and cache state"""
+        return {
+            **self.stats,
+            "symbols_cached": len(self.cache),
+            "bulk_age": round(time.time() - self._bulk_at, 1) if self._bulk_at else None,
+            "websocket": self.ws_connected,
+            "shared_table": self.shared is not None,
+        }
+
+    # ------------------------------------------------------------------
+    # Local fetching (when the publisher's table has no fresh price)
+    # ------------------------------------------------------------------
+
+    def _bulk_fresh(self, max_age: float) -> bool:
+        return time.time() - self._bulk_at <= max_age
+
+    def _singleflight(self, key: str, fetch) -> bool:
+        """Run fetch once for all concurrent callers with the same key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self.stats["coalesced"] += 1
+            flight.done.wait(timeout=10)
+            return flight.ok
+
+        try:
+            flight.ok = fetch()
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.ok
+
+    def _fetch_all(self) -> bool:
+        """Refresh every symbol with one request"""
+        # A caller waiting for the lock may find the refresh already done
+        if self._bulk_fresh(self.ttl / 2):
+            return True
+        try:
+            self.stats["bulk_requests"] += 1
+            response = self.session.get(f"{self.binance_base}/ticker/price", timeout=5)
+            response.raise_for_status()
+
+            now = time.time()
+            cache = dict(self.cache)
+            for item in response.json():
+                cache[item["symbol"]] = PriceQuote(item["symbol"], float(item["price"]), now, "bulk")
+            self.cache = cache
+            self._bulk_at = now
+            return True
+
+        except Exception as e:
+            self.stats["errors"] += 1
+            api_logger.error(f"Bulk price fetch error: {e}")
+            return False
+
+    def _fetch_one(self, symbol: str) -> bool:
+        """Refresh a single symbol (fallback when the bulk answer lacks it)"""
+        try:
+            self.stats["single_requests"] += 1
+            response = self.session.get(f"{self.binance_base}/ticker/price",
+                                        params={"symbol": symbol}, timeout=5)
+            if response.status_code != 200:
+                return False
+
+            price = float(response.json().get("price", 0))
+            if not price:
+                return False
+            self.cache[symbol] = PriceQuote(symbol, price, time.time(), "single")
+            return True
+
+        except Exception as e:
+            self.stats["errors"] += 1
+            api_logger.error(f"Price feed error for {symbol}: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Shared table (price_publisher.py)
+    # ------------------------------------------------------------------
+
+    def _shared_quote(self, symbol: str, max_age: float) -> Optional[PriceQuote]:
+        table = self._shared_table()
+        if table is None:
+            return None
+
+        now = time.time()
+        if now - table.heartbeat > PRICE_PUBLISHER_TIMEOUT:
+            return None  # publisher stopped: fetch ourselves
+
+        entry = table.get(symbol)
+        if entry is None or now - entry[1] > max_age:
+            return None
+
+        self.stats["shared_hits"] += 1
+        return PriceQuote(symbol, entry[0], entry[1], "shared")
+
+    def _shared_table(self) -> Optional[SharedPriceTable]:
+        """Map the publisher's table; re-checked every 30s while absent or replaced"""
+        if not self.shared_table_path:
+            return None
+
+        now = time.time()
+        if now - self._shared_checked >= 30:
+            self._shared_checked = now
+            if self.shared is None or not self.shared.is_current():
+                if self.shared is not None:
+                    self.shared.close()
+                self.shared = SharedPriceTable.open(self.shared_table_path)
+        return self.shared
+
+    # ------------------------------------------------------------------
+    # Optional WebSocket stream
+    # ------------------------------------------------------------------
+
+    def _start_websocket(self):
+        try:
+            import websocket  # websocket-client (optional)
+        except ImportError:
+            api_logger.warning("⚠️ websocket-client not installed, price feed uses REST only")
+            return
+
+        threading.Thread(target=self._websocket_loop, args=(websocket,), name="price-ws", daemon=True).start()
+
+    def _websocket_loop(self, websocket):
+        """Keep the mini-ticker stream connected (reconnects after 5s)"""
+        def on_message(_, message):
+            now = time.time()
+            for ticker in json.loads(message):
+                self.cache[ticker["s"]] = PriceQuote(ticker["s"], float(ticker["c"]), now, "ws")
+
+        def on_open(_):
+            self.ws_connected = True
+            api_logger.info("✅ Price stream connected")
+
+        def on_close(*_):
+            self.ws_connected = False
+
+        while True:
+            try:
+                ws = websocket.WebSocketApp(self.ws_url, on_open=on_open, on_message=on_message, on_close=on_close)
+                ws.run_forever(ping_interval=60, ping_timeout=20)
+            except Exception as e:
+                api_logger.error(f"Price stream error: {e}")
+            self.ws_connected = False
+            time.sleep(5)
+
 
 # Global price feed instance
 price_feed = PriceFeed()
@@ -0,0 +1,204 @@
+"""
+Shared Price Table
+Latest price per symbol in a memory-mapped file, written by one publisher
+process (price_publisher.py) and read by every API worker and the trading
+worker without locks or network calls.
+
+Layout: a 32-byte header (magic, slot count, publisher heartbeat) followed
+by fixed-size slots. A symbol's slot is found by hashing with linear probing
+and never moves. Each slot is guarded by a seqlock: the writer makes the
+sequence odd, writes, then makes it even again; a reader retries if the
+sequence was odd or changed while it read.
+"""
+import os
+import mmap
+import time
+import struct
+import zlib
+from typing import Dict, Optional, Tuple
+
+PRICE_TABLE_PATH = os.getenv(
+    "PRICE_TABLE_PATH",
+    "/dev/shm/verzek_prices" if os.path.isdir("/dev/shm") else "/tmp/verzek_prices"
+)
+PRICE_TABLE_SLOTS = int(os.getenv("PRICE_TABLE_SLOTS", "4096"))
+
+MAGIC = b"VZPRICE1"
+HEADER = struct.Struct("<8sIIdd")   # magic, slots, reserved, heartbeat, created_at
+SLOT = struct.Struct("<I4x16sdd")   # seq, symbol, price, updated_at
+SEQ = struct.Struct("<I")
+
+
+def _home(symbol: bytes, slots: int) -> int:
+    return zlib.crc32(symbol) % slots
+
+
+class SharedPriceTable:
+    """Memory-mapped price slots with per-slot seqlocks"""
+
+    def __init__(self, path: str, mm: mmap.mmap, slots: int, writable: bool):
+        self.path = path
+        self.mm = mm
+        self.slots = slots
+        self.writable = writable
+        self.inode = os.stat(path).st_ino
+        self._index: Dict[str, int] = {}  # symbol -> slot (slots never move)
+
+    # ------------------------------------------------------------------
+    # Opening
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def create(cls, path: str = PRICE_TABLE_PATH, slots: int = PRICE_TABLE_SLOTS) -> "SharedPriceTable":
+        """
+        Open the table for publishing, creating it if needed
+
+        An existing table with the same size is reused so readers keep their
+        mapping across publisher restarts; otherwise a new file is swapped in.
+        """
+        size = HEADER.size + slots * SLOT.size
+        existing = cls.open(path, writable=True)
+        if existing is not None and existing.slots == slots:
+            existing._load_index()
+            return existing
+        if existing is not None:
+            existing.close()
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, slots, 0, 0.0, time.time()))
+            f.truncate(size)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        return cls.open(path, writable=True)
+
+    @classmethod
+    def open(cls, path: str = PRICE_TABLE_PATH, writable: bool = False) -> Optional["SharedPriceTable"]:
+        """
+        Map an existing table
+
+        Returns:
+            Table, or None if no publisher has created it (or it is invalid)
+        """
+        try:
+            with open(path, "r+b" if writable else "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        magic, slots, _, _, _ = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or len(mm) != HEADER.size + slots * SLOT.size:
+            mm.close()
+            return None
+        return cls(path, mm, slots, writable)
+
+    def close(self):
+        self.mm.close()
+
+    def is_current(self) -> bool:
+        """False once a publisher replaced the file (reader should reopen)"""
+        try:
+            return os.stat(self.path).st_ino == self.inode
+        except OSError:
+            return False
+
+    # ------------------------------------------------------------------
+    # Header
+    # ------------------------------------------------------------------
+
+    @property
+    def heartbeat(self) -> float:
+        """Unix time of the publisher's last write"""
+        return HEADER.unpack_from(self.mm, 0)[3]
+
+    def touch(self, now: Optional[float] = None):
+        """Publisher heartbeat (readers ignore the table when it stops)"""
+        struct.pack_into("<d", self.mm, 16, now or time.time())
+
+    # ------------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------------
+
+    def _offset(self, slot: int) -> int:
+        return HEADER.size + slot * SLOT.size
+
+    def _read_slot(self, slot: int, attempts: int = 100) -> Optional[Tuple[bytes, float, float]]:
+        """(symbol, price, updated_at) of a slot, consistent under the seqlock"""
+        offset = self._offset(slot)
+        for _ in range(attempts):
+            before = SEQ.unpack_from(self.mm, offset)[0]
+            if before & 1:
+                continue  # write in progress
+            _, symbol, price, updated_at = SLOT.unpack_from(self.mm, offset)
+            if SEQ.unpack_from(self.mm, offset)[0] == before:
+                return symbol, price, updated_at
+        return None
+
+    def _find(self, symbol: str) -> Optional[int]:
+        slot = self._index.get(symbol)
+        if slot is not None:
+            return slot
+
+        key = symbol.encode().ljust(16, b"\0")
+        slot = _home(key, self.slots)
+        for _ in range(self.slots):
+            offset = self._offset(slot)
+            stored = self.mm[offset + 8:offset + 24]
+            if stored == key:
+                self._index[symbol] = slot
+                return slot
+            if not stored.strip(b"\0"):
+                return None  # probing reached an unclaimed slot
+            slot = (slot + 1) % self.slots
+        return None
+
+    def get(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """
+        Latest published price of a symbol
+
+        Returns:
+            (price, updated_at) or None if the symbol was never published
+        """
+        slot = self._find(symbol)
+        if slot is None:
+            return None
+        entry = self._read_slot(slot)
+        if entry is None or not entry[1]:
+            return None
+        return entry[1], entry[2]
+
+    def put(self, symbol: str, price: float, updated_at: float) -> bool:
+        """Publish a price (publisher only)"""
+        slot = self._index.get(symbol)
+        if slot is None:
+            slot = self._claim(symbol)
+            if slot is None:
+                return False
+
+        offset = self._offset(slot)
+        seq = SEQ.unpack_from(self.mm, offset)[0]
+        SEQ.pack_into(self.mm, offset, (seq + 1) & 0xFFFFFFFF)  # odd: readers retry
+        struct.pack_into("<16sdd", self.mm, offset + 8, symbol.encode(), price, updated_at)
+        SEQ.pack_into(self.mm, offset, (seq + 2) & 0xFFFFFFFF)
+        return True
+
+    def _claim(self, symbol: str) -> Optional[int]:
+        key = symbol.encode()
+        if len(key) > 16:
+            return None
+        slot = _home(key.ljust(16, b"\0"), self.slots)
+        for _ in range(self.slots):
+            offset = self._offset(slot)
+            if not self.mm[offset + 8:offset + 24].strip(b"\0"):
+                self._index[symbol] = slot
+                return slot
+            slot = (slot + 1) % self.slots
+        return None  # table full
+
+    def _load_index(self):
+        """Rebuild symbol -> slot from a reused table"""
+        for slot in range(self.slots):
+            offset = self._offset(slot)
+            symbol = self.mm[offset + 8:offset + 24].rstrip(b"\0")
+            if symbol:
+                self._index[symbol.decode()] = slot
@@ -0,0 +1,102 @@
+"""
+Worker Wake-up Channel
+Lets the API wake the auto-trade worker as soon as a signal is committed,
+instead of the worker finding it on its next poll.
+
+Transport is a local Unix datagram socket (API and worker run on the same
+host). Notifications are best effort: if the worker is not listening the
+datagram is dropped and the worker's fallback poll picks the signal up.
+"""
+import os
+import glob
+import socket
+import select
+from typing import Optional
+
+WAKEUP_SOCKET = os.getenv("WORKER_WAKEUP_SOCKET", "/tmp/verzek_worker.sock")
+
+
+def notify_worker(reason: str = "signal", path: str = WAKEUP_SOCKET) -> bool:
+    """
+    Wake the worker (call after the DB commit so the worker sees the row)
+    
+    Sharded workers listen on <path>.<shard>; every one of them is woken.
+
+    Args:
+        reason: Short tag for the worker log
+        path: Worker socket path
+
+    Returns:
+        True if the datagram was delivered to at least one listening worker
+    """
+    delivered = False
+    for target in [path] + glob.glob(f"{path}.*"):
+        delivered = _send(reason, target) or delivered
+    return delivered
+
+
+def _send(reason: str, path: str) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            sock.sendto(reason.encode()[:64], path)
+        return True
+    except (FileNotFoundError, ConnectionRefusedError, BlockingIOError):
+        # Worker not running or its queue is full (a wake-up is already pending)
+        return False
+    except OSError:
+        return False
+
+
+class WakeupListener:
+    """Worker side of the channel: wait for a wake-up or a timeout"""
+
+    def __init__(self, path: str = WAKEUP_SOCKET):
+        self.path = path
+        self.sock: Optional[socket.socket] = None
+
+    def open(self):
+        """Bind the socket (replaces a stale file from a previous run)"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.path)
+        self.sock.setblocking(False)
+        os.chmod(self.path, 0o660)
+        return self
+
+    def wait(self, timeout: float) -> Optional[str]:
+        """
+        Block until woken or timeout
+
+        Returns:
+            Reason of the first wake-up (all pending ones are coalesced),
+            or None on timeout
+        """
+        if self.sock is None:
+            select.select([], [], [], timeout)
+            return None
+
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if not readable:
+            return None
+
+        reason = None
+        while True:
+            try:
+                data = self.sock.recv(64)
+            except BlockingIOError:
+                break
+            if reason is None:
+                reason = data.decode(errors="replace") or "signal"
+        return reason
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
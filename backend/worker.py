@@ -2,30 +2,63 @@
 """
 Verzek AutoTrader Worker
 Continuously monitors signals and executes trades for users with auto_trade_enabled=True
+
+New signals wake the worker immediately through a local socket (see
+utils/worker_wakeup.py); WORKER_POLL_SECONDS is only the fallback interval.
+
+Several workers can run side by side: set WORKER_SHARDS=N and give each
+process its own WORKER_SHARD (0..N-1). Users are split between them by
+consistent hashing and signals are claimed per shard (trading/claims.py).
 """
 import os
 import sys
 import time
+import signal
 
 # Add current directory to path
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from db import SessionLocal
+from db import SessionLocal, ensure_worker_schema
 from trading.executor import run_once
+from trading.paper_client import paper_client
+from trading.signal_engine_notifier import signal_engine_notifier
+from trading.sharding import get_worker_shard
 from utils.logger import worker_logger
+from utils.worker_wakeup import WakeupListener, WAKEUP_SOCKET
 
 POLL_SECONDS = int(os.getenv("WORKER_POLL_SECONDS", "10"))
 
 
+def stop_on_sigterm(signum, frame):
+    """systemd stops the worker with SIGTERM: shut down like on Ctrl+C"""
+    raise KeyboardInterrupt
+
+
 def main():
     """Main worker loop"""
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
     worker_logger.info("=" * 60)
     worker_logger.info(f"🚀 Verzek AutoTrader Worker v2.1 started")
-    worker_logger.info(f"⏱️  Poll interval: {POLL_SECONDS} seconds")
+    worker_logger.info(f"⏱️  Poll interval: {POLL_SECONDS} seconds (fallback)")
     worker_logger.info(f"💾 Database: {os.getenv('DATABASE_URL', 'sqlite:///')}")
     worker_logger.info(f"🔧 Exchange mode: {os.getenv('EXCHANGE_MODE', 'paper')}")
+    
+    shard = get_worker_shard()
+    worker_logger.info(f"🧩 Users: {shard} ({shard.worker_id})")
+    
+    try:
+        ensure_worker_schema()
+    except Exception as e:
+        worker_logger.error(f"❌ Worker schema check failed: {e}")
+    
+    listener = WakeupListener(f"{WAKEUP_SOCKET}.{shard.index}" if shard.sharded else WAKEUP_SOCKET)
+    try:
+        listener.open()
+        worker_logger.info(f"🔔 Wake-up channel: {listener.path}")
+    except OSError as e:
+        worker_logger.error(f"❌ Wake-up channel unavailable ({e}), polling only")
     worker_logger.info("=" * 60)
     
     cycle_count = 0
@@ -41,15 +74,22 @@ def main():
             
             worker_logger.info(f"✅ Cycle #{cycle_count} completed successfully")
             
+            # Sleep until the API signals new work, or the fallback poll
+            reason = listener.wait(POLL_SECONDS)
+            if reason:
+                worker_logger.info(f"🔔 Woken by {reason}")
+            
         except KeyboardInterrupt:
             worker_logger.info("⛔ Worker stopped by user (Ctrl+C)")
             break
             
         except Exception as e:
             worker_logger.error(f"❌ Worker error in cycle #{cycle_count}: {e}", exc_info=True)
-        
-        finally:
             time.sleep(POLL_SECONDS)
+    
+    listener.close()
+    signal_engine_notifier.stop()
+    paper_client.engine.close_files()  # snapshot, so the next start has no WAL to replay
 
 
 if __name__ == "__main__":
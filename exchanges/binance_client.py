@@ -11,11 +11,15 @@ import requests
 from typing import Dict, Optional, List
 from datetime import datetime
 from exchanges.proxy_helper import get_proxy_helper
+from exchanges.exchange_interface import ExchangeInterface
+from exchanges.symbol_filters import SymbolFilter, format_decimal
 
 
-class BinanceClient:
+class BinanceClient(ExchangeInterface):
     """Binance API client for futures and spot trading"""
     
+    exchange_name = "binance"
+    
     def __init__(self, api_key: str = None, api_secret: str = None, testnet: bool = False):
         self.testnet = testnet
         
@@ -73,7 +77,8 @@ class BinanceClient:
                 url=url,
                 params=params,
                 headers=self.headers,
-                timeout=10
+                timeout=10,
+                exchange="binance"
             )
             
             response.raise_for_status()
@@ -110,16 +115,24 @@ class BinanceClient:
         symbol: str,
         side: str,
         quantity: float,
-        reduce_only: bool = False
+        reduce_only: bool = False,
+        reference_price: Optional[float] = None
     ) -> dict:
         """Create market order
         
         Args:
             symbol: Trading pair (e.g., BTCUSDT)
             side: BUY or SELL
-            quantity: Order quantity
+            quantity: Order quantity (rounded down to the step size)
             reduce_only: For futures, close position only
+            reference_price: Expected fill price, for the local min-notional check
+                (default: recent ticker price)
         """
+        quantity, error = self.prepare_market_order(symbol, quantity, reference_price, reduce_only)
+        if error:
+            return {"error": error}
+        quantity = format_decimal(quantity)
+        
         if self.market_type == "futures":
             endpoint = "/fapi/v1/order"
             params = {
@@ -151,6 +164,10 @@ class BinanceClient:
         time_in_force: str = "GTC"
     ) -> dict:
         """Create limit order"""
+        quantity, price, error = self.prepare_order(symbol, quantity, price)
+        if error:
+            return {"error": error}
+        
         if self.market_type == "futures":
             endpoint = "/fapi/v1/order"
         else:
@@ -160,8 +177,8 @@ class BinanceClient:
             "symbol": symbol,
             "side": side.upper(),
             "type": "LIMIT",
-            "quantity": quantity,
-            "price": price,
+            "quantity": format_decimal(quantity),
+            "price": format_decimal(price),
             "timeInForce": time_in_force
         }
         
@@ -179,13 +196,18 @@ class BinanceClient:
         if self.market_type != "futures":
             return {"error": "Stop loss only available for futures"}
         
+        # Closing order: exempt from the minimum notional
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         endpoint = "/fapi/v1/order"
         params = {
             "symbol": symbol,
             "side": side.upper(),
             "type": "STOP_MARKET",
-            "stopPrice": stop_price,
-            "quantity": quantity,
+            "stopPrice": format_decimal(stop_price),
+            "quantity": format_decimal(quantity),
             "closePosition": "false"
         }
         
@@ -203,13 +225,18 @@ class BinanceClient:
         if self.market_type != "futures":
             return {"error": "Take profit only available for futures"}
         
+        # Closing order: exempt from the minimum notional
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         endpoint = "/fapi/v1/order"
         params = {
             "symbol": symbol,
             "side": side.upper(),
             "type": "TAKE_PROFIT_MARKET",
-            "stopPrice": stop_price,
-            "quantity": quantity,
+            "stopPrice": format_decimal(stop_price),
+            "quantity": format_decimal(quantity),
             "closePosition": "false"
         }
         
@@ -284,7 +311,7 @@ class BinanceClient:
         return result if isinstance(result, list) else []
     
     def get_exchange_info(self, symbol: Optional[str] = None) -> dict:
-        """Get exchange trading rules and symbol info"""
+        """Get exchange trading rules and symbol info (uncached: orders use get_symbol_filter)"""
         if self.market_type == "futures":
             endpoint = "/fapi/v1/exchangeInfo"
         else:
@@ -299,6 +326,33 @@ class BinanceClient:
         
         return result
     
+    @property
+    def symbol_filter_key(self) -> str:
+        """Futures and spot (and testnet) have their own rules"""
+        return f"binance_{self.market_type}" + ("_testnet" if self.testnet else "")
+    
+    def load_symbol_filters(self) -> Dict[str, SymbolFilter]:
+        """Step/tick size and minimums of all symbols (one exchangeInfo request)"""
+        result = self.get_exchange_info()
+        filters = {}
+        for sym_info in result.get("symbols", []):
+            rules = {f.get("filterType"): f for f in sym_info.get("filters", [])}
+            lot = rules.get("LOT_SIZE", {})
+            market_lot = rules.get("MARKET_LOT_SIZE", {})
+            notional = rules.get("MIN_NOTIONAL") or rules.get("NOTIONAL") or {}
+            filters[sym_info["symbol"]] = SymbolFilter(
+                symbol=sym_info["symbol"],
+                step_size=float(lot.get("stepSize", 0)),
+                tick_size=float(rules.get("PRICE_FILTER", {}).get("tickSize", 0)),
+                min_qty=float(lot.get("minQty", 0)),
+                # Futures: "notional", spot: "minNotional"
+                min_notional=float(notional.get("notional", notional.get("minNotional", 0))),
+                # Market orders: own (coarser) lot rules on futures
+                market_step_size=float(market_lot.get("stepSize", 0)),
+                market_min_qty=float(market_lot.get("minQty", 0))
+            )
+        return filters
+    
     def test_connection(self) -> bool:
         """Test API connection"""
         if not self.api_key or not self.api_secret:
@@ -320,7 +374,9 @@ class BinanceDemoClient:
     def get_ticker_price(self, symbol: str) -> Optional[float]:
         """Get simulated price (uses real Binance price)"""
         try:
-            response = requests.get(
+            response = get_proxy_helper().direct_request(
+                "binance",
+                "GET",
                 "https://fapi.binance.com/fapi/v1/ticker/price",
                 params={"symbol": symbol},
                 timeout=5
@@ -10,11 +10,15 @@ import hashlib
 import requests
 from typing import Dict, Optional, List
 from exchanges.proxy_helper import get_proxy_helper
+from exchanges.exchange_interface import ExchangeInterface
+from exchanges.symbol_filters import SymbolFilter, format_decimal
 
 
-class BybitClient:
+class BybitClient(ExchangeInterface):
     """Bybit API client for futures and spot trading"""
     
+    exchange_name = "bybit"
+    
     def __init__(self, api_key: str = None, api_secret: str = None, testnet: bool = False):
         self.testnet = testnet
         
@@ -76,7 +80,8 @@ class BybitClient:
                     url=url,
                     headers=headers,
                     json_data=params,
-                    timeout=10
+                    timeout=10,
+                    exchange="bybit"
                 )
             else:
                 response = proxy.request(
@@ -84,7 +89,8 @@ class BybitClient:
                     url=url,
                     params=params,
                     headers=headers,
-                    timeout=10
+                    timeout=10,
+                    exchange="bybit"
                 )
             
             response.raise_for_status()
@@ -112,32 +118,45 @@ class BybitClient:
         return None
     
     def create_market_order(self, symbol: str, side: str, quantity: float, **kwargs) -> dict:
-        """Create market order"""
+        """Create market order (reference_price= for the local min-notional check, default: recent ticker)"""
+        quantity, error = self.prepare_market_order(symbol, quantity, kwargs.get("reference_price"),
+                                                    kwargs.get("reduce_only", False))
+        if error:
+            return {"error": error}
+        
         endpoint = "/v5/order/create"
         params = {
             "category": self.category,
             "symbol": symbol,
             "side": side.capitalize(),
             "orderType": "Market",
-            "qty": str(quantity)
+            "qty": format_decimal(quantity)
         }
         return self._request("POST", endpoint, params=params, signed=True)
     
     def create_limit_order(self, symbol: str, side: str, quantity: float, price: float, **kwargs) -> dict:
         """Create limit order"""
+        quantity, price, error = self.prepare_order(symbol, quantity, price)
+        if error:
+            return {"error": error}
+        
         endpoint = "/v5/order/create"
         params = {
             "category": self.category,
             "symbol": symbol,
             "side": side.capitalize(),
             "orderType": "Limit",
-            "qty": str(quantity),
-            "price": str(price)
+            "qty": format_decimal(quantity),
+            "price": format_decimal(price)
         }
         return self._request("POST", endpoint, params=params, signed=True)
     
     def create_stop_loss(self, symbol: str, side: str, quantity: float, stop_price: float) -> dict:
         """Create stop loss order"""
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         endpoint = "/v5/order/create"
         close_side = "Sell" if side.upper() == "BUY" else "Buy"
         params = {
@@ -145,13 +164,17 @@ class BybitClient:
             "symbol": symbol,
             "side": close_side,
             "orderType": "Market",
-            "qty": str(quantity),
-            "stopLoss": str(stop_price)
+            "qty": format_decimal(quantity),
+            "stopLoss": format_decimal(stop_price)
         }
         return self._request("POST", endpoint, params=params, signed=True)
     
     def create_take_profit(self, symbol: str, side: str, quantity: float, stop_price: float) -> dict:
         """Create take profit order"""
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         endpoint = "/v5/order/create"
         close_side = "Sell" if side.upper() == "BUY" else "Buy"
         params = {
@@ -159,8 +182,8 @@ class BybitClient:
             "symbol": symbol,
             "side": close_side,
             "orderType": "Market",
-            "qty": str(quantity),
-            "takeProfit": str(stop_price)
+            "qty": format_decimal(quantity),
+            "takeProfit": format_decimal(stop_price)
         }
         return self._request("POST", endpoint, params=params, signed=True)
     
@@ -195,6 +218,33 @@ class BybitClient:
             return result.get("result", {}).get("list", [])
         return []
     
+    @property
+    def symbol_filter_key(self) -> str:
+        return f"bybit_{self.category}" + ("_testnet" if self.testnet else "")
+    
+    def load_symbol_filters(self) -> Dict[str, SymbolFilter]:
+        """Step/tick size and minimums of all instruments of the category (paged, 1000 per request)"""
+        filters = {}
+        params = {"category": self.category, "limit": 1000}
+        while True:
+            result = self._request("GET", "/v5/market/instruments-info", params=dict(params))
+            if result.get("retCode") != 0:
+                return {}  # incomplete: keep the previous rules
+            data = result.get("result", {})
+            for instrument in data.get("list", []):
+                lot = instrument.get("lotSizeFilter", {})
+                filters[instrument["symbol"]] = SymbolFilter(
+                    symbol=instrument["symbol"],
+                    step_size=float(lot.get("qtyStep") or lot.get("basePrecision") or 0),
+                    tick_size=float(instrument.get("priceFilter", {}).get("tickSize") or 0),
+                    min_qty=float(lot.get("minOrderQty") or 0),
+                    min_notional=float(lot.get("minNotionalValue") or lot.get("minOrderAmt") or 0)
+                )
+            cursor = data.get("nextPageCursor")
+            if not cursor:
+                return filters
+            params["cursor"] = cursor
+    
     def test_connection(self) -> bool:
         """Test API connection"""
         if not self.api_key or not self.api_secret:
@@ -3,13 +3,87 @@ Unified Exchange Interface
 Provides a consistent API across all exchange adapters
 """
 
+import os
+import time
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
+
+from exchanges.symbol_filters import SymbolFilter, get_symbol_filter_cache, quantize_order
+
+# Seconds a ticker price stays usable as a market order's reference price
+REFERENCE_PRICE_TTL = float(os.getenv("REFERENCE_PRICE_TTL", "10"))
 
 
 class ExchangeInterface(ABC):
     """Abstract base class for all exchange clients"""
     
+    # Name used for the symbol rules cache (set by each client)
+    exchange_name: str = ""
+    
+    # (symbol rules key, symbol) -> (price, unix time), shared by all clients
+    _reference_prices: Dict[Tuple[str, str], Tuple[float, float]] = {}
+    _reference_lock = threading.Lock()
+    
+    def load_symbol_filters(self) -> Dict[str, SymbolFilter]:
+        """Fetch the trading rules of all symbols in one request (per exchange)"""
+        return {}
+    
+    @property
+    def symbol_filter_key(self) -> str:
+        """Cache key of this client's rules (testnet rules differ from live ones)"""
+        return f"{self.exchange_name}_testnet" if getattr(self, "testnet", False) else self.exchange_name
+    
+    def get_symbol_filter(self, symbol: str) -> Optional[SymbolFilter]:
+        """Cached trading rules of a symbol (None if unavailable)"""
+        return get_symbol_filter_cache().get(self.symbol_filter_key, symbol, self.load_symbol_filters)
+    
+    def prepare_order(self, symbol: str, quantity: float, price: Optional[float] = None,
+                      reduce_only: bool = False) -> Tuple[float, Optional[float], Optional[str]]:
+        """Round an order to the symbol's step/tick size and check its minimums locally
+        
+        Args:
+            price: Limit/stop price, or a reference price for market orders
+        
+        Returns:
+            (quantity, price, error) - don't send the order if error is set
+        """
+        return quantize_order(self.get_symbol_filter(symbol), quantity, price, reduce_only)
+    
+    def prepare_market_order(self, symbol: str, quantity: float, reference_price: Optional[float] = None,
+                             reduce_only: bool = False) -> Tuple[float, Optional[str]]:
+        """Round a market order to the symbol's (market) lot rules and check its minimums locally
+        
+        Args:
+            reference_price: Expected fill price (None: a recent ticker price is used
+                for the minimum notional check)
+        
+        Returns:
+            (quantity, error) - don't send the order if error is set
+        """
+        rules = self.get_symbol_filter(symbol)
+        if rules and rules.min_notional and not reduce_only and not reference_price:
+            reference_price = self.get_reference_price(symbol)
+        quantity, _, error = quantize_order(rules, quantity, reference_price, reduce_only, market=True)
+        return quantity, error
+    
+    def get_reference_price(self, symbol: str) -> Optional[float]:
+        """Ticker price of a symbol, cached for REFERENCE_PRICE_TTL seconds (None if unavailable)"""
+        key = (self.symbol_filter_key, symbol.upper())
+        cached = self._reference_prices.get(key)
+        if cached and time.time() - cached[1] <= REFERENCE_PRICE_TTL:
+            return cached[0]
+        
+        try:
+            price = self.get_ticker_price(symbol)
+        except Exception as e:
+            print(f"[EXCHANGE WARNING] No reference price for {symbol}: {e}")
+            price = None
+        if price:
+            with self._reference_lock:
+                self._reference_prices[key] = (price, time.time())
+        return price
+    
     @abstractmethod
     def test_connection(self) -> bool:
         """Test API connection"""
@@ -9,12 +9,17 @@ import hmac
 import hashlib
 import base64
 import requests
-from typing import Optional, List
+from typing import Dict, Optional, List
+from exchanges.proxy_helper import get_proxy_helper
+from exchanges.exchange_interface import ExchangeInterface
+from exchanges.symbol_filters import SymbolFilter, format_decimal
 
 
-class KrakenClient:
+class KrakenClient(ExchangeInterface):
     """Kraken Futures API client"""
     
+    exchange_name = "kraken"
+    
     def __init__(self, api_key: str = None, api_secret: str = None, testnet: bool = False):
         self.testnet = testnet
         
@@ -88,19 +93,22 @@ class KrakenClient:
         headers["Content-Type"] = "application/x-www-form-urlencoded"
         
         try:
-            # Use direct requests (Kraken doesn't need proxy for IP whitelisting)
+            # Direct on the pooled session (Kraken doesn't need proxy for IP whitelisting)
+            proxy = get_proxy_helper()
             if method == "POST" or method == "PUT":
-                response = requests.request(
-                    method=method,
-                    url=url,
+                response = proxy.direct_request(
+                    "kraken",
+                    method,
+                    url,
                     headers=headers,
                     data=post_data_string,  # Send as form data
                     timeout=10
                 )
             else:
-                response = requests.request(
-                    method=method,
-                    url=url,
+                response = proxy.direct_request(
+                    "kraken",
+                    method,
+                    url,
                     params=params,
                     headers=headers,
                     timeout=10
@@ -129,51 +137,68 @@ class KrakenClient:
         return self._request("GET", endpoint, authenticated=True)
     
     def create_market_order(self, symbol: str, side: str, quantity: float, **kwargs) -> dict:
-        """Create market order"""
+        """Create market order (reference_price= for the local min-notional check, default: recent ticker)"""
+        quantity, error = self.prepare_market_order(symbol, quantity, kwargs.get("reference_price"),
+                                                    kwargs.get("reduce_only", False))
+        if error:
+            return {"error": error}
+        
         endpoint = "/sendorder"
         params = {
             "orderType": "mkt",
             "symbol": symbol,
             "side": side.lower(),
-            "size": quantity
+            "size": format_decimal(quantity)
         }
         return self._request("POST", endpoint, params=params, authenticated=True)
     
     def create_limit_order(self, symbol: str, side: str, quantity: float, price: float, **kwargs) -> dict:
         """Create limit order"""
+        quantity, price, error = self.prepare_order(symbol, quantity, price)
+        if error:
+            return {"error": error}
+        
         endpoint = "/sendorder"
         params = {
             "orderType": "lmt",
             "symbol": symbol,
             "side": side.lower(),
-            "size": quantity,
-            "limitPrice": price
+            "size": format_decimal(quantity),
+            "limitPrice": format_decimal(price)
         }
         return self._request("POST", endpoint, params=params, authenticated=True)
     
     def create_stop_loss(self, symbol: str, side: str, quantity: float, stop_price: float) -> dict:
         """Create stop loss order"""
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         close_side = "sell" if side.upper() == "BUY" else "buy"
         endpoint = "/sendorder"
         params = {
             "orderType": "stp",
             "symbol": symbol,
             "side": close_side,
-            "size": quantity,
-            "stopPrice": stop_price
+            "size": format_decimal(quantity),
+            "stopPrice": format_decimal(stop_price)
         }
         return self._request("POST", endpoint, params=params, authenticated=True)
     
     def create_take_profit(self, symbol: str, side: str, quantity: float, stop_price: float) -> dict:
         """Create take profit order"""
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         close_side = "sell" if side.upper() == "BUY" else "buy"
         endpoint = "/sendorder"
         params = {
             "orderType": "take_profit",
             "symbol": symbol,
             "side": close_side,
-            "size": quantity,
-            "limitPrice": stop_price
+            "size": format_decimal(quantity),
+            "limitPrice": format_decimal(stop_price)
         }
         return self._request("POST", endpoint, params=params, authenticated=True)
     
@@ -201,6 +226,23 @@ class KrakenClient:
             return orders
         return []
     
+    def load_symbol_filters(self) -> Dict[str, SymbolFilter]:
+        """Tick size and size precision of all instruments (one instruments request)"""
+        result = self._request("GET", "/instruments")
+        filters = {}
+        for instrument in result.get("instruments", []):
+            if not instrument.get("tradeable", True):
+                continue
+            precision = instrument.get("contractValueTradePrecision")
+            step = 10 ** -int(precision) if precision is not None else 0.0
+            filters[instrument["symbol"]] = SymbolFilter(
+                symbol=instrument["symbol"],
+                step_size=step,
+                tick_size=float(instrument.get("tickSize") or 0),
+                min_qty=step
+            )
+        return filters
+    
     def test_connection(self) -> bool:
         """Test API connection"""
         if not self.api_key:
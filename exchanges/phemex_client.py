@@ -8,13 +8,17 @@ import time
 import hmac
 import hashlib
 import requests
-from typing import Optional, List
+from typing import Dict, Optional, List
 from exchanges.proxy_helper import get_proxy_helper
+from exchanges.exchange_interface import ExchangeInterface
+from exchanges.symbol_filters import SymbolFilter
 
 
-class PhemexClient:
+class PhemexClient(ExchangeInterface):
     """Phemex API client"""
     
+    exchange_name = "phemex"
+    
     def __init__(self, api_key: str = None, api_secret: str = None, testnet: bool = False):
         self.testnet = testnet
         
@@ -74,7 +78,8 @@ class PhemexClient:
                     url=url,
                     headers=headers,
                     json_data=params,
-                    timeout=10
+                    timeout=10,
+                    exchange="phemex"
                 )
             else:
                 response = proxy.request(
@@ -82,7 +87,8 @@ class PhemexClient:
                     url=url,
                     params=params,
                     headers=headers,
-                    timeout=10
+                    timeout=10,
+                    exchange="phemex"
                 )
             
             response.raise_for_status()
@@ -106,7 +112,12 @@ class PhemexClient:
         return self._request("GET", endpoint, signed=True)
     
     def create_market_order(self, symbol: str, side: str, quantity: float, **kwargs) -> dict:
-        """Create market order"""
+        """Create market order (reference_price= for the local min-notional check, default: recent ticker)"""
+        quantity, error = self.prepare_market_order(symbol, quantity, kwargs.get("reference_price"),
+                                                    kwargs.get("reduce_only", False))
+        if error:
+            return {"error": error}
+        
         endpoint = "/orders"
         params = {
             "symbol": symbol,
@@ -118,18 +129,26 @@ class PhemexClient:
     
     def create_limit_order(self, symbol: str, side: str, quantity: float, price: float, **kwargs) -> dict:
         """Create limit order"""
+        quantity, price, error = self.prepare_order(symbol, quantity, price)
+        if error:
+            return {"error": error}
+        
         endpoint = "/orders"
         params = {
             "symbol": symbol,
             "side": side.capitalize(),
             "orderQty": int(quantity),
             "ordType": "Limit",
-            "priceEp": int(price * 10000)
+            "priceEp": int(round(price * 10000))
         }
         return self._request("POST", endpoint, params=params, signed=True)
     
     def create_stop_loss(self, symbol: str, side: str, quantity: float, stop_price: float) -> dict:
         """Create stop loss order"""
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         close_side = "Sell" if side.upper() == "BUY" else "Buy"
         endpoint = "/orders"
         params = {
@@ -137,12 +156,16 @@ class PhemexClient:
             "side": close_side,
             "orderQty": int(quantity),
             "ordType": "Stop",
-            "stopPxEp": int(stop_price * 10000)
+            "stopPxEp": int(round(stop_price * 10000))
         }
         return self._request("POST", endpoint, params=params, signed=True)
     
     def create_take_profit(self, symbol: str, side: str, quantity: float, stop_price: float) -> dict:
         """Create take profit order"""
+        quantity, stop_price, error = self.prepare_order(symbol, quantity, stop_price, reduce_only=True)
+        if error:
+            return {"error": error}
+        
         close_side = "Sell" if side.upper() == "BUY" else "Buy"
         endpoint = "/orders"
         params = {
@@ -151,8 +174,8 @@ class PhemexClient:
             "orderQty": int(quantity),
             "ordType": "LimitIfTouched",
             "triggerType": "ByMarkPrice",
-            "stopPxEp": int(stop_price * 10000),
-            "priceEp": int(stop_price * 10000)
+            "stopPxEp": int(round(stop_price * 10000)),
+            "priceEp": int(round(stop_price * 10000))
         }
         return self._request("POST", endpoint, params=params, signed=True)
     
@@ -180,6 +203,22 @@ class PhemexClient:
         result = self._request("GET", endpoint, params=params, signed=True)
         return result.get("data", {}).get("rows", []) if "data" in result else []
     
+    def load_symbol_filters(self) -> Dict[str, SymbolFilter]:
+        """Lot and tick size of all contracts (one products request)"""
+        result = self._request("GET", "/public/products")
+        filters = {}
+        for product in result.get("data", {}).get("products", []):
+            if product.get("type") not in (None, "Perpetual"):
+                continue
+            lot_size = float(product.get("lotSize") or 1)  # contracts
+            filters[product["symbol"]] = SymbolFilter(
+                symbol=product["symbol"],
+                step_size=lot_size,
+                tick_size=float(product.get("tickSize") or 0),
+                min_qty=lot_size
+            )
+        return filters
+    
     def test_connection(self) -> bool:
         """Test API connection"""
         if not self.api_key or not self.api_secret:
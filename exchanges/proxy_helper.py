@@ -1,32 +1,151 @@
 """
 Proxy Helper for Exchange API Routing
 Provides static IP support via Cloudflare Workers proxy
+
+Requests go through pooled keep-alive sessions, one per (exchange, base URL,
+direct/proxy), so orders, balances and tickers reuse open TCP+TLS
+connections instead of handshaking on every call. Connection failures (and
+5xx answers to GET/DELETE) are retried; a POST that reached the server is
+never resent, so an order can't be placed twice.
+
+With EXCHANGE_HTTP2=true and `httpx[http2]` installed the sessions speak
+HTTP/2 (one multiplexed connection per host). Every call's latency is kept
+in a per-exchange, per-endpoint histogram (get_latency_stats).
 """
 
 import os
 import hmac
+import time
+import json
+import bisect
 import hashlib
+import threading
 import requests
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Any, Tuple
 from urllib.parse import urlparse, urlencode
 
+EXCHANGE_POOL_SIZE = int(os.getenv("EXCHANGE_POOL_SIZE", "20"))
+EXCHANGE_HTTP_RETRIES = int(os.getenv("EXCHANGE_HTTP_RETRIES", "2"))
+EXCHANGE_HTTP2 = os.getenv("EXCHANGE_HTTP2", "false").lower() == "true"
+
+# Histogram bucket upper bounds in milliseconds (last bucket: slower)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 75, 100, 150, 250, 400, 600, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (thread-safe)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+            self.count += other.count
+            self.total_ms += other.total_ms
+            self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the p-th percentile"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(self.buckets[i]) if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {
+                (f"<={bound}" if i < len(self.buckets) else f">{self.buckets[-1]}"): count
+                for i, (bound, count) in enumerate(zip(self.buckets + (None,), self.counts))
+            }
+        }
+
+
+class _Http2Session:
+    """httpx HTTP/2 client behind the subset of the requests.Session API used here"""
+
+    def __init__(self, httpx, pool_size: int):
+        self.httpx = httpx
+        self.client = httpx.Client(transport=httpx.HTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            retries=EXCHANGE_HTTP_RETRIES  # connect errors only
+        ))
+
+    def request(self, method: str, url: str, params=None, headers=None, json=None, data=None,
+                timeout=10) -> requests.Response:
+        try:
+            r = self.client.request(method, url, params=params, headers=headers, json=json, content=data,
+                                    timeout=timeout)
+        except self.httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except self.httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+        # Callers expect requests responses (raise_for_status, exceptions)
+        response = requests.Response()
+        response.status_code = r.status_code
+        response._content = r.content
+        response.headers = CaseInsensitiveDict(r.headers)
+        response.url = str(r.url)
+        response.reason = r.reason_phrase
+        response.encoding = r.encoding
+        response.elapsed = r.elapsed
+        return response
+
+    def close(self):
+        self.client.close()
+
 
 class ProxyHelper:
     """Helper class for routing exchange API calls through proxy"""
-    
+
     def __init__(self):
         self.proxy_enabled = os.getenv("PROXY_ENABLED", "false").lower() == "true"
         self.proxy_url = os.getenv("PROXY_URL", "")
         self.proxy_secret = os.getenv("PROXY_SECRET_KEY", "")
-        
+
         if self.proxy_enabled and not self.proxy_url:
             print("[PROXY WARNING] PROXY_ENABLED=true but PROXY_URL not set. Using direct connection.")
             self.proxy_enabled = False
-        
+
         if self.proxy_enabled and not self.proxy_secret:
             print("[PROXY WARNING] PROXY_ENABLED=true but PROXY_SECRET_KEY not set. Using direct connection.")
             self.proxy_enabled = False
-    
+
+        self.pool_size = EXCHANGE_POOL_SIZE
+        self.http2 = EXCHANGE_HTTP2
+        self._sessions: Dict[Tuple[str, str, str], Any] = {}  # (exchange, base URL, mode) -> session
+        self._latency: Dict[Tuple[str, str], LatencyHistogram] = {}  # (exchange, endpoint) -> histogram
+        self._lock = threading.Lock()
+
     def _generate_proxy_signature(self, body: str = "") -> str:
         """Generate HMAC-SHA256 signature for proxy authentication"""
         signature = hmac.new(
@@ -35,7 +154,117 @@ class ProxyHelper:
             hashlib.sha256
         ).hexdigest()
         return signature
-    
+
+    # ------------------------------------------------------------------
+    # Pooled sessions
+    # ------------------------------------------------------------------
+
+    def session(self, exchange: str, url: str, mode: str = "direct") -> Any:
+        """
+        Get the pooled session for an exchange host
+
+        Args:
+            exchange: binance, bybit, phemex, kraken
+            url: Any URL on the host (the base URL is the pool key)
+            mode: 'direct' or 'proxy'
+
+        Returns:
+            requests.Session (or an HTTP/2 session with the same request() API)
+        """
+        parsed = urlparse(url)
+        key = (exchange, f"{parsed.scheme}://{parsed.netloc}", mode)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._sessions[key] = self._create_session()
+        return session
+
+    def _create_session(self) -> Any:
+        if self.http2:
+            try:
+                import httpx  # optional, with the h2 extra
+                import h2  # noqa: F401
+                return _Http2Session(httpx, self.pool_size)
+            except ImportError:
+                print("[PROXY WARNING] EXCHANGE_HTTP2=true but httpx[http2] is not installed. Using HTTP/1.1.")
+                self.http2 = False
+
+        retry = Retry(
+            total=EXCHANGE_HTTP_RETRIES,
+            connect=EXCHANGE_HTTP_RETRIES,    # request never sent: safe for orders too
+            read=0,                           # request may have reached the exchange
+            status=EXCHANGE_HTTP_RETRIES,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "DELETE"}),
+            backoff_factor=0.1,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+    # ------------------------------------------------------------------
+    # Latency
+    # ------------------------------------------------------------------
+
+    def _observe(self, exchange: str, method: str, url: str, seconds: float):
+        key = (exchange, f"{method} {urlparse(url).path}")
+        histogram = self._latency.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._latency.setdefault(key, LatencyHistogram())
+        histogram.record(seconds)
+
+    def get_latency_stats(self, exchange: Optional[str] = None) -> Dict:
+        """
+        Latency histograms per exchange (all endpoints) and per endpoint
+
+        Returns:
+            {exchange: {"all": {...}, "endpoints": {"POST /fapi/v1/order": {...}}}}
+        """
+        stats: Dict[str, Dict] = {}
+        totals: Dict[str, LatencyHistogram] = {}
+        for (name, endpoint), histogram in list(self._latency.items()):
+            if exchange and name != exchange:
+                continue
+            totals.setdefault(name, LatencyHistogram()).merge(histogram)
+            stats.setdefault(name, {"endpoints": {}})["endpoints"][endpoint] = histogram.to_dict()
+        for name, histogram in totals.items():
+            stats[name]["all"] = histogram.to_dict()
+        return stats
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def direct_request(self, exchange: str, method: str, url: str, timeout: int = 10, **kwargs) -> Any:
+        """
+        Make HTTP request directly on the exchange's pooled session
+
+        Args:
+            exchange: Exchange name (pool and latency key)
+            **kwargs: params, headers, json, data
+
+        Returns:
+            Response object from requests library
+        """
+        started = time.monotonic()
+        try:
+            return self.session(exchange, url).request(method=method, url=url, timeout=timeout, **kwargs)
+        finally:
+            self._observe(exchange, method, url, time.monotonic() - started)
+
     def request(
         self,
         method: str,
@@ -43,11 +272,12 @@ class ProxyHelper:
         params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
         json_data: Optional[Dict] = None,
-        timeout: int = 10
+        timeout: int = 10,
+        exchange: Optional[str] = None
     ) -> Any:
         """
         Make HTTP request through proxy (if enabled) or directly
-        
+
         Args:
             method: HTTP method (GET, POST, DELETE)
             url: Full URL to exchange API endpoint
@@ -55,113 +285,97 @@ class ProxyHelper:
             headers: HTTP headers
             json_data: JSON body (for POST requests)
             timeout: Request timeout in seconds
-        
+            exchange: Exchange name for pooling and latency stats (default: host)
+
         Returns:
             Response object from requests library
         """
+        parsed_url = urlparse(url)
+        exchange = exchange or parsed_url.netloc
+
         if not self.proxy_enabled:
             # Direct connection (no proxy)
-            return requests.request(
-                method=method,
-                url=url,
+            return self.direct_request(
+                exchange, method, url,
                 params=params,
                 headers=headers,
                 json=json_data,
                 timeout=timeout
             )
-        
+
         # Route through proxy
-        parsed_url = urlparse(url)
         exchange_host = parsed_url.netloc
         path = parsed_url.path
-        
+
         # Build query string
         query_string = ""
         if params:
             query_string = urlencode(params)
         if parsed_url.query:
             query_string = f"{parsed_url.query}&{query_string}" if query_string else parsed_url.query
-        
+
         # Prepare body for signature (use EXACT same serialization that will be sent)
         body = ""
         if json_data:
-            import json
             # Serialize JSON with compact format (no spaces)
             body = json.dumps(json_data, separators=(',', ':'))
-        
+
         # Generate proxy signature on the EXACT body that will be sent
         proxy_signature = self._generate_proxy_signature(body)
-        
+
         # Build proxy headers
         proxy_headers = {
             "X-Proxy-Signature": proxy_signature,
             "X-Exchange-Host": exchange_host,
         }
-        
+
         # Set Content-Type explicitly
         if json_data:
             proxy_headers["Content-Type"] = "application/json"
-        
+
         # Add original exchange headers (API keys, etc.)
         if headers:
             for key, value in headers.items():
                 if key.lower() not in ['host', 'content-length']:
                     proxy_headers[key] = value
-        
+
         # Build proxy URL
         proxy_endpoint = f"{self.proxy_url}?path={path}"
         if query_string:
             proxy_endpoint = f"{proxy_endpoint}&{query_string}"
-        
+
+        if method not in ("GET", "POST", "DELETE"):
+            raise ValueError(f"Unsupported method: {method}")
+
         # Make request through proxy
+        started = time.monotonic()
         try:
-            if method == "GET":
-                response = requests.get(
-                    proxy_endpoint,
-                    headers=proxy_headers,
-                    timeout=timeout
-                )
-            elif method == "POST":
-                # For POST, send the SAME serialized body that was signed
-                if body:
-                    # Send exact JSON string that was used for signature
-                    response = requests.post(
-                        proxy_endpoint,
-                        headers=proxy_headers,
-                        data=body,  # Send exact string that was signed
-                        timeout=timeout
-                    )
-                else:
-                    response = requests.post(
-                        proxy_endpoint,
-                        headers=proxy_headers,
-                        timeout=timeout
-                    )
-            elif method == "DELETE":
-                response = requests.delete(
-                    proxy_endpoint,
-                    headers=proxy_headers,
-                    timeout=timeout
-                )
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-            
-            return response
-            
+            # For POST, send the SAME serialized body that was signed
+            response = self.session(exchange, proxy_endpoint, mode="proxy").request(
+                method=method,
+                url=proxy_endpoint,
+                headers=proxy_headers,
+                data=body if method == "POST" and body else None,  # Send exact string that was signed
+                timeout=timeout
+            )
+
         except requests.exceptions.RequestException as e:
             print(f"[PROXY ERROR] Request failed through proxy: {e}")
             print(f"[PROXY ERROR] Falling back to direct connection...")
-            
+
             # Fallback to direct connection on proxy failure
-            return requests.request(
-                method=method,
-                url=url,
+            return self.direct_request(
+                exchange, method, url,
                 params=params,
                 headers=headers,
                 json=json_data,
                 timeout=timeout
             )
 
+        # Recorded under the exchange's endpoint, not the proxy's
+        self._observe(exchange, method, url, time.monotonic() - started)
+        return response
+
 
 # Global singleton instance
 _proxy_helper = None
@@ -0,0 +1,226 @@
+"""
+Symbol Filter Cache and Order Quantization
+Keeps each exchange's trading rules (step size, tick size, minimum quantity
+and notional) in memory so orders can be rounded and checked locally before
+they are sent, instead of fetching exchange info per order or having the
+exchange reject them.
+
+Rules are loaded once per exchange with a single bulk request, refreshed
+after SYMBOL_FILTER_TTL seconds and persisted to SYMBOL_FILTER_DIR, so a
+restart starts from the saved copy. If a refresh fails the previous rules
+are kept.
+"""
+
+import os
+import json
+import time
+import threading
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+SYMBOL_FILTER_TTL = float(os.getenv("SYMBOL_FILTER_TTL", "3600"))
+SYMBOL_FILTER_DIR = os.getenv("SYMBOL_FILTER_DIR", "database/exchange_filters")
+SYMBOL_FILTER_RETRY_SECONDS = 60  # after a failed load
+
+
+class SymbolFilter(NamedTuple):
+    """Trading rules of one symbol (0 = no constraint)"""
+    symbol: str
+    step_size: float = 0.0
+    tick_size: float = 0.0
+    min_qty: float = 0.0
+    min_notional: float = 0.0
+    market_step_size: float = 0.0   # market orders, if the exchange has its own lot rules
+    market_min_qty: float = 0.0
+
+
+def _round_to(value: float, step: float, rounding) -> float:
+    """Round value to a multiple of step (decimal-exact, no float drift)"""
+    if not step:
+        return value
+    step_dec = Decimal(str(step))
+    units = (Decimal(str(value)) / step_dec).quantize(Decimal(1), rounding=rounding)
+    return float(units * step_dec)
+
+
+def format_decimal(value: float) -> str:
+    """Plain decimal string for the API (str() gives '1e-05' for small values)"""
+    text = format(Decimal(str(value)), "f")
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
+
+def quantize_qty(rules: SymbolFilter, quantity: float) -> float:
+    """Round quantity down to the step size (never more than requested)"""
+    return _round_to(quantity, rules.step_size, ROUND_DOWN)
+
+
+def market_rules(rules: SymbolFilter) -> SymbolFilter:
+    """Rules of a market order: the market lot rules where the exchange has them"""
+    return rules._replace(
+        step_size=rules.market_step_size or rules.step_size,
+        min_qty=rules.market_min_qty or rules.min_qty
+    )
+
+
+def quantize_price(rules: SymbolFilter, price: float) -> float:
+    """Round price to the nearest tick"""
+    return _round_to(price, rules.tick_size, ROUND_HALF_UP)
+
+
+def quantize_order(rules: Optional[SymbolFilter], quantity: float, price: Optional[float] = None,
+                   reduce_only: bool = False, market: bool = False) -> Tuple[float, Optional[float], Optional[str]]:
+    """
+    Round an order to the symbol's rules and check its minimums
+
+    Args:
+        rules: Symbol rules (None: order passed through unchanged)
+        quantity: Requested quantity
+        price: Limit/stop price, or a reference price for market orders (None: notional not checked)
+        reduce_only: Closing orders are exempt from the minimum notional
+        market: Market order (uses the market lot rules, if any)
+
+    Returns:
+        (quantity, price, error) - error is None when the order may be sent
+    """
+    if rules is None:
+        return quantity, price, None
+    if market:
+        rules = market_rules(rules)
+
+    qty = quantize_qty(rules, quantity)
+    px = quantize_price(rules, price) if price else price
+
+    if qty <= 0:
+        return qty, px, f"Quantity {quantity} is below the step size {rules.step_size} for {rules.symbol}"
+    if rules.min_qty and qty < rules.min_qty:
+        return qty, px, f"Quantity {qty} is below the minimum {rules.min_qty} for {rules.symbol}"
+    if px and rules.min_notional and not reduce_only and qty * px < rules.min_notional:
+        return qty, px, (
+            f"Order value {qty * px:.4f} is below the minimum notional {rules.min_notional} for {rules.symbol}"
+        )
+    return qty, px, None
+
+
+class SymbolFilterCache:
+    """Per-exchange symbol rules with TTL refresh and disk persistence"""
+
+    def __init__(self, ttl: float = SYMBOL_FILTER_TTL, cache_dir: Optional[str] = SYMBOL_FILTER_DIR):
+        """
+        Args:
+            ttl: Seconds before an exchange's rules are reloaded
+            cache_dir: Where rules are saved between runs (None: memory only)
+        """
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._filters: Dict[str, Dict[str, SymbolFilter]] = {}  # exchange -> symbol -> rules
+        self._loaded_at: Dict[str, float] = {}  # exchange -> unix time of the rules
+        self._retry_at: Dict[str, float] = {}
+        self._file_checked = set()  # exchanges whose saved rules were looked for
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, exchange: str, symbol: str,
+            loader: Callable[[], Dict[str, SymbolFilter]]) -> Optional[SymbolFilter]:
+        """
+        Get a symbol's rules, loading the exchange's rules if missing or expired
+
+        Args:
+            exchange: binance, bybit, phemex, kraken (add the market, e.g. binance_futures)
+            symbol: Exchange symbol
+            loader: Fetches all of the exchange's rules in one request
+
+        Returns:
+            SymbolFilter, or None if the exchange's rules are unavailable or the symbol is unknown
+        """
+        filters = self._filters.get(exchange)
+        if filters is None and self.cache_dir and exchange not in self._file_checked:
+            self._file_checked.add(exchange)
+            filters = self._load_file(exchange)
+
+        if filters is None or time.time() - self._loaded_at.get(exchange, 0) > self.ttl:
+            filters = self.refresh(exchange, loader) or filters
+
+        return filters.get(symbol.upper()) if filters else None
+
+    def refresh(self, exchange: str, loader: Callable[[], Dict[str, SymbolFilter]]) -> Optional[Dict[str, SymbolFilter]]:
+        """Reload an exchange's rules now (one loader call at a time per exchange)"""
+        with self._lock:
+            lock = self._locks.setdefault(exchange, threading.Lock())
+
+        with lock:
+            # Another thread refreshed while this one waited
+            if exchange in self._filters and time.time() - self._loaded_at.get(exchange, 0) <= self.ttl:
+                return self._filters[exchange]
+            if time.time() < self._retry_at.get(exchange, 0):
+                return None
+
+            try:
+                loaded = loader()
+            except Exception as e:
+                print(f"[FILTERS WARNING] Loading {exchange} symbol rules failed: {e}")
+                loaded = None
+
+            if not loaded:
+                # Keep the previous rules; don't hammer the exchange
+                self._retry_at[exchange] = time.time() + SYMBOL_FILTER_RETRY_SECONDS
+                return None
+
+            filters = {symbol.upper(): rules for symbol, rules in loaded.items()}
+            self._filters[exchange] = filters
+            self._loaded_at[exchange] = time.time()
+            self._save_file(exchange, filters)
+            return filters
+
+    def invalidate(self, exchange: Optional[str] = None):
+        """Force a reload on next use (e.g. after an order was rejected for its filters)"""
+        for name in ([exchange] if exchange else list(self._loaded_at)):
+            self._loaded_at[name] = 0
+            self._retry_at.pop(name, None)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _path(self, exchange: str) -> str:
+        return os.path.join(self.cache_dir, f"{exchange}.json")
+
+    def _load_file(self, exchange: str) -> Optional[Dict[str, SymbolFilter]]:
+        try:
+            with open(self._path(exchange)) as f:
+                saved = json.load(f)
+            filters = {symbol: SymbolFilter(**rules) for symbol, rules in saved["symbols"].items()}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[FILTERS WARNING] Ignoring saved {exchange} symbol rules: {e}")
+            return None
+
+        self._filters[exchange] = filters
+        self._loaded_at[exchange] = saved.get("loaded_at", 0)
+        return filters
+
+    def _save_file(self, exchange: str, filters: Dict[str, SymbolFilter]):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(exchange)}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "loaded_at": self._loaded_at[exchange],
+                    "symbols": {symbol: rules._asdict() for symbol, rules in filters.items()}
+                }, f)
+            os.replace(tmp_path, self._path(exchange))
+        except Exception as e:
+            print(f"[FILTERS WARNING] Saving {exchange} symbol rules failed: {e}")
+
+
+# Global singleton instance
+_symbol_filter_cache = None
+
+def get_symbol_filter_cache() -> SymbolFilterCache:
+    """Get or create global SymbolFilterCache instance"""
+    global _symbol_filter_cache
+    if _symbol_filter_cache is None:
+        _symbol_filter_cache = SymbolFilterCache()
+    return _symbol_filter_cache
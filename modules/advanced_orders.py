@@ -7,6 +7,7 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 from modules import PositionTracker
+from modules.trigger_index import TriggerIndex, take_profit_direction, stop_loss_direction
 from utils.logger import log_event
 import json
 import os
@@ -53,6 +54,7 @@ class AdvancedOrderManager:
         # Load existing orders
         self.trailing_stops = self._load_trailing_stops()
         self.oco_orders = self._load_oco_orders()
+        self.oco_index = TriggerIndex()  # pending legs of active OCO orders
     
     def _load_trailing_stops(self) -> Dict[str, TrailingStopConfig]:
         """Load trailing stop configurations"""
@@ -361,6 +363,10 @@ class AdvancedOrderManager:
         """
         Check OCO orders and return triggered orders
         
+        Both legs of every active OCO are kept in a trigger index, so each
+        symbol's price is bisected against the pending levels instead of
+        comparing it with every order.
+        
         Args:
             current_prices: Dict of {symbol: current_price}
         """
@@ -368,47 +374,51 @@ class AdvancedOrderManager:
         
         for oco_id, oco in list(self.oco_orders.items()):
             if oco.status != 'active':
+                self.oco_index.remove(oco_id)
                 continue
             
-            position_dict = self.position_tracker.get_position(oco.position_id)
-            position = type('Position', (), position_dict)() if position_dict else None
-            if not position or position.status != 'active':
+            position = self.position_tracker.get_position(oco.position_id)
+            if not position or position.get('status') != 'active':
                 # Cancel OCO if position closed
                 oco.status = 'cancelled'
+                self.oco_index.remove(oco_id)
                 continue
             
-            current_price = current_prices.get(position.symbol)
+            if oco_id not in self.oco_index:
+                symbol = position.get('symbol')
+                self.oco_index.register(oco_id, [
+                    (symbol, 'take_profit', oco.take_profit_price, take_profit_direction(position.get('side'))),
+                    (symbol, 'stop_loss', oco.stop_loss_price, stop_loss_direction(position.get('side')))
+                ])
+        
+        for symbol in self.oco_index.symbols():
+            current_price = current_prices.get(symbol)
             if not current_price:
                 continue
             
-            # Check if either side triggered
-            tp_hit = False
-            sl_hit = False
-            
-            if position.side == 'LONG':
-                tp_hit = current_price >= oco.take_profit_price
-                sl_hit = current_price <= oco.stop_loss_price
-            else:  # SHORT
-                tp_hit = current_price <= oco.take_profit_price
-                sl_hit = current_price >= oco.stop_loss_price
+            fired: Dict[str, set] = {}
+            for trigger in self.oco_index.update(symbol, current_price):
+                fired.setdefault(trigger.owner, set()).add(trigger.tag)
             
-            if tp_hit or sl_hit:
-                executed_side = 'take_profit' if tp_hit else 'stop_loss'
-                execution_price = oco.take_profit_price if tp_hit else oco.stop_loss_price
+            for oco_id, sides in fired.items():
+                oco = self.oco_orders[oco_id]
+                executed_side = 'take_profit' if 'take_profit' in sides else 'stop_loss'
+                execution_price = oco.take_profit_price if executed_side == 'take_profit' else oco.stop_loss_price
                 
                 triggered_orders.append({
                     'oco_id': oco_id,
                     'position_id': oco.position_id,
-                    'symbol': position.symbol,
+                    'symbol': symbol,
                     'executed_side': executed_side,
                     'execution_price': execution_price,
                     'quantity': oco.quantity,
                     'current_price': current_price
                 })
                 
-                # Mark as executed
+                # Mark as executed (cancels the other leg)
                 oco.status = 'executed'
                 oco.executed_side = executed_side
+                self.oco_index.remove(oco_id)
                 
                 log_event("ADVANCED_ORDERS", f"OCO {oco_id} triggered: {executed_side} at ${execution_price}")
         
@@ -7,6 +7,7 @@ from typing import Optional, Dict
 import hashlib
 from modules import DCAEngine, PositionTracker, UserManager, SafetyManager, PositionSide
 from modules.signal_filter import signal_filter
+from modules.trigger_index import TriggerIndex, take_profit_direction
 from modules.encryption_service import EncryptionService
 from exchanges import ExchangeFactory
 from utils.logger import log_event
@@ -23,6 +24,7 @@ class DCAOrchestrator:
         self.dca_engines: Dict[str, DCAEngine] = {}  # user_id -> engine
         self.exchange_factory = ExchangeFactory()
         self.encryption_service = EncryptionService()
+        self.target_index = TriggerIndex()  # unreached targets, keyed by (exchange, testnet, symbol)
         
         log_event("ORCHESTRATOR", "DCA Orchestrator initialized")
     
@@ -444,76 +446,91 @@ class DCAOrchestrator:
         return {"success": False, "error": "Failed to close position"}
     
     def monitor_targets(self):
-        """Monitor all active positions for target hits and execute progressive TPs"""
-        active_positions = self.position_tracker.get_active_positions()
+        """Monitor all active positions for target hits and execute progressive TPs
         
-        for position in active_positions:
-            # Skip positions without targets
-            if not position.get("targets"):
-                continue
-            
-            # Check if target-based TP is enabled for user
-            user = self.user_manager.get_user(position["user_id"])
-            if not user or not user.strategy_settings.get("target_based_tp", True):
-                continue
-            
-            # Get current price
-            symbol = position["symbol"]
-            user_id = position["user_id"]
-            
-            # Get exchange client for price
-            exchanges = user.exchange_accounts
-            if not exchanges:
-                continue
-            
-            active_exchange = next((e for e in exchanges if e.get("enabled", True)), None)
-            if not active_exchange:
-                continue
-            
-            exchange_name = active_exchange["exchange"]
-            testnet = active_exchange.get("testnet", False)
+        Unreached targets stay in a trigger index between calls, keyed by price
+        source (exchange, testnet, symbol) so each position is priced on its
+        user's exchange; each source is priced once and only the targets the
+        price crossed are executed.
+        """
+        active_positions = {p["position_id"]: p for p in self.position_tracker.get_active_positions()}
+        
+        # Forget closed positions, index new ones
+        for position_id in self.target_index.owners():
+            if position_id not in active_positions:
+                self.target_index.remove(position_id)
+        
+        for position_id, position in active_positions.items():
+            if position_id not in self.target_index:
+                self._register_targets(position)
+        
+        for source in self.target_index.symbols():
+            exchange_name, testnet, symbol = source
             client = self.exchange_factory.get_client(exchange_name, testnet=testnet)
-            
             if not client:
                 continue
             
             try:
                 current_price = client.get_ticker_price(symbol)
+                if not current_price:
+                    continue
                 
-                # Check each target
-                for target in position["targets"]:
-                    target_num = target["target_num"]
-                    target_price = target["price"]
-                    
-                    # Skip already reached targets
-                    if target_num in position.get("reached_targets", []):
-                        continue
-                    
-                    # Check if target is reached
-                    side = position["side"].upper()
-                    target_reached = False
-                    
-                    if side == "LONG":
-                        # For LONG, target reached when price >= target
-                        target_reached = current_price >= target_price
-                    else:
-                        # For SHORT, target reached when price <= target
-                        target_reached = current_price <= target_price
-                    
-                    if target_reached:
+                fired: Dict[str, list] = {}
+                for trigger in self.target_index.update(source, current_price):
+                    fired.setdefault(trigger.owner, []).append(trigger)
+                
+                for position_id, triggers in fired.items():
+                    for trigger in sorted(triggers, key=lambda t: t.tag):
+                        position = self.position_tracker.get_position(position_id)
+                        if not position or position.get("status") != "active":
+                            break
+                        
+                        user = self.user_manager.get_user(position["user_id"])
+                        if not user or not user.strategy_settings.get("target_based_tp", True):
+                            break
+                        
                         # Execute progressive TP
                         self._execute_progressive_tp(
-                            position_id=position["position_id"],
-                            target_num=target_num,
-                            target_price=target_price,
+                            position_id=position_id,
+                            target_num=trigger.tag,
+                            target_price=trigger.level,
                             current_price=current_price,
-                            user_id=user_id,
+                            user_id=position["user_id"],
                             symbol=symbol
                         )
+                    
+                    # Re-indexed from the tracker next call (remaining targets)
+                    self.target_index.remove(position_id)
                         
             except Exception as e:
                 log_event("ORCHESTRATOR", f"Error monitoring targets for {symbol}: {e}")
     
+    def _register_targets(self, position: dict):
+        """Index a position's unreached targets (skipped until the user is eligible)"""
+        # Skip positions without targets
+        if not position.get("targets"):
+            return
+        
+        # Check if target-based TP is enabled for user
+        user = self.user_manager.get_user(position["user_id"])
+        if not user or not user.strategy_settings.get("target_based_tp", True):
+            return
+        
+        # Exchange used to price the position
+        active_exchange = next((e for e in user.exchange_accounts or [] if e.get("enabled", True)), None)
+        if not active_exchange:
+            return
+        
+        source = (active_exchange["exchange"], active_exchange.get("testnet", False), position["symbol"])
+        
+        reached = position.get("reached_targets", [])
+        direction = take_profit_direction(position["side"])
+        self.target_index.register(position["position_id"], [
+            (source, target["target_num"], target["price"], direction)
+            for target in position["targets"]
+            if target["target_num"] not in reached
+        ])
+    
     def _execute_progressive_tp(
         self,
         position_id: str,
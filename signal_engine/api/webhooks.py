@@ -7,6 +7,8 @@ This enables real-time signal closure tracking in the Signal Tracker database.
 import os
 import sys
 import logging
+import queue
+import threading
 from flask import Flask, request, jsonify
 from datetime import datetime
 
@@ -37,6 +39,133 @@ def get_tracker():
     return tracker
 
 
+# Batch processing
+MAX_BATCH_EVENTS = int(os.getenv('WEBHOOK_MAX_BATCH_EVENTS', '500'))
+VALID_CLOSE_REASONS = ['TP', 'SL', 'CANCEL', 'REVERSAL']
+
+# Async mode: batches are applied in order by a single background writer
+_batch_queue = queue.Queue()
+_batch_worker = None
+_batch_worker_lock = threading.Lock()
+
+
+def _is_authorized() -> bool:
+    """Check X-Webhook-Secret header against shared secret"""
+    expected_secret = os.getenv('SIGNAL_ENGINE_WEBHOOK_SECRET', 'dev-secret-change-in-prod')
+    provided_secret = request.headers.get('X-Webhook-Secret')
+    return bool(provided_secret) and provided_secret == expected_secret
+
+
+def _process_batch(tp_hits: list, closures: list) -> dict:
+    """
+    Apply a batch of TP hits and closures to the tracker
+    
+    Duplicate events (same signal_id + tp_number, or same signal_id for
+    closures) are applied once. TP hits are applied in TP order before
+    closures so sequential TP validation holds within a batch.
+    """
+    tracker_instance = get_tracker()
+    results = {'tp_hits': [], 'closures': []}
+    duplicates = 0
+    
+    # TP hits (deduplicated, sorted per signal by tp_number)
+    seen_tp = set()
+    valid_tp_hits = []
+    for event in tp_hits:
+        try:
+            signal_id = str(event['signal_id'])
+            hit_price = float(event['hit_price'])
+            tp_number = int(event['tp_number']) if event.get('tp_number') is not None else None
+        except (KeyError, ValueError, TypeError):
+            results['tp_hits'].append({'event': event, 'status': 'invalid'})
+            continue
+        
+        key = (signal_id, tp_number)
+        if key in seen_tp:
+            duplicates += 1
+            continue
+        seen_tp.add(key)
+        valid_tp_hits.append((signal_id, hit_price, tp_number))
+    
+    valid_tp_hits.sort(key=lambda e: (e[0], e[2] or 0))
+    for signal_id, hit_price, tp_number in valid_tp_hits:
+        outcome = tracker_instance.on_target_hit(signal_id, hit_price, tp_number)
+        result = {'signal_id': signal_id, 'tp_number': tp_number}
+        if outcome:
+            result.update({
+                'status': 'success',
+                'profit_pct': outcome.profit_pct,
+                'is_final': outcome.is_final,
+                'current_tp_index': outcome.current_tp_index
+            })
+        else:
+            result['status'] = 'not_found'
+        results['tp_hits'].append(result)
+    
+    # Closures (first closure per signal wins)
+    seen_close = set()
+    for event in closures:
+        try:
+            signal_id = str(event['signal_id'])
+            exit_price = float(event['exit_price'])
+            close_reason = event['close_reason']
+        except (KeyError, ValueError, TypeError):
+            results['closures'].append({'event': event, 'status': 'invalid'})
+            continue
+        
+        if close_reason not in VALID_CLOSE_REASONS:
+            results['closures'].append({'signal_id': signal_id, 'status': 'invalid'})
+            continue
+        
+        if signal_id in seen_close:
+            duplicates += 1
+            continue
+        seen_close.add(signal_id)
+        
+        outcome = tracker_instance.close_signal(signal_id, exit_price, close_reason)
+        result = {'signal_id': signal_id, 'close_reason': close_reason}
+        if outcome:
+            result.update({
+                'status': 'success',
+                'profit_pct': outcome.profit_pct,
+                'duration_minutes': outcome.duration_minutes
+            })
+        else:
+            result['status'] = 'not_found'
+        results['closures'].append(result)
+    
+    applied = sum(
+        1 for r in results['tp_hits'] + results['closures'] if r['status'] == 'success'
+    )
+    logger.info(
+        f"Batch processed: {len(tp_hits)} TP hits, {len(closures)} closures | "
+        f"applied: {applied} | duplicates: {duplicates}"
+    )
+    
+    return {'results': results, 'applied': applied, 'duplicates': duplicates}
+
+
+def _batch_worker_loop():
+    """Background writer for async batches"""
+    while True:
+        tp_hits, closures = _batch_queue.get()
+        try:
+            _process_batch(tp_hits, closures)
+        except Exception as e:
+            logger.error(f"Async batch processing error: {e}")
+        finally:
+            _batch_queue.task_done()
+
+
+def _ensure_batch_worker():
+    """Start the async batch writer thread once"""
+    global _batch_worker
+    with _batch_worker_lock:
+        if _batch_worker is None or not _batch_worker.is_alive():
+            _batch_worker = threading.Thread(target=_batch_worker_loop, daemon=True, name='webhook-batch-writer')
+            _batch_worker.start()
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -285,6 +414,82 @@ def tp_hit():
         }), 500
 
 
+@app.route('/api/signals/batch', methods=['POST'])
+def batch_events():
+    """
+    Apply many TP hits and closures in one request.
+    
+    Authentication: Required via SIGNAL_ENGINE_WEBHOOK_SECRET header
+    
+    Expected payload:
+    {
+        "tp_hits": [{"signal_id": "abc", "hit_price": 51500.0, "tp_number": 1}],
+        "closures": [{"signal_id": "def", "exit_price": 49800.0, "close_reason": "SL"}],
+        "async": false  // true: queue for background processing, return 202
+    }
+    
+    Returns:
+    {
+        "status": "success",
+        "applied": 2,
+        "duplicates": 0,
+        "results": {"tp_hits": [...], "closures": [...]}
+    }
+    """
+    try:
+        if not _is_authorized():
+            logger.warning(f"Unauthorized batch webhook attempt from {request.remote_addr}")
+            return jsonify({
+                'status': 'error',
+                'message': 'Unauthorized: Invalid or missing X-Webhook-Secret header'
+            }), 401
+        
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid JSON payload'
+            }), 400
+        
+        tp_hits = data.get('tp_hits') or []
+        closures = data.get('closures') or []
+        
+        if not isinstance(tp_hits, list) or not isinstance(closures, list):
+            return jsonify({
+                'status': 'error',
+                'message': 'tp_hits and closures must be lists'
+            }), 400
+        
+        if len(tp_hits) + len(closures) > MAX_BATCH_EVENTS:
+            return jsonify({
+                'status': 'error',
+                'message': f'Batch too large (max {MAX_BATCH_EVENTS} events)'
+            }), 413
+        
+        if data.get('async'):
+            _ensure_batch_worker()
+            _batch_queue.put((tp_hits, closures))
+            return jsonify({
+                'status': 'accepted',
+                'queued': len(tp_hits) + len(closures),
+                'queue_depth': _batch_queue.qsize()
+            }), 202
+        
+        summary = _process_batch(tp_hits, closures)
+        
+        return jsonify({
+            'status': 'success',
+            **summary
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error processing batch: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Internal server error: {str(e)}'
+        }), 500
+
+
 @app.route('/api/signals/stats', methods=['GET'])
 def get_stats():
     """
@@ -316,6 +521,54 @@ def get_stats():
         }), 500
 
 
+@app.route('/api/signals/rollups', methods=['GET'])
+def get_rollups():
+    """
+    Get performance rollups for dashboards (reads aggregates, not signals).
+    
+    Query parameters:
+        dimension: all | bot | symbol (default: bot)
+        from: First day YYYY-MM-DD (optional)
+        to: Last day YYYY-MM-DD (optional)
+    
+    Returns:
+    {
+        "status": "success",
+        "dimension": "bot",
+        "rows": [{"key": "TREND", "closed_count": 12, "win_rate": 66.7, ...}],
+        "fusion": {"total_candidates": 340, "approved": 21, ...}
+    }
+    """
+    try:
+        dimension = request.args.get('dimension', 'bot')
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        
+        rollups = get_tracker().rollups
+        
+        try:
+            rows = rollups.get_breakdown(dimension, date_from, date_to)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        return jsonify({
+            'status': 'success',
+            'dimension': dimension,
+            'rows': rows,
+            'fusion': rollups.get_fusion_counters(date_from, date_to)
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting rollups: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Internal server error: {str(e)}'
+        }), 500
+
+
 if __name__ == '__main__':
     logger.info("Starting Signal Engine Webhook Server on 0.0.0.0:8050")
-    app.run(host='0.0.0.0', port=8050, debug=False)
+    app.run(host='0.0.0.0', port=8050, debug=False, threaded=True)
@@ -8,11 +8,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from engine.base_strategy import BaseStrategy
 from core.models import SignalCandidate
-from common.indicators import Indicators
-from typing import Optional
+from bots.ai_ml.features import FeatureBuilder, FEATURE_INDEX
+from bots.ai_ml.model_runner import get_model_runner
+from typing import Optional, List
 import logging
 import numpy as np
-import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +34,9 @@ class AIBot(BaseStrategy):
     - Probability of upward movement
     - Probability of downward movement
     - Confidence score
+    
+    Inference is batched: one feature matrix per cycle for all symbols,
+    scored by the model (or the vectorized rule fallback) in one call.
     """
     
     def __init__(self, config: dict):
@@ -42,207 +45,135 @@ class AIBot(BaseStrategy):
         self.model = None
         self.min_confidence = config.get('confidence_threshold', 72)
         self.prediction_threshold = config.get('prediction_threshold', 0.65)
+        self.feature_builder = FeatureBuilder()
         self._load_model()
         
     def _load_model(self):
-        """Load pre-trained ML model"""
+        """Load pre-trained ML model (cached per path, reloaded when the file changes)"""
         try:
-            # Placeholder - in production, load actual trained model
-            # import joblib
-            # self.model = joblib.load(self.model_path)
-            logger.info("AI Model loaded (placeholder - train real model for production)")
-            self.model = None  # Will use rule-based fallback
+            self.model = get_model_runner(self.model_path)
+            if self.model is None:
+                logger.info(f"No AI model at {self.model_path}, using rule-based fallback")
         except Exception as e:
             logger.warning(f"Could not load AI model: {e}. Using rule-based fallback.")
             self.model = None
     
     async def analyze(self, symbol: str) -> Optional[SignalCandidate]:
         """Analyze symbol using AI/ML predictions"""
-        try:
-            # Fetch market data
-            df = self.fetch_market_data(symbol, '5m', limit=200)
-            if df is None:
-                return None
-            
-            # Check cooldown
-            if not self.should_generate_signal(symbol, cooldown_minutes=20):
-                return None
-            
-            # Extract features
-            features = self._extract_features(df)
-            if features is None:
-                return None
-            
-            # Make prediction
-            if self.model is not None:
-                prediction = self._predict_with_model(features)
-            else:
-                # Fallback to advanced rule-based system
-                prediction = self._rule_based_prediction(features, df)
-            
-            if prediction is None:
-                return None
-            
-            direction = prediction['direction']
-            confidence = prediction['confidence']
-            
-            if confidence < self.min_confidence:
-                return None
-            
-            current_price = df['close'].iloc[-1]
-            candidate = self.create_signal_candidate(
-                symbol=symbol,
-                side=direction,
-                entry_price=current_price,
-                confidence=confidence,
-                tp_pct=1.5,  # AI/ML bot moderate targets
-                sl_pct=0.8
-            )
-            
-            if self.validate_signal(candidate):
-                self.record_signal(symbol)
-                self.log_signal(candidate)
-                return candidate
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"AI bot error analyzing {symbol}: {e}")
-            return None
+        candidates = await self.analyze_batch([symbol])
+        return candidates[0] if candidates else None
     
-    def _extract_features(self, df) -> Optional[dict]:
-        """Extract ML features from market data"""
-        try:
-            # Technical indicators
-            rsi = self.indicators.rsi(df, 14)
-            macd_line, signal_line, histogram = self.indicators.macd(df)
-            ma7 = self.indicators.moving_average(df, 7, 'EMA')
-            ma25 = self.indicators.moving_average(df, 25, 'EMA')
-            ma50 = self.indicators.moving_average(df, 50, 'EMA')
-            atr = self.indicators.atr(df, 14)
-            bb_upper, bb_mid, bb_lower = self.indicators.bollinger_bands(df)
-            
-            current_price = df['close'].iloc[-1]
-            
-            # Feature engineering
-            features = {
-                'rsi': rsi.iloc[-1],
-                'macd': macd_line.iloc[-1],
-                'macd_signal': signal_line.iloc[-1],
-                'macd_histogram': histogram.iloc[-1],
-                'ma7_distance': (current_price - ma7.iloc[-1]) / ma7.iloc[-1] * 100,
-                'ma25_distance': (current_price - ma25.iloc[-1]) / ma25.iloc[-1] * 100,
-                'ma50_distance': (current_price - ma50.iloc[-1]) / ma50.iloc[-1] * 100,
-                'ma_spread_7_25': (ma7.iloc[-1] - ma25.iloc[-1]) / ma25.iloc[-1] * 100,
-                'volume_ratio': df['volume'].iloc[-1] / df['volume'].tail(20).mean(),
-                'atr_normalized': atr.iloc[-1] / current_price * 100,
-                'bb_position': (current_price - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1]),
-                'price_momentum': df['close'].pct_change(5).iloc[-1] * 100,
-                'volatility': df['close'].pct_change().tail(20).std() * 100,
-                'candle_body_ratio': abs(df['close'].iloc[-1] - df['open'].iloc[-1]) / (df['high'].iloc[-1] - df['low'].iloc[-1]) if (df['high'].iloc[-1] - df['low'].iloc[-1]) > 0 else 0,
-                'is_hammer': 1 if self.indicators.detect_hammer(df) else 0,
-                'is_shooting_star': 1 if self.indicators.detect_shooting_star(df) else 0
-            }
-            
-            return features
+    async def analyze_batch(self, symbols: List[str]) -> List[SignalCandidate]:
+        """
+        Analyze all symbols with one feature matrix and one model call
+        
+        Args:
+            symbols: Symbols to analyze this cycle
             
-        except Exception as e:
-            logger.error(f"Error extracting features: {e}")
-            return None
-    
-    def _predict_with_model(self, features: dict) -> Optional[dict]:
-        """Use trained ML model for prediction"""
+        Returns:
+            List of validated SignalCandidate objects
+        """
         try:
-            # Convert features to array
-            feature_array = np.array([list(features.values())])
-            
-            # Make prediction
-            prediction = self.model.predict_proba(feature_array)[0]
-            
-            # prediction[0] = probability of down, prediction[1] = probability of up
-            prob_down = prediction[0]
-            prob_up = prediction[1]
-            
-            if prob_up > self.prediction_threshold:
-                return {
-                    'direction': 'LONG',
-                    'confidence': prob_up * 100,
-                    'prob_up': prob_up,
-                    'prob_down': prob_down
-                }
-            elif prob_down > self.prediction_threshold:
-                return {
-                    'direction': 'SHORT',
-                    'confidence': prob_down * 100,
-                    'prob_up': prob_up,
-                    'prob_down': prob_down
-                }
-            
-            return None
+            # Skip symbols in cooldown before fetching any data
+            active = [s for s in symbols if self.should_generate_signal(s, cooldown_minutes=20)]
+            if not active:
+                return []
+            
+            frames = {}
+            for symbol in active:
+                df = self.fetch_market_data(symbol, '5m', limit=200)
+                if df is not None:
+                    frames[symbol] = df
+            
+            # Build (symbols x features) matrix
+            kept, matrix, last_close = self.feature_builder.build(frames)
+            if not kept:
+                return []
+            
+            # Pick up retrained models without a restart
+            self._load_model()
+            
+            # Score all symbols at once
+            if self.model is not None:
+                directions, confidences = self._predict_matrix(matrix)
+            else:
+                directions, confidences = self._rule_based_matrix(matrix)
+            
+            candidates = []
+            for i in np.flatnonzero(directions != 0):
+                if confidences[i] < self.min_confidence:
+                    continue
+                
+                symbol = kept[i]
+                candidate = self.create_signal_candidate(
+                    symbol=symbol,
+                    side='LONG' if directions[i] > 0 else 'SHORT',
+                    entry_price=float(last_close[i]),
+                    confidence=float(confidences[i]),
+                    tp_pct=1.5,  # AI/ML bot moderate targets
+                    sl_pct=0.8
+                )
+                
+                if self.validate_signal(candidate):
+                    self.record_signal(symbol)
+                    self.log_signal(candidate)
+                    candidates.append(candidate)
+            
+            logger.debug(f"AI batch: {len(kept)} symbols scored, {len(candidates)} candidates")
+            return candidates
             
         except Exception as e:
-            logger.error(f"Model prediction error: {e}")
-            return None
+            logger.error(f"AI bot batch analysis error: {e}")
+            return []
     
-    def _rule_based_prediction(self, features: dict, df) -> Optional[dict]:
-        """Advanced rule-based prediction as fallback"""
-        score = 0
-        
-        # RSI signals
-        if features['rsi'] < 30:
-            score += 3  # Oversold
-        elif features['rsi'] > 70:
-            score -= 3  # Overbought
-        
-        # MACD signals
-        if features['macd'] > features['macd_signal'] and features['macd_histogram'] > 0:
-            score += 2
-        elif features['macd'] < features['macd_signal'] and features['macd_histogram'] < 0:
-            score -= 2
-        
-        # MA alignment
-        if features['ma7_distance'] > 0 and features['ma25_distance'] > 0:
-            score += 2  # Price above MAs (bullish)
-        elif features['ma7_distance'] < 0 and features['ma25_distance'] < 0:
-            score -= 2  # Price below MAs (bearish)
-        
-        # MA spread (momentum)
-        if features['ma_spread_7_25'] > 1:
-            score += 1
-        elif features['ma_spread_7_25'] < -1:
-            score -= 1
+    def _predict_matrix(self, matrix: np.ndarray):
+        """
+        Score a feature matrix with the ML model
         
-        # Bollinger Band position
-        if features['bb_position'] < 0.2:
-            score += 2  # Near lower band (oversold)
-        elif features['bb_position'] > 0.8:
-            score -= 2  # Near upper band (overbought)
+        Returns:
+            (directions: +1 LONG / -1 SHORT / 0 none, confidences 0-100)
+        """
+        proba = self.model.predict_proba(matrix)
+        prob_down = proba[:, 0]
+        prob_up = proba[:, 1]
         
-        # Volume confirmation
-        if features['volume_ratio'] > 1.5:
-            score += 1 if score > 0 else -1  # Amplify existing signal
-        
-        # Candle patterns
-        if features['is_hammer'] == 1:
-            score += 2
-        if features['is_shooting_star'] == 1:
-            score -= 2
-        
-        # Momentum
-        if features['price_momentum'] > 2:
-            score += 1
-        elif features['price_momentum'] < -2:
-            score -= 1
+        directions = np.where(
+            prob_up > self.prediction_threshold, 1,
+            np.where(prob_down > self.prediction_threshold, -1, 0)
+        )
+        confidences = np.where(directions > 0, prob_up, prob_down) * 100
+        return directions, confidences
+    
+    def _rule_based_matrix(self, matrix: np.ndarray):
+        """
+        Vectorized rule-based scoring (fallback without a model)
         
-        # Calculate confidence based on score magnitude
-        confidence = min(abs(score) * 10 + 50, 95)
+        Returns:
+            (directions: +1 LONG / -1 SHORT / 0 none, confidences 0-100)
+        """
+        col = {name: matrix[:, i] for name, i in FEATURE_INDEX.items()}
         
-        if score >= 5:
-            return {'direction': 'LONG', 'confidence': confidence, 'score': score}
-        elif score <= -5:
-            return {'direction': 'SHORT', 'confidence': confidence, 'score': score}
+        score = np.zeros(matrix.shape[0])
+        # RSI oversold / overbought
+        score += 3 * (col['rsi'] < 30) - 3 * (col['rsi'] > 70)
+        # MACD above / below its signal line
+        score += 2 * ((col['macd'] > col['macd_signal']) & (col['macd_histogram'] > 0))
+        score -= 2 * ((col['macd'] < col['macd_signal']) & (col['macd_histogram'] < 0))
+        # Price above / below the MAs, and MA spread momentum
+        score += 2 * ((col['ma7_distance'] > 0) & (col['ma25_distance'] > 0))
+        score -= 2 * ((col['ma7_distance'] < 0) & (col['ma25_distance'] < 0))
+        score += 1 * (col['ma_spread_7_25'] > 1) - 1 * (col['ma_spread_7_25'] < -1)
+        # Near the lower / upper Bollinger band
+        score += 2 * (col['bb_position'] < 0.2) - 2 * (col['bb_position'] > 0.8)
+        # Volume surge amplifies the signal so far
+        score += np.where(col['volume_ratio'] > 1.5, np.where(score > 0, 1, -1), 0)
+        # Candle patterns and price momentum
+        score += 2 * (col['is_hammer'] == 1) - 2 * (col['is_shooting_star'] == 1)
+        score += 1 * (col['price_momentum'] > 2) - 1 * (col['price_momentum'] < -2)
         
-        return None
+        confidences = np.minimum(np.abs(score) * 10 + 50, 95)
+        directions = np.where(score >= 5, 1, np.where(score <= -5, -1, 0))
+        return directions, confidences
     
     def _create_signal(self, symbol, direction, entry_price, confidence, prediction) -> Signal:
         """Create AI-based signal"""
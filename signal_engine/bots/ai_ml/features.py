@@ -0,0 +1,250 @@
+"""
+Vectorized AI/ML Feature Builder
+Computes the AI bot feature set for many symbols (and full history) at once
+with numpy. Used for live batched inference and for offline training, so
+both sides always see identical features.
+"""
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column order of the feature matrix (model input order)
+FEATURE_NAMES = [
+    'rsi',
+    'macd',
+    'macd_signal',
+    'macd_histogram',
+    'ma7_distance',
+    'ma25_distance',
+    'ma50_distance',
+    'ma_spread_7_25',
+    'volume_ratio',
+    'atr_normalized',
+    'bb_position',
+    'price_momentum',
+    'volatility',
+    'candle_body_ratio',
+    'is_hammer',
+    'is_shooting_star',
+]
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# Minimum candles for stable indicators (EMA50 + warmup)
+MIN_CANDLES = 50
+
+
+def _ewm(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """
+    Exponential moving average along the last axis (pandas adjust=False)
+    Loops over time only; all series are updated together per step.
+    """
+    out = np.empty_like(x, dtype=np.float64)
+    acc = x[..., 0].astype(np.float64)
+    out[..., 0] = acc
+    for t in range(1, x.shape[-1]):
+        col = x[..., t]
+        # Leading NaNs are skipped; the first valid value seeds the average
+        acc = np.where(np.isnan(col), acc, np.where(np.isnan(acc), col, acc + alpha * (col - acc)))
+        out[..., t] = acc
+    # Mask until min_periods valid observations have been seen
+    observations = np.cumsum(~np.isnan(x), axis=-1)
+    out[observations < min_periods] = np.nan
+    return out
+
+
+def wilder_average(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Wilder smoothing seeded with the simple mean of the first window
+    (matches ta.volatility.AverageTrueRange; earlier values are 0)
+    """
+    out = np.zeros(x.shape, dtype=np.float64)
+    if x.shape[-1] < window:
+        return out
+    acc = x[..., :window].mean(axis=-1)
+    out[..., window - 1] = acc
+    for t in range(window, x.shape[-1]):
+        acc = (acc * (window - 1) + x[..., t]) / window
+        out[..., t] = acc
+    return out
+
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """EMA with span (matches ta.trend.EMAIndicator)"""
+    return _ewm(x, 2.0 / (span + 1), span)
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean along the last axis via cumulative sums"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < window:
+        return out
+    csum = np.cumsum(np.nan_to_num(x), axis=-1)
+    csum = np.concatenate([np.zeros(x.shape[:-1] + (1,)), csum], axis=-1)
+    out[..., window - 1:] = (csum[..., window:] - csum[..., :-window]) / window
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Rolling standard deviation along the last axis via cumulative sums"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < window:
+        return out
+    # Variance is shift invariant; centring keeps cumulative sums small
+    x = x - np.nan_to_num(x[..., :1])
+    mean = rolling_mean(x, window)
+    mean_sq = rolling_mean(np.square(x), window)
+    var = (mean_sq - np.square(mean)) * window / (window - ddof)
+    out = np.sqrt(np.clip(var, 0.0, None))
+    # Windows touching NaN inputs (e.g. first pct_change) are undefined
+    nan_count = rolling_mean(np.isnan(x).astype(np.float64), window)
+    out[~(nan_count == 0)] = np.nan
+    return out
+
+
+def shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Shift along the last axis, filling with NaN"""
+    out = np.full(x.shape, np.nan)
+    out[..., periods:] = x[..., :-periods]
+    return out
+
+
+def compute_feature_history(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray
+) -> np.ndarray:
+    """
+    Compute all AI features for every candle
+
+    Args:
+        open_, high, low, close, volume: arrays shaped (..., T)
+
+    Returns:
+        Array shaped (..., T, len(FEATURE_NAMES)); early candles are NaN
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prev_close = shift(close)
+
+        # RSI (Wilder smoothing, as ta.momentum.RSIIndicator)
+        diff = close - prev_close
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+        avg_up = _ewm(up, 1.0 / 14, 14)
+        avg_down = _ewm(down, 1.0 / 14, 14)
+        rsi = np.where(avg_down == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_up / avg_down))
+
+        # MACD 12/26/9
+        macd_line = ema(close, 12) - ema(close, 26)
+        macd_signal = ema(macd_line, 9)
+        macd_hist = macd_line - macd_signal
+
+        # EMA distances
+        ma7 = ema(close, 7)
+        ma25 = ema(close, 25)
+        ma50 = ema(close, 50)
+
+        # ATR 14 (Wilder)
+        true_range = np.maximum.reduce([
+            high - low,
+            np.abs(high - prev_close),
+            np.abs(low - prev_close)
+        ])
+        true_range[..., 0] = (high - low)[..., 0]
+        atr = wilder_average(true_range, 14)
+
+        # Bollinger position (20, 2.0 with population std like ta)
+        bb_mid = rolling_mean(close, 20)
+        bb_std = rolling_std(close, 20, ddof=0)
+        bb_lower = bb_mid - 2.0 * bb_std
+        bb_upper = bb_mid + 2.0 * bb_std
+
+        returns = close / prev_close - 1.0
+        candle_range = high - low
+        body = np.abs(close - open_)
+        upper_wick = high - np.maximum(open_, close)
+        lower_wick = np.minimum(open_, close) - low
+
+        columns = [
+            rsi,
+            macd_line,
+            macd_signal,
+            macd_hist,
+            (close - ma7) / ma7 * 100,
+            (close - ma25) / ma25 * 100,
+            (close - ma50) / ma50 * 100,
+            (ma7 - ma25) / ma25 * 100,
+            volume / rolling_mean(volume, 20),
+            atr / close * 100,
+            (close - bb_lower) / (bb_upper - bb_lower),
+            (close / shift(close, 5) - 1.0) * 100,
+            rolling_std(returns, 20) * 100,
+            np.where(candle_range > 0, body / candle_range, 0.0),
+            ((body > 0) & (lower_wick > body * 2) & (upper_wick < body * 0.5)).astype(np.float64),
+            ((body > 0) & (upper_wick > body * 2) & (lower_wick < body * 0.5)).astype(np.float64),
+        ]
+
+    return np.stack(columns, axis=-1)
+
+
+class FeatureBuilder:
+    """Builds one (symbols x features) matrix per cycle from OHLCV frames"""
+
+    def __init__(self, min_candles: int = MIN_CANDLES):
+        self.min_candles = min_candles
+
+    def build(self, frames: Dict[str, 'pd.DataFrame']) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Stack OHLCV frames and compute the latest feature row per symbol
+
+        Args:
+            frames: symbol -> DataFrame with open/high/low/close/volume
+
+        Returns:
+            (symbols, feature matrix (S, F), last close prices (S,))
+            Symbols with too little data or non-finite features are dropped.
+        """
+        usable = {s: df for s, df in frames.items() if df is not None and len(df) >= self.min_candles}
+        if not usable:
+            return [], np.empty((0, len(FEATURE_NAMES))), np.empty(0)
+
+        # Stack series of equal length together (normally one group per cycle)
+        by_length: Dict[int, List[str]] = {}
+        for symbol, df in usable.items():
+            by_length.setdefault(len(df), []).append(symbol)
+
+        symbols: List[str] = []
+        rows = []
+        closes = []
+        for group in by_length.values():
+            ohlcv = np.stack([
+                usable[s][['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+                for s in group
+            ])  # (S, T, 5)
+            history = compute_feature_history(
+                ohlcv[..., 0], ohlcv[..., 1], ohlcv[..., 2], ohlcv[..., 3], ohlcv[..., 4]
+            )
+            symbols.extend(group)
+            rows.append(history[:, -1, :])
+            closes.append(ohlcv[:, -1, 3])
+
+        matrix = np.concatenate(rows)
+        last_close = np.concatenate(closes)
+
+        finite = np.isfinite(matrix).all(axis=1)
+        if not finite.all():
+            dropped = [s for s, ok in zip(symbols, finite) if not ok]
+            logger.debug(f"Dropping symbols with incomplete features: {dropped}")
+
+        kept = [s for s, ok in zip(symbols, finite) if ok]
+        return kept, matrix[finite], last_close[finite]
+
+    def build_one(self, df) -> Optional[Dict[str, float]]:
+        """Feature dictionary for a single symbol (FEATURE_NAMES keys)"""
+        symbols, matrix, _ = self.build({'_': df})
+        if not symbols:
+            return None
+        return {name: float(value) for name, value in zip(FEATURE_NAMES, matrix[0])}
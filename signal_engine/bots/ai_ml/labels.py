@@ -0,0 +1,107 @@
+"""
+Vectorized Label Generation for AI/ML Training
+Forward returns and TP/SL first-touch outcomes for every candle at once.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Outcome codes for first-touch labels
+TP_FIRST = 1
+SL_FIRST = -1
+NO_TOUCH = 0
+
+
+def forward_return(close: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Percent return from each close to the close `horizon` candles later
+
+    Returns:
+        Array shaped like close; the last `horizon` values are NaN
+    """
+    out = np.full(close.shape, np.nan)
+    out[..., :-horizon] = (close[..., horizon:] / close[..., :-horizon] - 1.0) * 100
+    return out
+
+
+def _first_index(hits: np.ndarray) -> np.ndarray:
+    """Index of the first True along the last axis (window length if none)"""
+    return np.where(hits.any(axis=-1), hits.argmax(axis=-1), hits.shape[-1])
+
+
+def first_touch(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    tp_pct: float,
+    sl_pct: float,
+    horizon: int,
+    side: str = 'LONG'
+) -> np.ndarray:
+    """
+    Which of TP or SL is touched first after entering at each close
+
+    Looks at the next `horizon` candles. When TP and SL are both touched
+    inside the same candle the outcome is counted as SL (conservative).
+
+    Args:
+        high, low, close: 1-D arrays of one symbol
+        tp_pct, sl_pct: Target and stop distance in percent
+        horizon: Max candles to hold
+        side: 'LONG' or 'SHORT'
+
+    Returns:
+        int8 array of TP_FIRST / SL_FIRST / NO_TOUCH; the last `horizon`
+        candles (incomplete window) are NO_TOUCH
+    """
+    n = close.shape[-1]
+    out = np.zeros(n, dtype=np.int8)
+    if n <= horizon:
+        return out
+
+    entries = close[:n - horizon, None]
+    # Windows of the candles after each entry: (n - horizon, horizon)
+    future_high = sliding_window_view(high[1:], horizon)[:n - horizon]
+    future_low = sliding_window_view(low[1:], horizon)[:n - horizon]
+
+    if side == 'LONG':
+        tp_hits = future_high >= entries * (1 + tp_pct / 100)
+        sl_hits = future_low <= entries * (1 - sl_pct / 100)
+    else:
+        tp_hits = future_low <= entries * (1 - tp_pct / 100)
+        sl_hits = future_high >= entries * (1 + sl_pct / 100)
+
+    tp_at = _first_index(tp_hits)
+    sl_at = _first_index(sl_hits)
+
+    out[:n - horizon] = np.where(
+        tp_at < sl_at, TP_FIRST,
+        np.where(sl_at < horizon, SL_FIRST, NO_TOUCH)
+    )
+    return out
+
+
+def direction_labels(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    tp_pct: float,
+    sl_pct: float,
+    horizon: int
+) -> np.ndarray:
+    """
+    Binary training target matching the model output [P(down), P(up)]
+
+    Returns:
+        float array: 1.0 where a LONG would hit TP first, 0.0 where a SHORT
+        would hit TP first, NaN where neither (or both) is a clean win
+    """
+    long_outcome = first_touch(high, low, close, tp_pct, sl_pct, horizon, 'LONG')
+    short_outcome = first_touch(high, low, close, tp_pct, sl_pct, horizon, 'SHORT')
+
+    long_win = long_outcome == TP_FIRST
+    short_win = short_outcome == TP_FIRST
+
+    labels = np.full(close.shape, np.nan)
+    labels[long_win & ~short_win] = 1.0
+    labels[short_win & ~long_win] = 0.0
+    return labels
@@ -0,0 +1,114 @@
+"""
+AI/ML Model Runner
+Loads a joblib (scikit-learn) or ONNX model once and scores a whole
+(symbols x features) matrix in a single call.
+"""
+import os
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from bots.ai_ml.features import FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+# Loaded models shared across bot instances: path -> (mtime, runner)
+_model_cache: Dict[str, Tuple[float, 'ModelRunner']] = {}
+_model_cache_lock = threading.Lock()
+
+
+class ModelRunner:
+    """
+    Wraps a binary classifier that outputs [P(down), P(up)] per row
+
+    Supported artifacts:
+    - *.joblib / *.pkl: estimator with predict_proba, or a bundle dict
+      {'model': estimator, 'feature_names': [...], ...} written by the
+      training pipeline
+    - *.onnx: ONNX model run with onnxruntime on CPU (optional dependency)
+    """
+
+    def __init__(self, model, feature_names: Optional[List[str]] = None, backend: str = 'sklearn',
+                 metadata: Optional[Dict] = None):
+        self.model = model
+        self.backend = backend
+        self.metadata = metadata or {}
+        self.feature_names = list(feature_names or FEATURE_NAMES)
+        self._column_order = self._resolve_columns(self.feature_names)
+        self._onnx_input = model.get_inputs()[0].name if backend == 'onnx' else None
+
+    @staticmethod
+    def _resolve_columns(feature_names: List[str]) -> Optional[np.ndarray]:
+        """Column permutation from FEATURE_NAMES order to the model's order"""
+        if feature_names == FEATURE_NAMES:
+            return None
+        missing = [name for name in feature_names if name not in FEATURE_NAMES]
+        if missing:
+            raise ValueError(f"Model expects unknown features: {missing}")
+        return np.array([FEATURE_NAMES.index(name) for name in feature_names])
+
+    @classmethod
+    def load(cls, model_path: str) -> 'ModelRunner':
+        """Load a model artifact from disk"""
+        if model_path.endswith('.onnx'):
+            import onnxruntime as ort
+
+            session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+            return cls(session, backend='onnx')
+
+        import joblib
+
+        artifact = joblib.load(model_path)
+        if isinstance(artifact, dict) and 'model' in artifact:
+            metadata = {k: v for k, v in artifact.items() if k != 'model'}
+            return cls(artifact['model'], artifact.get('feature_names'), metadata=metadata)
+        return cls(artifact)
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Score all rows in one call
+
+        Args:
+            matrix: (S, F) features in FEATURE_NAMES order
+
+        Returns:
+            (S, 2) array of [P(down), P(up)]
+        """
+        if matrix.shape[0] == 0:
+            return np.empty((0, 2))
+
+        if self._column_order is not None:
+            matrix = matrix[:, self._column_order]
+
+        if self.backend == 'onnx':
+            outputs = self.model.run(None, {self._onnx_input: matrix.astype(np.float32)})
+            probabilities = outputs[-1]
+            if isinstance(probabilities, list):
+                # skl2onnx ZipMap output: list of {class: probability}
+                probabilities = np.array([[row[k] for k in sorted(row)] for row in probabilities])
+            return np.asarray(probabilities, dtype=np.float64)
+
+        return np.asarray(self.model.predict_proba(matrix), dtype=np.float64)
+
+
+def get_model_runner(model_path: Optional[str]) -> Optional[ModelRunner]:
+    """
+    Get a cached runner for model_path (reloaded only when the file changes)
+
+    Returns:
+        ModelRunner, or None if no model file is available
+    """
+    if not model_path or not os.path.exists(model_path):
+        return None
+
+    mtime = os.path.getmtime(model_path)
+    with _model_cache_lock:
+        cached = _model_cache.get(model_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        runner = ModelRunner.load(model_path)
+        _model_cache[model_path] = (mtime, runner)
+        logger.info(f"🧠 AI model loaded: {model_path} ({runner.backend}, {len(runner.feature_names)} features)")
+        return runner
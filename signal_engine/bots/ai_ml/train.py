@@ -0,0 +1,278 @@
+"""
+AI/ML Model Training Pipeline
+Builds the offline feature store from exchange history, generates labels
+and trains the signal predictor used by AIBot.
+
+Usage (from the signal_engine directory):
+    python -m bots.ai_ml.train --days 365
+    python -m bots.ai_ml.train --skip-download --folds 5 --jobs 4
+
+Features come from bots.ai_ml.features (same code as live inference) and
+the target is TP/SL first touch with the AI bot's own targets (TP 1.5%,
+SL 0.8%), so training and serving agree.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bots.ai_ml.features import FEATURE_NAMES, compute_feature_history
+from bots.ai_ml.labels import forward_return, direction_labels
+from bots.ai_ml.feature_store import FeatureStore
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# AIBot.analyze_batch targets
+DEFAULT_TP_PCT = 1.5
+DEFAULT_SL_PCT = 0.8
+
+
+def build_symbol_columns(df, tp_pct: float, sl_pct: float, horizon: int) -> Dict[str, np.ndarray]:
+    """
+    Compute stored columns for one symbol's full history
+
+    Returns:
+        column name -> array (timestamp, OHLCV, features, fwd_return, label)
+    """
+    ohlcv = {name: df[name].to_numpy(dtype=np.float64) for name in OHLCV_COLUMNS}
+    history = compute_feature_history(
+        ohlcv['open'], ohlcv['high'], ohlcv['low'], ohlcv['close'], ohlcv['volume']
+    )
+
+    columns = {'timestamp': df.index.asi8 // 1_000_000}  # epoch ms
+    columns.update(ohlcv)
+    for i, name in enumerate(FEATURE_NAMES):
+        columns[name] = history[:, i].astype(np.float32)
+    columns['fwd_return'] = forward_return(ohlcv['close'], horizon).astype(np.float32)
+    columns['label'] = direction_labels(
+        ohlcv['high'], ohlcv['low'], ohlcv['close'], tp_pct, sl_pct, horizon
+    ).astype(np.float32)
+    return columns
+
+
+def build_store(store: FeatureStore, symbols: List[str], timeframe: str, days: int,
+                tp_pct: float, sl_pct: float, horizon: int):
+    """Download history for every symbol and write it to the feature store"""
+    from data_feed.live_data import get_market_feed
+
+    feed = get_market_feed()
+    since_ms = int((datetime.utcnow() - timedelta(days=days)).timestamp() * 1000)
+
+    for symbol in symbols:
+        started = time.time()
+        df = feed.get_ohlcv_history(symbol, timeframe, since_ms)
+        if df is None or len(df) <= horizon:
+            logger.warning(f"⚠️ Not enough history for {symbol}, skipping")
+            continue
+
+        columns = build_symbol_columns(df, tp_pct, sl_pct, horizon)
+        store.write(symbol, columns, meta={
+            'timeframe': timeframe,
+            'tp_pct': tp_pct,
+            'sl_pct': sl_pct,
+            'horizon': horizon
+        })
+        logger.info(f"💾 {symbol}: {len(df)} candles stored ({time.time() - started:.1f}s)")
+
+
+def load_dataset(store: FeatureStore, symbols: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Labelled rows from the store, ordered by time
+
+    Returns:
+        (X (N, F) float32, y (N,) int8, timestamps (N,) int64)
+    """
+    X_parts, y_parts, ts_parts = [], [], []
+    for symbol in symbols:
+        columns = store.load(symbol, FEATURE_NAMES + ['label', 'timestamp'])
+        X = np.column_stack([columns[name] for name in FEATURE_NAMES])
+        y = np.asarray(columns['label'])
+        valid = np.isfinite(X).all(axis=1) & ~np.isnan(y)
+        X_parts.append(X[valid])
+        y_parts.append(y[valid].astype(np.int8))
+        ts_parts.append(np.asarray(columns['timestamp'])[valid])
+
+    if not X_parts:
+        return np.empty((0, len(FEATURE_NAMES)), dtype=np.float32), np.empty(0, np.int8), np.empty(0, np.int64)
+
+    X = np.concatenate(X_parts)
+    y = np.concatenate(y_parts)
+    timestamps = np.concatenate(ts_parts)
+
+    order = np.argsort(timestamps, kind='stable')
+    return X[order], y[order], timestamps[order]
+
+
+def time_splits(timestamps: np.ndarray, n_folds: int, embargo_ms: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Expanding-window walk-forward splits over sorted timestamps
+
+    Each fold trains on everything before its test period (minus an embargo
+    of one label horizon, so training labels never look into the test period)
+    and tests on the next slice of time.
+    """
+    cuts = np.quantile(timestamps, np.linspace(0, 1, n_folds + 2)[1:])
+    splits = []
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        train_end = np.searchsorted(timestamps, start - embargo_ms, side='left')
+        test_start = np.searchsorted(timestamps, start, side='left')
+        test_end = np.searchsorted(timestamps, end, side='right')
+        if train_end == 0 or test_end <= test_start:
+            continue
+        splits.append((np.arange(0, train_end), np.arange(test_start, test_end)))
+    return splits
+
+
+def make_model():
+    """Gradient boosted trees (fast on CPU, no scaling needed)"""
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    return HistGradientBoostingClassifier(
+        max_iter=300,
+        learning_rate=0.05,
+        max_leaf_nodes=31,
+        min_samples_leaf=200,
+        l2_regularization=1.0,
+        random_state=42
+    )
+
+
+def evaluate(y_true: np.ndarray, prob_up: np.ndarray, threshold: float) -> Dict:
+    """Classification metrics plus precision/coverage at the live threshold"""
+    from sklearn.metrics import roc_auc_score, accuracy_score
+
+    long_calls = prob_up > threshold
+    short_calls = (1 - prob_up) > threshold
+    metrics = {
+        'rows': int(len(y_true)),
+        'auc': float(roc_auc_score(y_true, prob_up)) if len(np.unique(y_true)) > 1 else None,
+        'accuracy': float(accuracy_score(y_true, prob_up > 0.5)),
+        'coverage': float((long_calls | short_calls).mean()),
+        'long_precision': float(y_true[long_calls].mean()) if long_calls.any() else None,
+        'short_precision': float(1 - y_true[short_calls].mean()) if short_calls.any() else None
+    }
+    return metrics
+
+
+def train_fold(fold: int, X: np.ndarray, y: np.ndarray, train_idx: np.ndarray, test_idx: np.ndarray,
+               threshold: float) -> Dict:
+    """Train and evaluate one walk-forward fold (runs in a worker process)"""
+    started = time.time()
+    model = make_model()
+    model.fit(X[train_idx], y[train_idx])
+    prob_up = model.predict_proba(X[test_idx])[:, 1]
+
+    metrics = evaluate(y[test_idx], prob_up, threshold)
+    metrics.update({
+        'fold': fold,
+        'train_rows': int(len(train_idx)),
+        'seconds': round(time.time() - started, 1)
+    })
+    return metrics
+
+
+def train(store: FeatureStore, symbols: List[str], model_path: str, n_folds: int, n_jobs: int,
+          threshold: float, embargo_ms: int) -> Optional[Dict]:
+    """
+    Walk-forward evaluation in parallel, then fit the final model on all rows
+
+    Returns:
+        Training report, or None if there is no labelled data
+    """
+    import joblib
+
+    X, y, timestamps = load_dataset(store, symbols)
+    if len(X) == 0:
+        logger.error("❌ No labelled rows in feature store")
+        return None
+
+    logger.info(f"📚 Dataset: {len(X)} rows, {len(symbols)} symbols, {y.mean() * 100:.1f}% up labels")
+
+    splits = time_splits(timestamps, n_folds, embargo_ms)
+    folds = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(train_fold)(i, X, y, train_idx, test_idx, threshold)
+        for i, (train_idx, test_idx) in enumerate(splits)
+    )
+    for metrics in folds:
+        logger.info(
+            f"📈 Fold {metrics['fold']}: AUC {metrics['auc']}, accuracy {metrics['accuracy']:.3f}, "
+            f"coverage {metrics['coverage']:.3f} (train {metrics['train_rows']}, test {metrics['rows']}, "
+            f"{metrics['seconds']}s)"
+        )
+
+    model = make_model()
+    model.fit(X, y)
+
+    report = {
+        'trained_at': datetime.utcnow().isoformat(),
+        'rows': int(len(X)),
+        'symbols': symbols,
+        'data_from': datetime.utcfromtimestamp(timestamps[0] / 1000).isoformat(),
+        'data_to': datetime.utcfromtimestamp(timestamps[-1] / 1000).isoformat(),
+        'threshold': threshold,
+        'folds': folds
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(model_path)), exist_ok=True)
+    tmp_path = model_path + '.tmp'
+    joblib.dump({'model': model, 'feature_names': FEATURE_NAMES, **report}, tmp_path, compress=3)
+    os.replace(tmp_path, model_path)  # AIBot reloads on mtime change
+
+    logger.info(f"✅ Model saved: {model_path}")
+    return report
+
+
+def main():
+    with open('./config/engine_settings.json') as f:
+        ai_config = json.load(f)['bots']['ai_ml']
+    with open('./config/watchlist.json') as f:
+        default_symbols = json.load(f).get('priority', ['BTCUSDT', 'ETHUSDT'])
+
+    parser = argparse.ArgumentParser(description='Train the AI/ML signal predictor')
+    parser.add_argument('--symbols', nargs='+', default=default_symbols)
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--horizon', type=int, default=48, help='Max candles to reach TP/SL')
+    parser.add_argument('--tp-pct', type=float, default=DEFAULT_TP_PCT)
+    parser.add_argument('--sl-pct', type=float, default=DEFAULT_SL_PCT)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel fold workers (-1 = all cores)')
+    parser.add_argument('--store', default='./data/feature_store')
+    parser.add_argument('--model-path', default=ai_config.get('model_path', './models/signal_predictor_v1.joblib'))
+    parser.add_argument('--skip-download', action='store_true', help='Train from the existing feature store')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    started = time.time()
+    store = FeatureStore(args.store, args.timeframe)
+
+    if not args.skip_download:
+        build_store(store, args.symbols, args.timeframe, args.days, args.tp_pct, args.sl_pct, args.horizon)
+
+    symbols = [s for s in args.symbols if store.meta(s)]
+    step_ms = {'1m': 60_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000}.get(args.timeframe, 300_000)
+    report = train(
+        store, symbols, args.model_path, args.folds, args.jobs,
+        ai_config.get('prediction_threshold', 0.65), embargo_ms=args.horizon * step_ms
+    )
+
+    logger.info(f"⏱️ Training pipeline finished in {time.time() - started:.0f}s")
+    sys.exit(0 if report else 1)
+
+
+if __name__ == '__main__':
+    main()
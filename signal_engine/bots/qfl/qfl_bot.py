@@ -9,7 +9,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from engine.base_strategy import BaseStrategy
 from core.models import SignalCandidate
 from common.indicators import Indicators
-from typing import Optional
+from common.qfl_tracker import QFLBaseTracker
+from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,12 +38,44 @@ class QFLBot(BaseStrategy):
         self.max_drop = config.get('drop_threshold_max', 15.0)
         self.base_lookback = config.get('base_lookback_candles', 100)
         self.min_confidence = config.get('confidence_threshold', 80)
+        self.drop_lookback = 50
+        self.recent_candles = 30  # enough for volume surge + reversal checks
+        self.base_trackers: Dict[str, QFLBaseTracker] = {}
         
+    def _fetch_with_tracker(self, symbol: str):
+        """
+        Fetch candles and bring the symbol's base tracker up to date
+        
+        Once a tracker is warm only the last few candles are fetched; a full
+        lookback is fetched on first use or after a gap.
+        
+        Returns:
+            (DataFrame, QFLBaseTracker) or (None, None)
+        """
+        tracker = self.base_trackers.get(symbol)
+        if tracker is not None and tracker.is_warm:
+            df = self.fetch_market_data(symbol, self.timeframe, limit=self.recent_candles)
+            if df is None:
+                return None, None
+            if tracker.sync(df):
+                return df, tracker
+            logger.debug(f"QFL tracker gap for {symbol}, rebuilding")
+        
+        df = self.fetch_market_data(symbol, self.timeframe, limit=self.base_lookback + 50)
+        if df is None:
+            return None, None
+        
+        tracker = QFLBaseTracker(lookback=self.base_lookback, drop_lookback=self.drop_lookback)
+        if not tracker.sync(df):
+            return None, None
+        self.base_trackers[symbol] = tracker
+        return df, tracker
+    
     async def analyze(self, symbol: str) -> Optional[SignalCandidate]:
         """Analyze symbol for QFL opportunities (crashes)"""
         try:
-            # Fetch market data
-            df = self.fetch_market_data(symbol, self.timeframe, limit=self.base_lookback + 50)
+            # Fetch market data (incremental once the base tracker is warm)
+            df, tracker = self._fetch_with_tracker(symbol)
             if df is None:
                 return None
             
@@ -52,14 +85,11 @@ class QFLBot(BaseStrategy):
             
             current_price = df['close'].iloc[-1]
             
-            # Step 1: Detect base level
-            base_level = self.indicators.detect_qfl_base(df, self.base_lookback)
+            # Step 1 + 2: Base level and drop from recent high (tracked incrementally)
+            base_level, drop_pct = tracker.evaluate(df['high'].iloc[-1], current_price)
             if base_level is None:
                 return None
             
-            # Step 2: Calculate drop percentage from base
-            drop_pct = self.indicators.price_drop_pct(df, lookback=50)
-            
             # Step 3: Check if drop is within QFL range
             if not (self.min_drop <= abs(drop_pct) <= self.max_drop):
                 return None
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from engine.base_strategy import BaseStrategy
 from core.models import SignalCandidate
 from common.indicators import Indicators
+from services.trend_state import get_trend_service
 from typing import Optional
 import logging
 
@@ -36,31 +37,23 @@ class TrendBot(BaseStrategy):
         super().__init__("Trend Bot", config)
         self.timeframe = config.get('primary_timeframe', '1h')
         self.min_confidence = config.get('confidence_threshold', 75)
+        self.trend_service = get_trend_service(self.timeframe)
         
     async def analyze(self, symbol: str) -> Optional[SignalCandidate]:
         """Analyze symbol for trend-following opportunities"""
         try:
-            # Fetch market data
-            df = self.fetch_market_data(symbol, self.timeframe, limit=250)
-            if df is None:
+            # Shared HTF state (only refetched when an hourly candle closes)
+            state = self.trend_service.ensure(symbol)
+            if state is None:
                 return None
             
             # Check cooldown (longer for trend bot)
             if not self.should_generate_signal(symbol, cooldown_minutes=30):
                 return None
             
-            # Calculate indicators
-            ma50 = self.indicators.moving_average(df, 50, 'EMA')
-            ma100 = self.indicators.moving_average(df, 100, 'EMA')
-            ma200 = self.indicators.moving_average(df, 200, 'SMA')
-            macd_line, signal_line, histogram = self.indicators.macd(df)
-            atr = self.indicators.atr(df, period=14)
-            
-            current_price = df['close'].iloc[-1]
-            
-            # Check trend alignment
+            # Check trend alignment (EMA50/EMA100/SMA200 on the last closed candle)
             trend_direction = self._detect_trend_alignment(
-                ma50.iloc[-1], ma100.iloc[-1], ma200.iloc[-1], current_price
+                state.ema_fast, state.ema_mid, state.sma_slow, state.close
             )
             
             if trend_direction == 'NONE':
@@ -68,17 +61,25 @@ class TrendBot(BaseStrategy):
             
             # Check for MACD confirmation
             macd_signal = self._check_macd_cross(
-                macd_line.iloc[-1], signal_line.iloc[-1],
-                macd_line.iloc[-2], signal_line.iloc[-2]
+                state.macd, state.macd_signal,
+                state.prev_macd, state.prev_signal
             )
+            histogram = state.macd - state.macd_signal
             
             # Check price structure (higher highs/lows or lower highs/lows)
-            price_structure = self._analyze_price_structure(df, lookback=20)
+            price_structure = self._analyze_price_structure(state.highs, state.lows)
+            
+            if not (trend_direction == macd_signal == price_structure):
+                return None
+            
+            # Enter at the live price, not the last hourly close
+            ticker = self.get_ticker_data(symbol)
+            current_price = ticker['last'] if ticker and ticker.get('last') else state.close
             
             # Generate signal if conditions align
             if trend_direction == 'BULLISH' and macd_signal == 'BULLISH' and price_structure == 'BULLISH':
                 confidence = self._calculate_confidence(
-                    trend_direction, macd_signal, price_structure, histogram.iloc[-1]
+                    trend_direction, macd_signal, price_structure, histogram
                 )
                 
                 if confidence >= self.min_confidence:
@@ -98,7 +99,7 @@ class TrendBot(BaseStrategy):
             
             elif trend_direction == 'BEARISH' and macd_signal == 'BEARISH' and price_structure == 'BEARISH':
                 confidence = self._calculate_confidence(
-                    trend_direction, macd_signal, price_structure, histogram.iloc[-1]
+                    trend_direction, macd_signal, price_structure, histogram
                 )
                 
                 if confidence >= self.min_confidence:
@@ -159,19 +160,17 @@ class TrendBot(BaseStrategy):
         
         return 'NONE'
     
-    def _analyze_price_structure(self, df, lookback=20) -> str:
+    def _analyze_price_structure(self, highs, lows) -> str:
         """
         Analyze if price is making higher highs/lows or lower highs/lows
+        (highs/lows of the last closed candles, oldest first)
         Returns: 'BULLISH', 'BEARISH', or 'NEUTRAL'
         """
-        recent = df.tail(lookback)
-        
-        # Find swing highs and lows
-        highs = recent['high'].values
-        lows = recent['low'].values
+        highs = list(highs)
+        lows = list(lows)
         
         # Simple structure: compare first half vs second half
-        mid_point = lookback // 2
+        mid_point = len(highs) // 2
         first_half_high = max(highs[:mid_point])
         second_half_high = max(highs[mid_point:])
         first_half_low = min(lows[:mid_point])
@@ -3,12 +3,16 @@ Shared Technical Indicator Library
 Used by all strategy bots for analysis
 Based on SIGNAL RESEARCH formulas
 """
-import pandas as pd
-import numpy as np
-import ta
+from __future__ import annotations  # pd annotations must not import pandas
+
 from typing import Tuple, Optional, Dict
 import logging
 
+from common.lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+ta = lazy_import('ta')
+
 logger = logging.getLogger(__name__)
 
 
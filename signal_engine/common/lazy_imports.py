@@ -0,0 +1,31 @@
+"""
+Lazy Module Imports
+Defers importing heavy third-party packages until first attribute access,
+so modules that only need them on some code paths do not pay at startup.
+"""
+import sys
+import importlib.util
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return a module that is imported on first use
+
+    Example:
+        ccxt = lazy_import('ccxt')   # nothing loaded yet
+        ccxt.binanceusdm(...)        # real import happens here
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
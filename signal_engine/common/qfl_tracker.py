@@ -0,0 +1,183 @@
+"""
+Incremental QFL Base Tracker
+Keeps per-symbol QFL state (rolling volatility, consolidation base, recent
+high) updated in O(1) per closed candle instead of rescanning the whole
+lookback window on every scan.
+
+Semantics match Indicators.detect_qfl_base / Indicators.price_drop_pct on
+the same candles: the still-forming last candle is evaluated on top of the
+committed state without being stored.
+"""
+import math
+from collections import deque
+from typing import Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QFLBaseTracker:
+    """
+    Stateful QFL base detector for one symbol
+
+    - Volatility: std of the last `vol_window` close returns (running sums)
+    - Base candle: lowest-volatility candle in the lookback (monotonic deque,
+      first occurrence wins ties like idxmin)
+    - Base level: mean close of up to `base_window` candles ending at the base
+      candle, within the lookback (prefix sums)
+    - Recent high: max high of the last `drop_lookback` candles (monotonic deque)
+    """
+
+    def __init__(self, lookback: int = 100, vol_window: int = 10, base_window: int = 20,
+                 drop_lookback: int = 50):
+        self.lookback = lookback
+        self.vol_window = vol_window
+        self.base_window = base_window
+        self.drop_lookback = drop_lookback
+        # Candles whose volatility window fits inside the lookback
+        self.vol_span = lookback - vol_window
+        self.reset()
+
+    def reset(self):
+        """Drop all state (e.g. after a data gap)"""
+        self.count = 0  # committed candles
+        self.last_timestamp = None
+        self._prev_close = None
+        self._returns = deque()
+        self._ret_sum = 0.0
+        self._ret_sumsq = 0.0
+        self._vol_min = deque()  # (index, volatility), increasing volatility
+        self._high_max = deque()  # (index, high), decreasing high
+        self._prefix = deque([0.0], maxlen=self.lookback + 1)  # close prefix sums
+
+    @property
+    def is_warm(self) -> bool:
+        """True once a full lookback of candles has been seen"""
+        return self.count + 1 >= self.lookback
+
+    def _volatility_with(self, ret: float) -> Optional[float]:
+        """Volatility of the window ending with `ret` (state unchanged)"""
+        total = self._ret_sum + ret
+        total_sq = self._ret_sumsq + ret * ret
+        n = len(self._returns) + 1
+        if n > self.vol_window:
+            oldest = self._returns[0]
+            total -= oldest
+            total_sq -= oldest * oldest
+            n -= 1
+        if n < self.vol_window:
+            return None
+        variance = (total_sq - total * total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def push(self, timestamp, high: float, close: float):
+        """Commit one closed candle"""
+        index = self.count
+
+        if self._prev_close is not None and self._prev_close != 0:
+            ret = close / self._prev_close - 1.0
+            volatility = self._volatility_with(ret)
+
+            self._returns.append(ret)
+            self._ret_sum += ret
+            self._ret_sumsq += ret * ret
+            if len(self._returns) > self.vol_window:
+                oldest = self._returns.popleft()
+                self._ret_sum -= oldest
+                self._ret_sumsq -= oldest * oldest
+
+            if volatility is not None:
+                while self._vol_min and self._vol_min[-1][1] > volatility:
+                    self._vol_min.pop()
+                self._vol_min.append((index, volatility))
+
+        while self._high_max and self._high_max[-1][1] <= high:
+            self._high_max.pop()
+        self._high_max.append((index, high))
+
+        self._prefix.append(self._prefix[-1] + close)
+        self._prev_close = close
+        self.count += 1
+        self.last_timestamp = timestamp
+
+        # Evict entries that can no longer be in any future window; one
+        # extra stays so evaluate() can look past it for the forming candle
+        while self._vol_min and self._vol_min[0][0] < self.count - self.vol_span:
+            self._vol_min.popleft()
+        while self._high_max and self._high_max[0][0] < self.count - self.drop_lookback:
+            self._high_max.popleft()
+
+    def sync(self, df) -> bool:
+        """
+        Commit new closed candles from an OHLCV frame (last row is forming)
+
+        Returns:
+            False if the frame does not connect to the committed state
+            (gap or first call) and a full history is needed
+        """
+        closed = df.iloc[:-1]
+        if self.last_timestamp is not None:
+            if self.last_timestamp not in closed.index:
+                if len(closed) and closed.index[-1] <= self.last_timestamp:
+                    return True  # nothing new
+                return False
+            closed = closed[closed.index > self.last_timestamp]
+        elif len(df) < self.lookback:
+            return False
+
+        for timestamp, high, close in zip(closed.index, closed['high'].to_numpy(), closed['close'].to_numpy()):
+            self.push(timestamp, float(high), float(close))
+        return True
+
+    def _prefix_at(self, k: int, tentative_close: float) -> float:
+        """Sum of closes before global index k (k may be the forming candle + 1)"""
+        if k > self.count:
+            return self._prefix[-1] + tentative_close
+        return self._prefix[len(self._prefix) - 1 - (self.count - k)]
+
+    def evaluate(self, high: float, close: float) -> Tuple[Optional[float], float]:
+        """
+        Base level and drop % including the forming candle
+
+        Args:
+            high: Forming candle high
+            close: Forming candle close (current price)
+
+        Returns:
+            (base_level or None, drop_pct from recent high, negative when below)
+        """
+        index = self.count  # forming candle
+
+        # Recent high over [index - drop_lookback + 1, index]
+        recent_high = high
+        for i, value in self._high_max:
+            if i > index - self.drop_lookback:
+                recent_high = max(recent_high, value)
+                break
+        drop_pct = (close - recent_high) / recent_high * 100 if recent_high else 0.0
+
+        if not self.is_warm:
+            return None, drop_pct
+
+        # Lowest volatility over [index - vol_span + 1, index]; committed
+        # candles win ties (first occurrence)
+        base_index = None
+        base_vol = None
+        for i, value in self._vol_min:
+            if i > index - self.vol_span:
+                base_index, base_vol = i, value
+                break
+
+        if self._prev_close:
+            forming_vol = self._volatility_with(close / self._prev_close - 1.0)
+            if forming_vol is not None and (base_vol is None or forming_vol < base_vol):
+                base_index = index
+
+        if base_index is None:
+            return None, drop_pct
+
+        # Base candles are taken from inside the lookback window only
+        start = max(base_index + 1 - self.base_window, index + 1 - self.lookback, 0)
+        total = self._prefix_at(base_index + 1, close) - self._prefix_at(start, close)
+        base_level = total / (base_index + 1 - start)
+        return base_level, drop_pct
@@ -0,0 +1,41 @@
+"""
+Startup Timing Report
+Records how long each startup stage takes, from process start to the first
+completed scan, and logs one summary line.
+"""
+import time
+from typing import List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Collects startup stage durations"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._last_mark = self.started_at
+        self.stages: List[Tuple[str, float]] = []
+        self.reported = False
+
+    def mark(self, stage: str):
+        """Record the time since the previous mark under `stage`"""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last_mark))
+        self._last_mark = now
+
+    def report(self, stage: str = 'first scan'):
+        """Record the final stage and log the summary (only once)"""
+        if self.reported:
+            return
+        self.mark(stage)
+        self.reported = True
+
+        total = self._last_mark - self.started_at
+        breakdown = ' | '.join(f"{name} {seconds:.2f}s" for name, seconds in self.stages)
+        logger.info(f"⏱️ Startup: {breakdown} (total {total:.2f}s)")
+
+
+# Global timer, created when this module is first imported (main.py imports it first)
+startup_timer = StartupTimer()
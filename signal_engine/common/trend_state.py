@@ -0,0 +1,169 @@
+"""
+Incremental Higher-Timeframe Trend State
+Keeps EMA50/EMA100/SMA200, MACD(12, 26, 9) and recent highs/lows of one
+symbol updated in O(1) per closed candle, so the trend alignment is known
+without recomputing indicators over 250 candles on every scan.
+
+EMAs follow the `ta` definitions (pandas ewm, adjust=False, seeded with the
+first close, undefined until `period` values were seen). Only closed candles
+are committed; the forming candle is ignored.
+"""
+from collections import deque
+from typing import Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _EMA:
+    """Exponential moving average with ta/pandas (adjust=False) semantics"""
+
+    __slots__ = ('period', 'alpha', 'value', 'count')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+        self.count = 0
+
+    def push(self, x: float):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        self.count += 1
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+
+class TrendState:
+    """Moving-average alignment, MACD and price structure of one symbol"""
+
+    def __init__(self, fast: int = 50, mid: int = 100, slow: int = 200, macd_fast: int = 12,
+                 macd_slow: int = 26, macd_signal: int = 9, structure_lookback: int = 20,
+                 full_strength_pct: float = 3.0):
+        self.fast = fast
+        self.mid = mid
+        self.slow = slow
+        self.macd_periods = (macd_fast, macd_slow, macd_signal)
+        self.structure_lookback = structure_lookback
+        self.full_strength_pct = full_strength_pct
+        self.reset()
+
+    def reset(self):
+        """Drop all state (e.g. after a data gap)"""
+        self.count = 0
+        self.last_timestamp = None
+        self.close: Optional[float] = None
+        self._ema_fast = _EMA(self.fast)
+        self._ema_mid = _EMA(self.mid)
+        self._sma_window = deque(maxlen=self.slow)
+        self._sma_sum = 0.0
+
+        macd_fast, macd_slow, macd_signal = self.macd_periods
+        self._macd_fast = _EMA(macd_fast)
+        self._macd_slow = _EMA(macd_slow)
+        self._macd_signal = _EMA(macd_signal)
+        self.macd: Optional[float] = None
+        self.macd_signal: Optional[float] = None
+        self.prev_macd: Optional[float] = None
+        self.prev_signal: Optional[float] = None
+
+        self.highs = deque(maxlen=self.structure_lookback)
+        self.lows = deque(maxlen=self.structure_lookback)
+
+    @property
+    def is_warm(self) -> bool:
+        """True once every indicator (SMA200 included) is defined"""
+        return self.count >= self.slow and self.prev_signal is not None
+
+    @property
+    def ema_fast(self) -> Optional[float]:
+        return self._ema_fast.value if self._ema_fast.ready else None
+
+    @property
+    def ema_mid(self) -> Optional[float]:
+        return self._ema_mid.value if self._ema_mid.ready else None
+
+    @property
+    def sma_slow(self) -> Optional[float]:
+        if len(self._sma_window) < self.slow:
+            return None
+        return self._sma_sum / self.slow
+
+    def push(self, timestamp, high: float, low: float, close: float):
+        """Commit one closed candle"""
+        self._ema_fast.push(close)
+        self._ema_mid.push(close)
+
+        if len(self._sma_window) == self.slow:
+            self._sma_sum -= self._sma_window[0]
+        self._sma_window.append(close)
+        self._sma_sum += close
+
+        self._macd_fast.push(close)
+        self._macd_slow.push(close)
+        if self._macd_slow.ready:
+            self.prev_macd = self.macd
+            self.prev_signal = self.macd_signal
+            self.macd = self._macd_fast.value - self._macd_slow.value
+            self._macd_signal.push(self.macd)
+            self.macd_signal = self._macd_signal.value if self._macd_signal.ready else None
+
+        self.highs.append(high)
+        self.lows.append(low)
+        self.close = close
+        self.count += 1
+        self.last_timestamp = timestamp
+
+    def sync(self, df) -> bool:
+        """
+        Commit new closed candles from an OHLCV frame (last row is forming)
+
+        Returns:
+            False if the frame does not connect to the committed state
+            (gap or first call) and a full history is needed
+        """
+        closed = df.iloc[:-1]
+        if self.last_timestamp is not None:
+            if self.last_timestamp not in closed.index:
+                if len(closed) and closed.index[-1] <= self.last_timestamp:
+                    return True  # nothing new
+                return False
+            closed = closed[closed.index > self.last_timestamp]
+        elif len(closed) < self.slow:
+            return False
+
+        for timestamp, high, low, close in zip(closed.index, closed['high'].to_numpy(),
+                                               closed['low'].to_numpy(), closed['close'].to_numpy()):
+            self.push(timestamp, float(high), float(low), float(close))
+        return True
+
+    def alignment(self) -> str:
+        """
+        Moving-average alignment on the last closed candle
+        Returns: 'BULLISH', 'BEARISH', or 'NONE'
+        """
+        if not self.is_warm:
+            return 'NONE'
+
+        fast, mid, slow = self.ema_fast, self.ema_mid, self.sma_slow
+        if fast > mid > slow and self.close > fast:
+            return 'BULLISH'
+        if fast < mid < slow and self.close < fast:
+            return 'BEARISH'
+        return 'NONE'
+
+    def bias(self) -> Tuple[str, float]:
+        """
+        Trend bias for the fusion engine
+
+        Returns:
+            ("LONG" | "SHORT" | "NEUTRAL", strength 0-1 from the EMA50/SMA200 spread)
+        """
+        alignment = self.alignment()
+        if alignment == 'NONE':
+            return "NEUTRAL", 0.0
+
+        spread_pct = abs(self.ema_fast - self.sma_slow) / self.sma_slow * 100
+        strength = min(spread_pct / self.full_strength_pct, 1.0)
+        return ("LONG" if alignment == 'BULLISH' else "SHORT"), strength
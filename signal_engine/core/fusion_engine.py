@@ -2,13 +2,32 @@
 Master Fusion Engine - Balanced Mode (Option A)
 Intelligent signal filtering and consolidation
 """
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Deque, List, Dict, Optional
 from .models import SignalCandidate
+from .state_snapshot import to_epoch, from_epoch
 import logging
 
 logger = logging.getLogger(__name__)
 
+RATE_WINDOW = timedelta(hours=1)
+
+
+class SymbolState:
+    """Per-symbol fusion state (compact, one record per tracked symbol)"""
+    __slots__ = ('last_signal', 'last_signal_time', 'last_close_reason', 'trend_bias', 'trend_strength',
+                 'recent', 'touched_at')
+    
+    def __init__(self):
+        self.last_signal: Optional[SignalCandidate] = None
+        self.last_signal_time: Optional[datetime] = None
+        self.last_close_reason: Optional[str] = None
+        self.trend_bias = "NEUTRAL"  # "LONG", "SHORT", "NEUTRAL"
+        self.trend_strength = 0.0  # 0-1
+        self.recent: Deque[datetime] = deque()  # approvals in the last hour, oldest first
+        self.touched_at: Optional[datetime] = None
+
 
 class FusionEngineBalanced:
     """
@@ -28,15 +47,13 @@ class FusionEngineBalanced:
     def __init__(self, config: dict):
         self.config = config
         
-        # Tracking dictionaries
-        self.last_signal_by_symbol: Dict[str, SignalCandidate] = {}
-        self.last_close_reason_by_symbol: Dict[str, str] = {}
-        self.last_signal_time_by_symbol: Dict[str, datetime] = {}
-        self.trend_bias_by_symbol: Dict[str, str] = {}  # "LONG", "SHORT", "NEUTRAL"
+        # Per-symbol state, least recently changed first (for idle eviction)
+        self.symbols: "OrderedDict[str, SymbolState]" = OrderedDict()
+        self.idle_ttl = timedelta(hours=config.get('idle_symbol_ttl_hours', 24))
+        self.max_evictions_per_cycle = config.get('max_evictions_per_cycle', 32)
         
-        # Hourly rate limiting
-        self.signals_this_hour: List[datetime] = []
-        self.signals_per_symbol_this_hour: Dict[str, List[datetime]] = {}
+        # Hourly rate limiting (sliding window, oldest first)
+        self.signals_this_hour: Deque[datetime] = deque()
         
         # Statistics
         self.stats = {
@@ -56,16 +73,21 @@ class FusionEngineBalanced:
         logger.info(f"   Reversal Min Confidence: {config['reversal_min_confidence']}%")
         logger.info(f"   Max Signals/Hour: {config['max_signals_per_hour_global']}")
     
-    def update_trend_bias(self, symbol: str, direction: str):
+    def update_trend_bias(self, symbol: str, direction: str, strength: float = 1.0):
         """
-        Update trend bias for a symbol (called when Trend Bot signals)
+        Update trend bias for a symbol (Trend Bot signals and the trend state service)
         
         Args:
             symbol: Trading symbol
-            direction: "LONG" or "SHORT"
+            direction: "LONG", "SHORT" or "NEUTRAL"
+            strength: Bias strength 0-1 (a Trend Bot signal counts as 1.0)
         """
-        self.trend_bias_by_symbol[symbol] = direction
-        logger.info(f"📊 Trend bias updated: {symbol} → {direction}")
+        state = self._touch(symbol, datetime.utcnow())
+        changed = state.trend_bias != direction
+        state.trend_bias = direction
+        state.trend_strength = strength
+        if changed:
+            logger.info(f"📊 Trend bias updated: {symbol} → {direction} ({strength:.2f})")
     
     def process_candidates(self, candidates: List[SignalCandidate]) -> List[SignalCandidate]:
         """
@@ -81,8 +103,9 @@ class FusionEngineBalanced:
         approved: List[SignalCandidate] = []
         now = datetime.utcnow()
         
-        # Clean old hourly tracking data
+        # Slide the global window and drop idle symbols (bounded work)
         self._clean_hourly_tracking(now)
+        self._evict_idle_symbols(now)
         
         # Group candidates by symbol
         by_symbol: Dict[str, List[SignalCandidate]] = {}
@@ -137,18 +160,38 @@ class FusionEngineBalanced:
         logger.info(f"📊 Fusion result: {len(approved)}/{len(candidates)} approved")
         return approved
     
+    def _touch(self, symbol: str, now: datetime) -> SymbolState:
+        """Get (or create) a symbol's state and mark it as recently changed"""
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = SymbolState()
+        else:
+            self.symbols.move_to_end(symbol)
+        state.touched_at = now
+        return state
+    
+    def _evict_idle_symbols(self, now: datetime):
+        """Drop symbols untouched for idle_ttl (oldest first, bounded per call)"""
+        cutoff = now - self.idle_ttl
+        for _ in range(self.max_evictions_per_cycle):
+            if not self.symbols:
+                return
+            symbol, state = next(iter(self.symbols.items()))
+            if state.touched_at is not None and state.touched_at > cutoff:
+                return
+            del self.symbols[symbol]
+            logger.debug(f"   Evicted idle fusion state for {symbol}")
+    
+    @staticmethod
+    def _slide_window(window: Deque[datetime], now: datetime):
+        """Pop entries older than the rate window (amortized O(1))"""
+        one_hour_ago = now - RATE_WINDOW
+        while window and window[0] <= one_hour_ago:
+            window.popleft()
+    
     def _clean_hourly_tracking(self, now: datetime):
-        """Remove tracking data older than 1 hour"""
-        one_hour_ago = now - timedelta(hours=1)
-        
-        # Clean global tracking
-        self.signals_this_hour = [t for t in self.signals_this_hour if t > one_hour_ago]
-        
-        # Clean per-symbol tracking
-        for symbol in list(self.signals_per_symbol_this_hour.keys()):
-            self.signals_per_symbol_this_hour[symbol] = [
-                t for t in self.signals_per_symbol_this_hour[symbol] if t > one_hour_ago
-            ]
+        """Remove global tracking data older than 1 hour (per-symbol windows slide on access)"""
+        self._slide_window(self.signals_this_hour, now)
     
     def _is_global_rate_limited(self, now: datetime) -> bool:
         """Check if global hourly limit is reached"""
@@ -156,8 +199,11 @@ class FusionEngineBalanced:
     
     def _is_symbol_rate_limited(self, symbol: str, now: datetime) -> bool:
         """Check if symbol-specific hourly limit is reached"""
-        symbol_signals = self.signals_per_symbol_this_hour.get(symbol, [])
-        return len(symbol_signals) >= self.config['max_signals_per_hour_per_symbol']
+        state = self.symbols.get(symbol)
+        if state is None:
+            return False
+        self._slide_window(state.recent, now)
+        return len(state.recent) >= self.config['max_signals_per_hour_per_symbol']
     
     def _apply_cooldown_filter(
         self, 
@@ -171,11 +217,12 @@ class FusionEngineBalanced:
         - If same direction: require cooldown OR very strong confidence
         - If opposite direction: require longer cooldown OR reversal confidence
         """
-        last_time = self.last_signal_time_by_symbol.get(symbol)
+        state = self.symbols.get(symbol)
+        last_time = state.last_signal_time if state else None
         if not last_time:
             return candidates  # No cooldown needed
         
-        last_signal = self.last_signal_by_symbol.get(symbol)
+        last_signal = state.last_signal
         time_since_last = now - last_time
         
         filtered = []
@@ -211,12 +258,14 @@ class FusionEngineBalanced:
         """
         Apply trend bias filter
         
-        - NEUTRAL bias: Allow all
+        - NEUTRAL or weak bias: Allow all
         - With bias: Allow same direction, or opposite if reversal confidence met
         """
-        bias = self.trend_bias_by_symbol.get(symbol, "NEUTRAL")
+        state = self.symbols.get(symbol)
+        bias = state.trend_bias if state else "NEUTRAL"
         
-        if bias == "NEUTRAL":
+        # Weak biases (MAs barely aligned) don't filter
+        if bias == "NEUTRAL" or state.trend_strength < self.config.get('trend_bias_min_strength', 0.2):
             return candidates
         
         filtered = []
@@ -264,7 +313,8 @@ class FusionEngineBalanced:
         Balanced Mode Rule (Option A):
         Block opposite signals if active signal exists for same symbol
         """
-        last = self.last_signal_by_symbol.get(symbol)
+        state = self.symbols.get(symbol)
+        last = state.last_signal if state else None
         
         if not last:
             return False  # No previous signal
@@ -277,26 +327,96 @@ class FusionEngineBalanced:
     
     def _record_approved_signal(self, symbol: str, signal: SignalCandidate, now: datetime):
         """Record approved signal for tracking"""
-        self.last_signal_by_symbol[symbol] = signal
-        self.last_signal_time_by_symbol[symbol] = now
+        state = self._touch(symbol, now)
+        state.last_signal = signal
+        state.last_signal_time = now
         
         # Update hourly tracking
         self.signals_this_hour.append(now)
-        if symbol not in self.signals_per_symbol_this_hour:
-            self.signals_per_symbol_this_hour[symbol] = []
-        self.signals_per_symbol_this_hour[symbol].append(now)
+        state.recent.append(now)
     
     def signal_closed(self, symbol: str, signal_id: str, close_reason: str):
         """
         Notify fusion engine that a signal was closed
         Allows new opposite signals to be considered
         """
-        last = self.last_signal_by_symbol.get(symbol)
+        state = self.symbols.get(symbol)
+        last = state.last_signal if state else None
         
         if last and last.signal_id == signal_id:
             logger.info(f"🔓 {symbol} signal closed ({close_reason}), opposite signals now allowed")
-            self.last_close_reason_by_symbol[symbol] = close_reason
-            # Keep last_signal_by_symbol to maintain cooldown tracking
+            state.last_close_reason = close_reason
+            # Keep last_signal to maintain cooldown tracking
+    
+    def export_state(self) -> Dict:
+        """
+        Export cooldown, trend bias and rate-limit state as plain values
+        (used for snapshots; timestamps as epoch seconds)
+        """
+        symbols = {}
+        for symbol, state in self.symbols.items():
+            c = state.last_signal
+            symbols[symbol] = {
+                'last_signal': {
+                    'signal_id': c.signal_id,
+                    'symbol': c.symbol,
+                    'side': c.side,
+                    'entry': c.entry,
+                    'stop_loss': c.stop_loss,
+                    'take_profits': list(c.take_profits),
+                    'timeframe': c.timeframe,
+                    'confidence': c.confidence,
+                    'bot_source': c.bot_source,
+                    'created_at': to_epoch(c.created_at)
+                } if c else None,
+                'last_signal_time': to_epoch(state.last_signal_time) if state.last_signal_time else None,
+                'last_close_reason': state.last_close_reason,
+                'trend_bias': state.trend_bias,
+                'trend_strength': state.trend_strength,
+                'recent': [to_epoch(t) for t in state.recent],
+                'touched_at': to_epoch(state.touched_at) if state.touched_at else None
+            }
+        
+        return {
+            'symbols': symbols,  # least recently changed first
+            'signals_this_hour': [to_epoch(t) for t in self.signals_this_hour]
+        }
+    
+    def import_state(self, state: Dict):
+        """Restore state produced by export_state (e.g. after a restart)"""
+        self.symbols = OrderedDict()
+        for symbol, data in state.get('symbols', {}).items():
+            record = SymbolState()
+            if data.get('last_signal'):
+                try:
+                    signal = data['last_signal']
+                    record.last_signal = SignalCandidate(**{**signal, 'created_at': from_epoch(signal['created_at'])})
+                except Exception as e:
+                    logger.warning(f"Skipping invalid snapshot signal for {symbol}: {e}")
+            if data.get('last_signal_time') is not None:
+                record.last_signal_time = from_epoch(data['last_signal_time'])
+            record.last_close_reason = data.get('last_close_reason')
+            record.trend_bias = data.get('trend_bias', "NEUTRAL")
+            record.trend_strength = data.get('trend_strength', 1.0)
+            record.recent = deque(from_epoch(t) for t in data.get('recent', []))
+            if data.get('touched_at') is not None:
+                record.touched_at = from_epoch(data['touched_at'])
+            self.symbols[symbol] = record
+        
+        self.signals_this_hour = deque(from_epoch(t) for t in state.get('signals_this_hour', []))
+        
+        # Drop rate-limit entries that expired while the engine was down
+        now = datetime.utcnow()
+        self._clean_hourly_tracking(now)
+        for record in self.symbols.values():
+            self._slide_window(record.recent, now)
+        
+        cooldowns = sum(1 for record in self.symbols.values() if record.last_signal_time)
+        biases = sum(1 for record in self.symbols.values() if record.trend_bias != "NEUTRAL")
+        logger.info(
+            f"♻️ Fusion state restored: {cooldowns} cooldowns, "
+            f"{biases} trend biases, {len(self.signals_this_hour)} signals in the last hour"
+        )
     
     def get_stats(self) -> Dict:
         """Get fusion engine statistics"""
@@ -306,7 +426,8 @@ class FusionEngineBalanced:
         return {
             **self.stats,
             'approval_rate': (approved / total * 100) if total > 0 else 0,
-            'active_signals': len(self.last_signal_by_symbol)
+            'active_signals': sum(1 for state in self.symbols.values() if state.last_signal),
+            'tracked_symbols': len(self.symbols)
         }
     
     def reset_stats(self):
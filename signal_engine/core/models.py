@@ -52,6 +52,22 @@ class SignalCandidate:
             'version': 'SE.v2.0'
         }
     
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SignalCandidate':
+        """Rebuild a candidate from to_dict() output (e.g. received over IPC)"""
+        return cls(
+            signal_id=data['signal_id'],
+            symbol=data['symbol'],
+            side=data['side'],
+            entry=data['entry'],
+            stop_loss=data['stop_loss'],
+            take_profits=list(data['take_profits']),
+            timeframe=data['timeframe'],
+            confidence=data['confidence'],
+            bot_source=data['bot_source'],
+            created_at=datetime.fromisoformat(data['created_at'])
+        )
+    
     def to_telegram_message(self) -> str:
         """Format signal for Telegram broadcast"""
         tp_text = ", ".join([f"${tp:.2f}" for tp in self.take_profits])
@@ -0,0 +1,100 @@
+"""
+Engine State Snapshots
+Compact binary snapshots of in-memory cooldown/rate-limit state so a
+restart resumes with the same filtering behaviour.
+
+File format: magic header + pickle of plain Python values only (dict, list,
+str, float, int, bool, None). Loading refuses any other object type.
+"""
+import os
+import io
+import time
+import pickle
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'VSESNAP1'
+SNAPSHOT_VERSION = 2
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(dt: datetime) -> float:
+    """Naive datetime -> seconds (exact round trip with from_epoch)"""
+    return (dt - _EPOCH).total_seconds()
+
+
+def from_epoch(seconds: float) -> datetime:
+    """Seconds -> naive datetime in the same clock it was taken from"""
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """Unpickler that only accepts built-in plain values"""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from snapshot")
+
+
+class StateSnapshotter:
+    """Writes and reads engine state snapshots atomically"""
+
+    def __init__(self, path: str = './data/engine_state.bin'):
+        self.path = path
+        self.last_saved_at: Optional[float] = None
+
+    def save(self, state: Dict) -> bool:
+        """Write a snapshot (tmp file + rename, never half-written)"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            payload = pickle.dumps(
+                {'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'state': state},
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+            self.last_saved_at = time.time()
+            return True
+        except Exception as e:
+            logger.error(f"Error saving engine snapshot: {e}")
+            return False
+
+    def load(self) -> Optional[Dict]:
+        """
+        Read the latest snapshot
+
+        Returns:
+            Saved state dict, or None if missing/invalid
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading engine snapshot: {e}")
+            return None
+
+        if not data.startswith(SNAPSHOT_MAGIC):
+            logger.warning(f"⚠️ Ignoring engine snapshot with unknown format: {self.path}")
+            return None
+
+        try:
+            snapshot = _PlainUnpickler(io.BytesIO(data[len(SNAPSHOT_MAGIC):])).load()
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring corrupt engine snapshot: {e}")
+            return None
+
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            logger.warning(f"⚠️ Ignoring engine snapshot version {snapshot.get('version')}")
+            return None
+
+        age = time.time() - snapshot.get('saved_at', 0)
+        logger.info(f"♻️ Engine snapshot loaded ({len(data)} bytes, {age:.0f}s old)")
+        return snapshot['state']
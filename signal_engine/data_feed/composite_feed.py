@@ -0,0 +1,325 @@
+"""
+Dual-Venue Market Data Feed
+Keeps Binance and Bybit feeds warm and routes every request to the venue
+that is currently healthier for that endpoint (rolling p90 latency and
+error rate). If the chosen venue has not answered within its usual latency,
+the request is hedged to the other venue and the first good answer wins, so
+a slow venue cannot hold the bots back.
+
+Enable with MARKET_FEED_VENUES=binance,bybit (see get_market_feed).
+"""
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from data_feed.live_data import MarketDataFeed
+from data_feed.order_book import book_key
+
+logger = logging.getLogger(__name__)
+
+# Market ids that differ between venues (Binance id -> venue id)
+SYMBOL_ALIASES = {
+    'bybit': {
+        '1000SHIBUSDT': 'SHIB1000USDT',
+    }
+}
+
+
+class EndpointHealth:
+    """Rolling latency/error window of one (venue, endpoint)"""
+
+    __slots__ = ('latencies', 'outcomes', 'consecutive_errors', 'down_until')
+
+    def __init__(self, window: int = 50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_errors = 0
+        self.down_until = 0.0
+
+    def record(self, latency: float, ok: bool, down_after: int = 3, down_seconds: float = 30):
+        self.latencies.append(latency)
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_errors = 0
+            return
+
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= down_after:
+            self.down_until = time.monotonic() + down_seconds
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    @property
+    def p90(self) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.9) if len(ordered) > 1 else 0]
+
+    def score(self) -> float:
+        """Lower is better; venues marked down sort last"""
+        if time.monotonic() < self.down_until:
+            return float('inf')
+        return self.p90 * (1 + 4 * self.error_rate)
+
+
+class CompositeMarketDataFeed(MarketDataFeed):
+    """MarketDataFeed over several venues with health-based routing and hedging"""
+
+    def __init__(self, venues: Iterable[str] = ('binance', 'bybit'), testnet=False,
+                 hedge_min: float = 0.25, hedge_max: float = 2.0, max_divergence_pct: float = 0.5,
+                 warm_symbol: str = 'BTCUSDT', warm_interval: float = 30):
+        """
+        Args:
+            venues: Exchange names in order of preference
+            testnet: Use exchange testnets
+            hedge_min/hedge_max: Bounds (seconds) on the wait before hedging to the next venue
+            max_divergence_pct: Price difference between venues that is logged as inconsistent
+            warm_symbol: Symbol probed on all venues to keep connections and latency stats fresh
+            warm_interval: Seconds between probes
+        """
+        # Each venue is a regular feed; this object holds no exchange of its own
+        self.venues: Dict[str, MarketDataFeed] = {}
+        for name in venues:
+            try:
+                self.venues[name] = MarketDataFeed(name, testnet)
+            except Exception as e:
+                logger.error(f"❌ Venue {name} unavailable: {e}")
+        if not self.venues:
+            raise RuntimeError("No market data venue could be initialized")
+
+        primary = next(iter(self.venues.values()))
+        self.exchange_name = primary.exchange_name
+        self.testnet = testnet
+        self.exchange = primary.exchange  # order book snapshots, parse_timeframe
+        self.order_books = None
+
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.max_divergence_pct = max_divergence_pct
+        self.aliases = {name: dict(SYMBOL_ALIASES.get(name, {})) for name in self.venues}
+        self.health: Dict[Tuple[str, str], EndpointHealth] = {}
+        self.last_prices: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.stats = {'requests': 0, 'hedged': 0, 'failovers': 0, 'stale': 0, 'divergences': 0}
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='feed-venue')
+
+        self.warm_symbol = warm_symbol
+        self.warm_interval = warm_interval
+        self._stop = threading.Event()
+        if len(self.venues) > 1:
+            threading.Thread(target=self._warm_loop, name='feed-warm', daemon=True).start()
+
+        logger.info(f"✅ Composite market feed: {', '.join(self.venues)}")
+
+    # ------------------------------------------------------------------
+    # Symbol mapping
+    # ------------------------------------------------------------------
+
+    def venue_symbol(self, venue: str, symbol: str) -> Optional[str]:
+        """
+        Translate a watchlist/unified symbol to the venue's symbol
+
+        Returns:
+            Venue symbol, or None when the market is not listed on that venue
+        """
+        key = book_key(symbol)
+        market_id = self.aliases[venue].get(key, key)
+
+        markets_by_id = getattr(self.venues[venue].exchange, 'markets_by_id', None)
+        if not markets_by_id:
+            # Markets not loaded; let the exchange resolve it
+            return symbol if market_id == key else market_id
+
+        markets = markets_by_id.get(market_id)
+        if not markets:
+            return None
+        if not isinstance(markets, list):
+            return markets['symbol']
+
+        # One id can name several markets (Bybit lists BTCUSDT as spot and as
+        # perpetual): the feed prices linear perpetuals
+        for market in markets:
+            if market.get('swap') and market.get('linear'):
+                return market['symbol']
+        return self.venues[venue].exchange.market(market_id)['symbol']
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def _health(self, venue: str, endpoint: str) -> EndpointHealth:
+        health = self.health.get((venue, endpoint))
+        if health is None:
+            health = self.health[(venue, endpoint)] = EndpointHealth()
+        return health
+
+    def _ranked(self, endpoint: str, symbol: str) -> List[Tuple[str, str]]:
+        """(venue, venue symbol) pairs, healthiest first"""
+        routes = []
+        for venue in self.venues:
+            venue_symbol = self.venue_symbol(venue, symbol)
+            if venue_symbol:
+                routes.append((venue, venue_symbol))
+        return sorted(routes, key=lambda route: self._health(route[0], endpoint).score())
+
+    def _hedge_delay(self, venue: str, endpoint: str) -> float:
+        """How long to wait on a venue before asking the next one"""
+        return min(max(self._health(venue, endpoint).p90, self.hedge_min), self.hedge_max)
+
+    def _call(self, route: Tuple[str, str], endpoint: str, method: str, symbol: str, args: tuple,
+              max_age: Optional[timedelta]):
+        """Call one venue, record its health and validate the answer"""
+        venue, venue_symbol = route
+        started = time.monotonic()
+        result = getattr(self.venues[venue], method)(venue_symbol, *args)
+        latency = time.monotonic() - started
+
+        ok = result is not None
+        price = None
+        if ok and endpoint == 'ohlcv':
+            ok = len(result) > 0
+            if ok and max_age is not None and datetime.utcnow() - result.index[-1].to_pydatetime() > max_age:
+                self.stats['stale'] += 1
+                logger.warning(f"⚠️ Stale candles from {venue} for {symbol} (last {result.index[-1]})")
+                ok = False
+            if ok:
+                price = float(result['close'].iloc[-1])
+        elif ok and endpoint == 'ticker':
+            result['symbol'] = symbol
+            price = result.get('last')
+        elif ok and endpoint == 'orderbook':
+            result['symbol'] = symbol
+
+        self._health(venue, endpoint).record(latency, ok)
+        if not ok:
+            return None
+
+        if price:
+            self._check_consistency(venue, symbol, price)
+        return result
+
+    def _route(self, endpoint: str, method: str, symbol: str, *args, max_age: Optional[timedelta] = None,
+               hedge: bool = True):
+        """Send a request to the healthiest venue, hedging/failing over to the next one"""
+        self.stats['requests'] += 1
+        routes = self._ranked(endpoint, symbol)
+        if not routes:
+            logger.warning(f"⚠️ {symbol} is not listed on any venue")
+            return None
+
+        primary = routes[0]
+        if len(routes) == 1:
+            return self._call(primary, endpoint, method, symbol, args, max_age)
+
+        secondary = routes[1]
+        if not hedge:
+            result = self._call(primary, endpoint, method, symbol, args, max_age)
+            if result is None:
+                self.stats['failovers'] += 1
+                result = self._call(secondary, endpoint, method, symbol, args, max_age)
+            return result
+
+        first = self._pool.submit(self._call, primary, endpoint, method, symbol, args, max_age)
+        try:
+            result = first.result(timeout=self._hedge_delay(primary[0], endpoint))
+            if result is not None:
+                return result
+            self.stats['failovers'] += 1
+            return self._call(secondary, endpoint, method, symbol, args, max_age)
+        except FutureTimeout:
+            # Primary is slower than usual: race it against the next venue
+            self.stats['hedged'] += 1
+            second = self._pool.submit(self._call, secondary, endpoint, method, symbol, args, max_age)
+            for future in as_completed([first, second]):
+                result = future.result()
+                if result is not None:
+                    return result
+            return None
+
+    def _check_consistency(self, venue: str, symbol: str, price: float):
+        """Compare a fresh price with the other venues' recent prices"""
+        key = book_key(symbol)
+        now = time.monotonic()
+        self.last_prices[(venue, key)] = (price, now)
+
+        for other in self.venues:
+            if other == venue:
+                continue
+            seen = self.last_prices.get((other, key))
+            if seen is None or now - seen[1] > 60:
+                continue
+            divergence = abs(price - seen[0]) / seen[0] * 100
+            if divergence > self.max_divergence_pct:
+                self.stats['divergences'] += 1
+                logger.warning(
+                    f"⚠️ Price mismatch {key}: {venue} {price} vs {other} {seen[0]} ({divergence:.2f}%)"
+                )
+
+    def _warm_loop(self):
+        """Probe every venue periodically so the idle one stays warm and measured"""
+        while not self._stop.wait(self.warm_interval):
+            for venue in self.venues:
+                venue_symbol = self.venue_symbol(venue, self.warm_symbol)
+                if venue_symbol:
+                    self._pool.submit(self._call, (venue, venue_symbol), 'ticker', 'get_ticker',
+                                      self.warm_symbol, (), None)
+
+    # ------------------------------------------------------------------
+    # MarketDataFeed interface
+    # ------------------------------------------------------------------
+
+    def get_ohlcv(self, symbol: str, timeframe: str = '5m', limit: int = 200):
+        """OHLCV from the healthiest venue (rejects candles older than 3 bars)"""
+        try:
+            max_age = timedelta(seconds=self.exchange.parse_timeframe(timeframe) * 3)
+        except Exception:
+            max_age = None
+        return self._route('ohlcv', 'get_ohlcv', symbol, timeframe, limit, max_age=max_age)
+
+    def get_ohlcv_history(self, symbol: str, timeframe: str, since_ms: int, until_ms: Optional[int] = None,
+                          page_limit: int = 1500):
+        """Long OHLCV ranges are paged from one venue, failing over without hedging"""
+        return self._route('history', 'get_ohlcv_history', symbol, timeframe, since_ms, until_ms, page_limit,
+                           hedge=False)
+
+    def get_ticker(self, symbol: str) -> Optional[Dict]:
+        return self._route('ticker', 'get_ticker', symbol)
+
+    def get_orderbook(self, symbol: str, limit: int = 20) -> Optional[Dict]:
+        if self.order_books is not None:
+            book = self.order_books.get_book(symbol)
+            if book is not None:
+                return book.summary()
+        return self._route('orderbook', 'get_orderbook', symbol, limit)
+
+    def get_funding_rate(self, symbol: str) -> Optional[float]:
+        return self._route('funding', 'get_funding_rate', symbol)
+
+    def get_stats(self) -> Dict:
+        """Routing counters plus p90 latency / error rate per venue and endpoint"""
+        return {
+            **self.stats,
+            'venues': {
+                f"{venue}:{endpoint}": {
+                    'p90_ms': round(health.p90 * 1000, 1),
+                    'error_rate': round(health.error_rate, 3),
+                    'down': time.monotonic() < health.down_until
+                }
+                for (venue, endpoint), health in self.health.items()
+            }
+        }
+
+    def close(self):
+        """Close all venue connections"""
+        self._stop.set()
+        self._pool.shutdown(wait=False)
+        for feed in self.venues.values():
+            feed.close()
@@ -0,0 +1,150 @@
+"""
+Market Data Journal
+Records raw exchange responses (OHLCV, ticker, order book, funding) with
+timestamps so a production session can be replayed deterministically.
+
+File format (size-rotated journal-*.bin files):
+    6-byte header: b'VSEJ1' + codec byte (b'M' msgpack, b'J' json)
+    records: 4-byte big-endian length + encoded record
+Record: {'t': wall time, 'm': method, 'a': args, 'k': kwargs, 'r': result, 'd': call seconds}
+
+msgpack is used when installed (optional dependency), JSON otherwise.
+"""
+import os
+import glob
+import json
+import time
+import struct
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+import logging
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MAGIC = b'VSEJ1'
+RECORDED_METHODS = ('fetch_ohlcv', 'fetch_ticker', 'fetch_order_book', 'fetch_funding_rate')
+
+_LENGTH = struct.Struct('>I')
+
+
+def _encoder(codec: bytes):
+    if codec == b'M':
+        return lambda record: msgpack.packb(record, use_bin_type=True, default=str)
+    return lambda record: json.dumps(record, separators=(',', ':'), default=str).encode()
+
+
+def _decoder(codec: bytes):
+    if codec == b'M':
+        if msgpack is None:
+            raise RuntimeError("Journal was written with msgpack, which is not installed")
+        return lambda payload: msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return json.loads
+
+
+class JournalWriter:
+    """Append-only journal writer with size-based rotation (thread safe)"""
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.codec = b'M' if msgpack is not None else b'J'
+        self._encode = _encoder(self.codec)
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+        name = datetime.utcnow().strftime('journal-%Y%m%d-%H%M%S-%f.bin')
+        path = os.path.join(self.directory, name)
+        self._file = open(path, 'ab')
+        self._file.write(JOURNAL_MAGIC + self.codec)
+        self._size = len(JOURNAL_MAGIC) + 1
+        logger.info(f"📼 Market journal file: {path}")
+
+    def write(self, record: Dict):
+        """Append one record"""
+        payload = self._encode(record)
+        with self._lock:
+            if self._file is None or self._size + len(payload) + _LENGTH.size > self.max_bytes:
+                self._rotate()
+            self._file.write(_LENGTH.pack(len(payload)))
+            self._file.write(payload)
+            self._file.flush()
+            self._size += len(payload) + _LENGTH.size
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def read_journal(directory: str) -> Iterator[Dict]:
+    """Yield all records of a journal directory in recording order"""
+    for path in sorted(glob.glob(os.path.join(directory, 'journal-*.bin'))):
+        with open(path, 'rb') as f:
+            header = f.read(len(JOURNAL_MAGIC) + 1)
+            if not header.startswith(JOURNAL_MAGIC):
+                logger.warning(f"⚠️ Skipping non-journal file {path}")
+                continue
+            decode = _decoder(header[-1:])
+
+            while True:
+                prefix = f.read(_LENGTH.size)
+                if len(prefix) < _LENGTH.size:
+                    break
+                (length,) = _LENGTH.unpack(prefix)
+                payload = f.read(length)
+                if len(payload) < length:
+                    logger.warning(f"⚠️ Truncated record at end of {path}")
+                    break
+                yield decode(payload)
+
+
+class RecordingExchange:
+    """Wraps a ccxt exchange and journals the responses of market data calls"""
+
+    def __init__(self, exchange, writer: JournalWriter):
+        self._exchange = exchange
+        self._writer = writer
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if name not in RECORDED_METHODS:
+            return attr
+
+        def recorded(*args, **kwargs):
+            started = time.time()
+            result = attr(*args, **kwargs)
+            try:
+                self._writer.write({
+                    't': started,
+                    'm': name,
+                    'a': list(args),
+                    'k': kwargs,
+                    'r': result,
+                    'd': time.time() - started
+                })
+            except Exception as e:
+                logger.error(f"Error writing market journal: {e}")
+            return result
+
+        return recorded
+
+
+def journal_from_env() -> Optional[JournalWriter]:
+    """JournalWriter if MARKET_JOURNAL_DIR is set (recording enabled)"""
+    directory = os.getenv('MARKET_JOURNAL_DIR')
+    if not directory:
+        return None
+    max_mb = float(os.getenv('MARKET_JOURNAL_MAX_MB', '64'))
+    return JournalWriter(directory, int(max_mb * 1024 * 1024))
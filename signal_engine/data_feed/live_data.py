@@ -2,13 +2,22 @@
 Unified Market Data System using CCXT
 Fetches real-time data from Binance Futures and Bybit
 """
-import ccxt
-import pandas as pd
+from __future__ import annotations  # pd annotations must not import pandas
+
+import os
 import asyncio
 from typing import Dict, List, Optional
 from datetime import datetime
 import logging
 
+from common.lazy_imports import lazy_import
+from data_feed.market_cache import MarketMetadataCache
+from data_feed.journal import RecordingExchange, journal_from_env
+from data_feed.shared_rate_limit import get_rate_limiter
+
+ccxt = lazy_import('ccxt')
+pd = lazy_import('pandas')
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,32 +27,52 @@ class MarketDataFeed:
     def __init__(self, exchange_name='binance', testnet=False):
         self.exchange_name = exchange_name
         self.testnet = testnet
+        self.order_books = None  # OrderBookManager, when local books are enabled
         self.exchange = self._initialize_exchange()
         
+    def _create_exchange(self):
+        """Create a CCXT exchange instance (no network calls)"""
+        if self.exchange_name == 'binance':
+            exchange = ccxt.binanceusdm({
+                'enableRateLimit': True,
+                'options': {
+                    'defaultType': 'future',
+                }
+            })
+        elif self.exchange_name == 'bybit':
+            exchange = ccxt.bybit({
+                'enableRateLimit': True,
+                'options': {
+                    'defaultType': 'linear',
+                }
+            })
+        else:
+            raise ValueError(f"Unsupported exchange: {self.exchange_name}")
+        
+        if self.testnet:
+            exchange.set_sandbox_mode(True)
+        
+        # Sharded engine: one request budget for all processes
+        limiter = get_rate_limiter(self.exchange_name)
+        if limiter is not None:
+            limiter.attach(exchange)
+        return exchange
+    
     def _initialize_exchange(self):
-        """Initialize CCXT exchange connection"""
+        """Initialize CCXT exchange connection (markets from disk cache when available)"""
         try:
-            if self.exchange_name == 'binance':
-                exchange = ccxt.binanceusdm({
-                    'enableRateLimit': True,
-                    'options': {
-                        'defaultType': 'future',
-                    }
-                })
-            elif self.exchange_name == 'bybit':
-                exchange = ccxt.bybit({
-                    'enableRateLimit': True,
-                    'options': {
-                        'defaultType': 'linear',
-                    }
-                })
-            else:
-                raise ValueError(f"Unsupported exchange: {self.exchange_name}")
+            exchange = self._create_exchange()
+            
+            cache_key = f"{self.exchange_name}{'_testnet' if self.testnet else ''}"
+            self.market_cache = MarketMetadataCache(cache_key)
+            self.market_cache.load_into(exchange, self._create_exchange)
+            
+            # Optional record mode for later replay (MARKET_JOURNAL_DIR)
+            journal = journal_from_env()
+            if journal is not None:
+                logger.info(f"📼 Recording market data to {journal.directory}")
+                exchange = RecordingExchange(exchange, journal)
             
-            if self.testnet:
-                exchange.set_sandbox_mode(True)
-                
-            exchange.load_markets()
             logger.info(f"✅ Connected to {self.exchange_name} {'testnet' if self.testnet else 'mainnet'}")
             return exchange
             
@@ -77,6 +106,51 @@ class MarketDataFeed:
             logger.error(f"❌ Error fetching OHLCV for {symbol}: {e}")
             return None
     
+    def get_ohlcv_history(self, symbol: str, timeframe: str, since_ms: int, until_ms: Optional[int] = None,
+                          page_limit: int = 1500) -> Optional[pd.DataFrame]:
+        """
+        Fetch a long OHLCV range by paging forward from since_ms
+        
+        Args:
+            symbol: Trading pair
+            timeframe: Candle timeframe
+            since_ms: Start time (epoch milliseconds)
+            until_ms: End time (epoch milliseconds), defaults to now
+            page_limit: Candles per request
+        
+        Returns:
+            DataFrame like get_ohlcv (timestamp index), or None on error
+        """
+        try:
+            until_ms = until_ms or self.exchange.milliseconds()
+            step_ms = self.exchange.parse_timeframe(timeframe) * 1000
+            rows = []
+            cursor = since_ms
+            
+            while cursor < until_ms:
+                page = self.exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+                if not page:
+                    break
+                rows.extend(page)
+                # Venues cap pages below page_limit (Bybit: 1000), so a short
+                # page doesn't mean the range is done; stop when it stops advancing
+                next_cursor = page[-1][0] + step_ms
+                if next_cursor <= cursor:
+                    break
+                cursor = next_cursor
+            
+            df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            df = df[df['timestamp'] < until_ms].drop_duplicates('timestamp')
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            df.set_index('timestamp', inplace=True)
+            
+            logger.info(f"📊 Fetched {len(df)} historical candles for {symbol} {timeframe}")
+            return df
+        
+        except Exception as e:
+            logger.error(f"❌ Error fetching OHLCV history for {symbol}: {e}")
+            return None
+    
     def get_ticker(self, symbol: str) -> Optional[Dict]:
         """
         Get current ticker data (price, volume, change%)
@@ -103,6 +177,10 @@ class MarketDataFeed:
             logger.error(f"❌ Error fetching ticker for {symbol}: {e}")
             return None
     
+    def attach_order_books(self, manager):
+        """Serve get_orderbook() from locally maintained books when synced"""
+        self.order_books = manager
+    
     def get_orderbook(self, symbol: str, limit: int = 20) -> Optional[Dict]:
         """
         Get current order book (bid/ask depth)
@@ -111,6 +189,11 @@ class MarketDataFeed:
             Dict with: bids, asks, spread
         """
         try:
+            if self.order_books is not None:
+                book = self.order_books.get_book(symbol)
+                if book is not None:
+                    return book.summary()
+            
             orderbook = self.exchange.fetch_order_book(symbol, limit=limit)
             
             best_bid = orderbook['bids'][0][0] if orderbook['bids'] else 0
@@ -182,8 +265,23 @@ class MarketDataFeed:
 _market_feed_instance = None
 
 def get_market_feed(exchange='binance', testnet=False) -> MarketDataFeed:
-    """Get or create singleton market feed instance"""
+    """
+    Get or create singleton market feed instance
+    
+    MARKET_FEED_VENUES=binance,bybit selects the dual-venue composite feed.
+    """
     global _market_feed_instance
     if _market_feed_instance is None:
-        _market_feed_instance = MarketDataFeed(exchange, testnet)
+        venues = [v.strip() for v in os.getenv('MARKET_FEED_VENUES', '').split(',') if v.strip()]
+        if len(venues) > 1:
+            from data_feed.composite_feed import CompositeMarketDataFeed
+            _market_feed_instance = CompositeMarketDataFeed(venues, testnet)
+        else:
+            _market_feed_instance = MarketDataFeed(exchange, testnet)
     return _market_feed_instance
+
+
+def set_market_feed(feed: MarketDataFeed):
+    """Install a feed as the shared instance (e.g. a replay feed before bots are created)"""
+    global _market_feed_instance
+    _market_feed_instance = feed
@@ -0,0 +1,100 @@
+"""
+On-disk Market Metadata Cache
+Stores ccxt market/currency metadata so a restart does not block on
+load_markets(). Stale metadata is used immediately and refreshed in the
+background.
+"""
+import os
+import json
+import time
+import threading
+from typing import Optional, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv('MARKET_CACHE_DIR', './data')
+DEFAULT_TTL_SECONDS = int(os.getenv('MARKET_CACHE_TTL_SECONDS', '21600'))  # 6 hours
+
+
+class MarketMetadataCache:
+    """Disk cache of exchange.markets / exchange.currencies with a TTL"""
+
+    def __init__(self, exchange_key: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.exchange_key = exchange_key
+        self.ttl_seconds = ttl_seconds
+        self.path = os.path.join(cache_dir, f'markets_{exchange_key}.json')
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def _read(self) -> Optional[Dict]:
+        """Read cached metadata, or None if missing/corrupt"""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable market cache {self.path}: {e}")
+            return None
+
+    def _write(self, markets: Dict, currencies: Optional[Dict]):
+        """Atomically write metadata to disk"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'saved_at': time.time(),
+                    'markets': markets,
+                    'currencies': currencies
+                }, f, default=str)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write market cache {self.path}: {e}")
+
+    def load_into(self, exchange, make_exchange) -> str:
+        """
+        Populate exchange markets from cache (or network on a cold start)
+
+        Args:
+            exchange: ccxt exchange instance to populate
+            make_exchange: Factory for a separate instance used by the
+                background refresh (so the live instance is never mid-load)
+
+        Returns:
+            'fresh', 'stale' (refresh started) or 'network'
+        """
+        cached = self._read()
+        if cached and cached.get('markets'):
+            exchange.set_markets(cached['markets'], cached.get('currencies'))
+            age = time.time() - cached.get('saved_at', 0)
+            if age <= self.ttl_seconds:
+                logger.info(f"⚡ Loaded {len(exchange.markets)} {self.exchange_key} markets from cache ({age / 60:.0f}m old)")
+                return 'fresh'
+
+            logger.info(f"⚡ Loaded stale {self.exchange_key} market cache ({age / 3600:.1f}h old), refreshing in background")
+            self.refresh_async(exchange, make_exchange)
+            return 'stale'
+
+        exchange.load_markets()
+        self._write(exchange.markets, exchange.currencies)
+        return 'network'
+
+    def refresh_async(self, exchange, make_exchange):
+        """Reload markets on a separate instance and swap them in"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def refresh():
+            try:
+                fresh = make_exchange()
+                fresh.load_markets()
+                exchange.set_markets(fresh.markets, fresh.currencies)
+                self._write(fresh.markets, fresh.currencies)
+                logger.info(f"✅ Refreshed {len(fresh.markets)} {self.exchange_key} markets")
+            except Exception as e:
+                logger.warning(f"⚠️ Background market refresh failed for {self.exchange_key}: {e}")
+
+        self._refresh_thread = threading.Thread(target=refresh, name=f'markets-{self.exchange_key}', daemon=True)
+        self._refresh_thread.start()
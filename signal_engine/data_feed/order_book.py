@@ -0,0 +1,403 @@
+"""
+Local Order Books
+Keeps an in-memory order book per symbol: bootstrapped from one REST
+snapshot, then maintained from the exchange's depth diff stream.
+
+Sequencing follows the Binance diff-depth rules:
+    - events that end before the snapshot (u < lastUpdateId) are dropped
+    - the first applied event must bridge the snapshot (U <= lastUpdateId + 1)
+    - every later event must continue the previous one (pu == previous u,
+      or U == previous u + 1 on streams without 'pu')
+A gap marks the book unsynced and triggers a fresh snapshot; diffs received
+meanwhile are buffered and replayed on top of it.
+"""
+import asyncio
+import json
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from common.lazy_imports import lazy_import
+
+aiohttp = lazy_import('aiohttp')
+
+logger = logging.getLogger(__name__)
+
+APPLIED = 'applied'
+STALE = 'stale'
+GAP = 'gap'
+
+
+def book_key(symbol: str) -> str:
+    """'BTC/USDT:USDT', 'BTC/USDT' and 'btcusdt' all map to 'BTCUSDT'"""
+    return symbol.split(':')[0].replace('/', '').upper()
+
+
+class BookSide:
+    """One side of a book: price -> quantity plus a sorted price list"""
+
+    __slots__ = ('levels', 'prices', 'descending', 'max_levels')
+
+    def __init__(self, descending: bool, max_levels: int = 1000):
+        self.levels: Dict[float, float] = {}
+        self.prices: List[float] = []  # ascending
+        self.descending = descending
+        self.max_levels = max_levels
+
+    def clear(self):
+        self.levels.clear()
+        self.prices.clear()
+
+    def set(self, price: float, quantity: float):
+        """Set the absolute quantity at a price (0 removes the level)"""
+        if quantity == 0:
+            if self.levels.pop(price, None) is not None:
+                del self.prices[bisect_left(self.prices, price)]
+            return
+
+        if price not in self.levels:
+            insort(self.prices, price)
+            if len(self.prices) > self.max_levels:
+                # Drop the level furthest from the touch
+                worst = self.prices.pop(0) if self.descending else self.prices.pop()
+                if worst == price:
+                    return  # new level is itself out of range
+                del self.levels[worst]
+        self.levels[price] = quantity
+
+    def best(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def top(self, n: int) -> List[List[float]]:
+        """Best n levels as [price, quantity]"""
+        prices = self.prices[-n:][::-1] if self.descending else self.prices[:n]
+        return [[price, self.levels[price]] for price in prices]
+
+    def __len__(self):
+        return len(self.prices)
+
+
+class LocalOrderBook:
+    """Order book of one symbol maintained from snapshot + depth diffs"""
+
+    def __init__(self, symbol: str, max_levels: int = 1000):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True, max_levels=max_levels)
+        self.asks = BookSide(descending=False, max_levels=max_levels)
+        self.last_update_id: Optional[int] = None
+        self.synced = False
+        self.bridged = False  # first diff after the snapshot applied
+        self.updated_at: Optional[datetime] = None
+
+    def load_snapshot(self, bids: Iterable, asks: Iterable, last_update_id: int):
+        """Replace the book with a REST snapshot"""
+        self.bids.clear()
+        self.asks.clear()
+        for price, quantity, *_ in bids:
+            self.bids.set(float(price), float(quantity))
+        for price, quantity, *_ in asks:
+            self.asks.set(float(price), float(quantity))
+
+        self.last_update_id = int(last_update_id)
+        self.synced = True
+        self.bridged = False
+        self.updated_at = datetime.now()
+
+    def invalidate(self):
+        """Mark the book as needing a new snapshot"""
+        self.synced = False
+        self.bridged = False
+
+    def apply_diff(self, event: Dict) -> str:
+        """
+        Apply one depth diff event
+
+        Args:
+            event: Diff with 'U' (first id), 'u' (final id), optional 'pu'
+                   (previous final id), 'b' and 'a' ([price, quantity] lists)
+
+        Returns:
+            APPLIED, STALE (already in the snapshot) or GAP (resync needed)
+        """
+        first, final = int(event['U']), int(event['u'])
+
+        if final < self.last_update_id:
+            return STALE
+
+        if not self.bridged:
+            if first > self.last_update_id + 1:
+                return GAP
+        elif 'pu' in event:
+            if int(event['pu']) != self.last_update_id:
+                return GAP
+        elif first != self.last_update_id + 1:
+            return GAP
+
+        for price, quantity, *_ in event.get('b', ()):
+            self.bids.set(float(price), float(quantity))
+        for price, quantity, *_ in event.get('a', ()):
+            self.asks.set(float(price), float(quantity))
+
+        self.last_update_id = final
+        self.bridged = True
+        self.updated_at = datetime.now()
+        return APPLIED
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def depth(self, levels: int = 5) -> Dict[str, List[List[float]]]:
+        """Best N levels per side"""
+        return {'bids': self.bids.top(levels), 'asks': self.asks.top(levels)}
+
+    def liquidity(self, levels: int = 5) -> Tuple[float, float]:
+        """Quote notional on the best N bid and ask levels"""
+        bid_notional = sum(price * quantity for price, quantity in self.bids.top(levels))
+        ask_notional = sum(price * quantity for price, quantity in self.asks.top(levels))
+        return bid_notional, ask_notional
+
+    def summary(self, levels: int = 5) -> Dict:
+        """Same shape as MarketDataFeed.get_orderbook()"""
+        best_bid = self.best_bid() or 0
+        best_ask = self.best_ask() or 0
+        spread = best_ask - best_bid
+
+        return {
+            'symbol': self.symbol,
+            'bids': self.bids.top(levels),
+            'asks': self.asks.top(levels),
+            'best_bid': best_bid,
+            'best_ask': best_ask,
+            'spread': spread,
+            'spread_pct': (spread / best_bid * 100) if best_bid > 0 else 0,
+            'timestamp': self.updated_at
+        }
+
+
+class LocalDepthStream:
+    """In-process depth stream (tests, replays): push diffs, the manager consumes them"""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def push(self, symbol: str, event: Optional[Dict]):
+        """Queue a diff for a symbol (None signals a stream restart)"""
+        self._queue.put_nowait((symbol, event))
+
+    def close(self):
+        self._queue.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            yield item
+
+
+class BinanceDepthStream:
+    """Binance USD-M futures diff depth over combined WebSocket streams"""
+
+    MAX_STREAMS_PER_CONNECTION = 200
+
+    def __init__(self, symbols: List[str], speed: str = '100ms',
+                 url: str = 'wss://fstream.binance.com/stream'):
+        self.symbols = [book_key(symbol) for symbol in symbols]
+        self.speed = speed
+        self.url = url
+        self.reconnect_delay = 5
+
+    async def _connection(self, symbols: List[str], queue: asyncio.Queue):
+        """One WebSocket connection, reconnecting forever"""
+        streams = '/'.join(f"{symbol.lower()}@depth@{self.speed}" for symbol in symbols)
+
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(f"{self.url}?streams={streams}", heartbeat=30) as ws:
+                        logger.info(f"📚 Depth stream connected ({len(symbols)} symbols)")
+                        # Diffs may have been missed while disconnected
+                        for symbol in symbols:
+                            await queue.put((symbol, None))
+
+                        async for message in ws:
+                            if message.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            data = json.loads(message.data).get('data', {})
+                            if data.get('e') == 'depthUpdate':
+                                await queue.put((data['s'], data))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Depth stream error: {e}")
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def events(self) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        size = self.MAX_STREAMS_PER_CONNECTION
+        connections = [
+            asyncio.create_task(self._connection(self.symbols[i:i + size], queue))
+            for i in range(0, len(self.symbols), size)
+        ]
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            for connection in connections:
+                connection.cancel()
+
+
+class OrderBookManager:
+    """Maintains local order books for a set of symbols from one depth stream"""
+
+    def __init__(self, exchange, stream, symbols: Iterable[str], snapshot_limit: int = 500,
+                 max_levels: int = 1000, snapshot_concurrency: int = 4):
+        """
+        Args:
+            exchange: CCXT exchange (or stand-in) used for REST snapshots
+            stream: Object with an async events() iterator of (symbol, diff)
+            symbols: Symbols to maintain
+            snapshot_limit: Levels requested per snapshot
+            max_levels: Levels kept per side
+            snapshot_concurrency: Snapshots fetched at the same time (REST weight)
+        """
+        self.exchange = exchange
+        self.stream = stream
+        self.snapshot_limit = snapshot_limit
+        self.books: Dict[str, LocalOrderBook] = {
+            book_key(symbol): LocalOrderBook(book_key(symbol), max_levels) for symbol in symbols
+        }
+        self._pending: Dict[str, Deque[Dict]] = {}
+        self._resyncing: Dict[str, asyncio.Task] = {}
+        self._snapshot_slots = asyncio.Semaphore(snapshot_concurrency)
+        self.stats = {'events': 0, 'stale': 0, 'gaps': 0, 'snapshots': 0, 'snapshot_errors': 0,
+                      'errors': 0}
+
+    def get_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        """Synced book for a symbol, or None"""
+        book = self.books.get(book_key(symbol))
+        return book if book is not None and book.synced else None
+
+    def best_bid_ask(self, symbol: str) -> Optional[Tuple[float, float]]:
+        book = self.get_book(symbol)
+        if book is None:
+            return None
+        return book.best_bid(), book.best_ask()
+
+    def spread(self, symbol: str) -> Optional[float]:
+        book = self.get_book(symbol)
+        return book.spread() if book else None
+
+    def depth(self, symbol: str, levels: int = 5) -> Optional[Dict]:
+        book = self.get_book(symbol)
+        return book.depth(levels) if book else None
+
+    async def run(self):
+        """Consume the depth stream until it ends"""
+        try:
+            async for symbol, event in self.stream.events():
+                self.on_event(symbol, event)
+        finally:
+            for task in self._resyncing.values():
+                task.cancel()
+
+    def on_event(self, symbol: str, event: Optional[Dict]):
+        """Apply (or buffer) one diff; None means the stream restarted"""
+        key = book_key(symbol)
+        book = self.books.get(key)
+        if book is None:
+            return
+
+        if event is None:
+            book.invalidate()
+            self._pending[key] = deque()
+            self._schedule_resync(key)
+            return
+
+        self.stats['events'] += 1
+        if not book.synced:
+            self._pending.setdefault(key, deque()).append(event)
+            self._schedule_resync(key)
+            return
+
+        try:
+            status = book.apply_diff(event)
+        except Exception as e:
+            # Malformed diff: the book may be half-updated, rebuild just this one
+            self.stats['errors'] += 1
+            logger.error(f"❌ Order book update failed on {key}: {e}, resyncing")
+            book.invalidate()
+            self._pending[key] = deque()
+            self._schedule_resync(key)
+            return
+
+        if status == STALE:
+            self.stats['stale'] += 1
+        elif status == GAP:
+            self.stats['gaps'] += 1
+            logger.warning(f"⚠️ Order book gap on {key} (at {book.last_update_id}, got {event['U']}), resyncing")
+            book.invalidate()
+            self._pending[key] = deque([event])
+            self._schedule_resync(key)
+
+    def _schedule_resync(self, key: str):
+        if key not in self._resyncing:
+            self._resyncing[key] = asyncio.create_task(self._resync(key))
+
+    async def _resync(self, key: str):
+        """Snapshot, then replay diffs buffered since the book went unsynced"""
+        book = self.books[key]
+        try:
+            while not book.synced:
+                try:
+                    async with self._snapshot_slots:
+                        snapshot = await asyncio.to_thread(self.exchange.fetch_order_book, key, self.snapshot_limit)
+                    self.stats['snapshots'] += 1
+                except Exception as e:
+                    self.stats['snapshot_errors'] += 1
+                    logger.error(f"❌ Order book snapshot failed for {key}: {e}")
+                    await asyncio.sleep(2)
+                    continue
+
+                book.load_snapshot(snapshot['bids'], snapshot['asks'], snapshot['nonce'])
+
+                pending = self._pending.pop(key, deque())
+                while pending:
+                    status = book.apply_diff(pending[0])
+                    if status != GAP:
+                        pending.popleft()
+                    else:
+                        # Snapshot is older than the buffered diffs; take another
+                        book.invalidate()
+                        self._pending[key] = pending
+                        await asyncio.sleep(0.5)
+                        break
+
+                if book.synced:
+                    logger.debug(f"📚 Order book synced: {key} @ {book.last_update_id}")
+        finally:
+            del self._resyncing[key]
+
+    def get_stats(self) -> Dict:
+        synced = sum(1 for book in self.books.values() if book.synced)
+        return {**self.stats, 'symbols': len(self.books), 'synced': synced}
@@ -0,0 +1,109 @@
+"""
+Replay Market Data Feed
+Serves recorded exchange responses from a market journal instead of the
+live exchange, either at recorded speed or as fast as possible.
+"""
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Tuple
+import logging
+
+from data_feed.live_data import MarketDataFeed
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayFinished(Exception):
+    """Raised when the journal has no more data for a request"""
+
+
+def _request_key(method: str, args) -> Tuple:
+    """Match requests by method, symbol and timeframe (limits may differ)"""
+    if method == 'fetch_ohlcv':
+        return method, args[0], args[1] if len(args) > 1 else '1m'
+    return method, args[0] if args else None
+
+
+class ReplayExchange:
+    """Stand-in for a ccxt exchange that answers from journal records"""
+
+    def __init__(self, records: Iterable[Dict], realtime: bool = False):
+        self.realtime = realtime
+        self.markets: Dict = {}
+        self.finished = False
+        self.served = 0
+        self._queues: Dict[Tuple, Deque[Dict]] = {}
+        self._first_time = None
+        self._started_at = None
+        self._clock_ms = None  # journal time of the last record served
+
+        count = 0
+        for record in records:
+            key = _request_key(record['m'], record['a'])
+            self._queues.setdefault(key, deque()).append(record)
+            if self._first_time is None:
+                self._first_time = record['t']
+            count += 1
+        self.total = count
+        logger.info(f"📼 Replay journal loaded: {count} records, {len(self._queues)} streams")
+
+    def _next(self, method: str, args) -> Dict:
+        queue = self._queues.get(_request_key(method, args))
+        if not queue:
+            # The recorded session ends when a requested stream runs out
+            self.finished = True
+            raise ReplayFinished(f"No recorded {method} for {args[:2]}")
+
+        record = queue.popleft()
+        self.served += 1
+        self._clock_ms = int(record['t'] * 1000)
+
+        if self.realtime:
+            # Sleep until this record's offset in the original session
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+            delay = (record['t'] - self._first_time) - (time.monotonic() - self._started_at)
+            if delay > 0:
+                time.sleep(delay)
+
+        return record
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        rows = self._next('fetch_ohlcv', (symbol, timeframe))['r']
+        return rows[-limit:] if limit else rows
+
+    def fetch_ticker(self, symbol, params=None):
+        return self._next('fetch_ticker', (symbol,))['r']
+
+    def fetch_order_book(self, symbol, limit=None, params=None):
+        return self._next('fetch_order_book', (symbol,))['r']
+
+    def fetch_funding_rate(self, symbol, params=None):
+        return self._next('fetch_funding_rate', (symbol,))['r']
+
+    def milliseconds(self) -> int:
+        """Journal time of the last record served (the recorded session's clock)"""
+        if self._clock_ms is not None:
+            return self._clock_ms
+        if self._first_time is not None:
+            return int(self._first_time * 1000)
+        return int(time.time() * 1000)
+
+    def close(self):
+        pass
+
+
+class ReplayMarketDataFeed(MarketDataFeed):
+    """MarketDataFeed backed by a recorded journal"""
+
+    def __init__(self, records: Iterable[Dict], realtime: bool = False):
+        self._records = records
+        self._realtime = realtime
+        super().__init__('replay')
+
+    def _initialize_exchange(self):
+        return ReplayExchange(self._records, self._realtime)
+
+    @property
+    def finished(self) -> bool:
+        return self.exchange.finished
@@ -0,0 +1,61 @@
+"""
+Shared Request Budget
+Spaces the REST requests of several processes (the sharded engine's
+coordinator and scanner workers) so that together they stay within one
+exchange's rate limit. Without it every process throttles on its own ccxt
+instance and N shards send N times the allowed request rate.
+
+The coordinator creates one SharedRateLimiter per venue before it spawns the
+workers and hands them over as process arguments; every process installs
+them before its market feed creates ccxt exchanges, which then throttle
+through the shared slot instead of their own.
+"""
+import time
+import multiprocessing
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_limiters: Dict[str, 'SharedRateLimiter'] = {}
+
+
+class SharedRateLimiter:
+    """Cross-process request spacing: rateLimit ms x cost between requests, like ccxt's throttle"""
+
+    def __init__(self, context=None):
+        """
+        Args:
+            context: multiprocessing context of the processes sharing the budget
+        """
+        context = context or multiprocessing.get_context('spawn')
+        self._next_slot = context.Value('d', 0.0, lock=False)  # epoch ms of the next free slot
+        self._lock = context.Lock()
+
+    def wait(self, interval_ms: float):
+        """Reserve the next request slot and sleep until it comes"""
+        with self._lock:
+            now = time.time() * 1000
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + interval_ms
+        if slot > now:
+            time.sleep((slot - now) / 1000)
+
+    def attach(self, exchange):
+        """Make a ccxt exchange throttle through this limiter"""
+        def throttle(cost=None):
+            self.wait(exchange.rateLimit * (1 if cost is None else cost))
+
+        exchange.throttle = throttle
+        return exchange
+
+
+def install_rate_limiters(limiters: Dict[str, SharedRateLimiter]):
+    """Use these limiters (venue -> limiter) for exchanges created from now on in this process"""
+    _limiters.update(limiters)
+    logger.info(f"🚦 Shared rate limits: {', '.join(sorted(limiters))}")
+
+
+def get_rate_limiter(exchange_name: str) -> Optional[SharedRateLimiter]:
+    """Installed limiter of a venue, or None (the exchange throttles on its own)"""
+    return _limiters.get(exchange_name)
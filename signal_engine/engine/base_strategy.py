@@ -15,6 +15,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from data_feed.live_data import get_market_feed
 from common.indicators import Indicators
 from core.models import SignalCandidate, generate_signal_id
+from core.state_snapshot import to_epoch, from_epoch
 
 logger = logging.getLogger(__name__)
 
@@ -149,6 +150,10 @@ class BaseStrategy(ABC):
         """Get current ticker information"""
         return self.market_feed.get_ticker(symbol)
     
+    def get_orderbook_data(self, symbol: str):
+        """Get best bid/ask, spread and top depth (local book when available)"""
+        return self.market_feed.get_orderbook(symbol)
+    
     def should_generate_signal(self, symbol: str, cooldown_minutes: int = 15) -> bool:
         """
         Check if enough time has passed since last signal for this symbol
@@ -164,6 +169,14 @@ class BaseStrategy(ABC):
         """Record that a signal was generated for this symbol"""
         self.last_signal_time[symbol] = datetime.now()
     
+    def export_cooldowns(self) -> Dict[str, float]:
+        """Per-symbol last signal times as epoch seconds (for snapshots)"""
+        return {symbol: to_epoch(t) for symbol, t in self.last_signal_time.items()}
+    
+    def restore_cooldowns(self, cooldowns: Dict[str, float]):
+        """Restore per-symbol last signal times from a snapshot"""
+        self.last_signal_time = {symbol: from_epoch(t) for symbol, t in cooldowns.items()}
+    
     def calculate_tp_sl(
         self,
         entry_price: float,
@@ -11,6 +11,9 @@ from dotenv import load_dotenv
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Start the startup clock before anything heavy is imported
+from common.startup_timer import startup_timer
+
 # Load environment variables
 load_dotenv()
 
@@ -98,9 +101,19 @@ def main():
     logger.info("=" * 80)
     
     try:
-        # Import and run scheduler
-        from services.scheduler import run_signal_engine
-        run_signal_engine()
+        shard_count = int(os.getenv('SIGNAL_ENGINE_SHARDS', '0'))
+        
+        if shard_count > 1:
+            # Sharded mode: this process coordinates, N workers scan
+            from services.sharded_engine import run_sharded_engine
+            logger.info(f"Sharded mode: {shard_count} scanner workers")
+            startup_timer.mark('imports')
+            run_sharded_engine(shard_count)
+        else:
+            # Import and run scheduler
+            from services.scheduler import run_signal_engine
+            startup_timer.mark('imports')
+            run_signal_engine()
         
     except KeyboardInterrupt:
         logger.info("\n⚠️ Shutdown initiated by user")
@@ -25,23 +25,26 @@ class DailyReporter:
         Generate daily report and send to VIP Telegram group
         
         Args:
-            date: Date in YYYY-MM-DD format (defaults to yesterday)
+            date: Date in YYYY-MM-DD format (UTC, defaults to yesterday)
         """
         if date is None:
             # Default to yesterday's report
-            yesterday = datetime.now() - timedelta(days=1)
+            yesterday = datetime.utcnow() - timedelta(days=1)
             date = yesterday.strftime('%Y-%m-%d')
         
         try:
             logger.info(f"📊 Generating daily report for {date}")
             
-            # Get statistics from tracker
-            stats = self.tracker.get_daily_stats(date)
+            # Get statistics from incremental rollups (O(buckets), no table scan)
+            stats = self.tracker.rollups.get_daily_stats(date)
             
             if stats.get('total_signals', 0) == 0:
                 logger.info(f"No closed signals for {date}, skipping report")
                 return
             
+            # Persisted fusion counters survive engine restarts and stats resets
+            stats['fusion'] = self.tracker.rollups.get_fusion_counters(date, date)
+            
             # Generate report message
             report = self._format_report(stats)
             
@@ -80,6 +83,7 @@ class DailyReporter:
         avg_duration = stats['avg_duration_minutes']
         tp_breakdown = stats.get('tp_breakdown', {})
         avg_tp_level = stats.get('avg_tp_level', 0.0)
+        fusion = stats.get('fusion', {})
         
         # Determine performance emoji
         if win_rate >= 70:
@@ -103,6 +107,18 @@ class DailyReporter:
 • TP5 Hits: {tp_breakdown.get('TP5', 0)} (Final - All Targets)
 • Avg TP Level: {avg_tp_level:.1f}
 
+"""
+        
+        # Format fusion filter section (hourly counters, UTC buckets)
+        fusion_text = ""
+        if fusion.get('total_candidates'):
+            rejected = sum(v for k, v in fusion.items() if k.startswith('rejected_'))
+            fusion_text = f"""
+**🔥 FUSION FILTER**
+• Candidates: {fusion.get('total_candidates', 0)}
+• Approved: {fusion.get('approved', 0)}
+• Rejected: {rejected} (Cooldown {fusion.get('rejected_cooldown', 0)}, Trend {fusion.get('rejected_trend', 0)}, Opposite {fusion.get('rejected_opposite', 0)}, Rate Limit {fusion.get('rejected_rate_limit', 0)})
+
 """
         
         # Build report message
@@ -122,7 +138,7 @@ class DailyReporter:
 • Losers: {losers} ❌
 • Avg Profit: {avg_profit:+.2f}%
 
-{tp_breakdown_text}**🏆 BEST/WORST**
+{tp_breakdown_text}{fusion_text}**🏆 BEST/WORST**
 • Best Trade: {best_trade:+.2f}%
 • Worst Trade: {worst_trade:+.2f}%
 
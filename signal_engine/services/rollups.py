@@ -0,0 +1,446 @@
+"""
+Performance Rollups - Incremental Aggregates for Reports and Dashboards
+Maintains per-day, per-bot and per-symbol signal aggregates plus hourly
+fusion engine counters, so reporting reads O(buckets) rows instead of
+scanning the signals table.
+"""
+import sqlite3
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Optional, List, Dict
+
+logger = logging.getLogger(__name__)
+
+# Rollup dimensions: every closure/TP hit updates one row per dimension
+DIMENSION_ALL = 'all'
+DIMENSION_BOT = 'bot'
+DIMENSION_SYMBOL = 'symbol'
+DIMENSIONS = (DIMENSION_ALL, DIMENSION_BOT, DIMENSION_SYMBOL)
+ALL_KEY = '*'
+
+
+def utc_day(moment: datetime) -> str:
+    """UTC day bucket (YYYY-MM-DD) of a naive local tracker timestamp"""
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%d')
+
+# Additive counter columns of rollup_daily (merged with col = col + excluded.col)
+_SUM_COLUMNS = (
+    'closed_count', 'winners', 'losers',
+    'tp_count', 'sl_count', 'cancel_count',
+    'profit_sum', 'profit_sumsq', 'duration_sum',
+    'tp1_closes', 'tp2_closes', 'tp3_closes', 'tp4_closes', 'tp5_closes',
+    'tp_level_sum', 'tp_level_count',
+    'tp1_hits', 'tp2_hits', 'tp3_hits', 'tp4_hits', 'tp5_hits'
+)
+
+
+class PerformanceRollups:
+    """
+    Incrementally maintained signal performance aggregates
+
+    Tables (same SQLite file as the Signal Tracker):
+    - rollup_daily: one row per (UTC day, dimension, key) with counts,
+      sum/sumsq of profit_pct, best/worst, duration stats and TP histograms
+    - fusion_counters_hourly: one row per (UTC hour, counter) with the
+      number of fusion candidates, approvals and rejections
+    """
+
+    def __init__(self, db_path='./data/signals.db'):
+        self.db_path = db_path
+        self._last_fusion_stats: Dict[str, int] = {}
+
+    def init_schema(self, cursor: sqlite3.Cursor):
+        """
+        Create rollup tables (called from SignalTracker._init_database)
+        Backfills closure aggregates from the signals table on first creation
+        """
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'rollup_daily'"
+        )
+        is_new = cursor.fetchone() is None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_daily (
+                day TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                closed_count INTEGER DEFAULT 0,
+                winners INTEGER DEFAULT 0,
+                losers INTEGER DEFAULT 0,
+                tp_count INTEGER DEFAULT 0,
+                sl_count INTEGER DEFAULT 0,
+                cancel_count INTEGER DEFAULT 0,
+                profit_sum REAL DEFAULT 0,
+                profit_sumsq REAL DEFAULT 0,
+                profit_best REAL,
+                profit_worst REAL,
+                duration_sum INTEGER DEFAULT 0,
+                duration_min INTEGER,
+                duration_max INTEGER,
+                tp1_closes INTEGER DEFAULT 0,
+                tp2_closes INTEGER DEFAULT 0,
+                tp3_closes INTEGER DEFAULT 0,
+                tp4_closes INTEGER DEFAULT 0,
+                tp5_closes INTEGER DEFAULT 0,
+                tp_level_sum INTEGER DEFAULT 0,
+                tp_level_count INTEGER DEFAULT 0,
+                tp1_hits INTEGER DEFAULT 0,
+                tp2_hits INTEGER DEFAULT 0,
+                tp3_hits INTEGER DEFAULT 0,
+                tp4_hits INTEGER DEFAULT 0,
+                tp5_hits INTEGER DEFAULT 0,
+                PRIMARY KEY (day, dimension, key)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fusion_counters_hourly (
+                hour TEXT NOT NULL,
+                counter TEXT NOT NULL,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (hour, counter)
+            )
+        ''')
+
+        if is_new:
+            self._backfill(cursor)
+
+    def _backfill(self, cursor: sqlite3.Cursor):
+        """
+        Build closure aggregates from already-closed signals (one-time)
+        Partial TP hit histograms start counting from rollup creation
+        """
+        key_exprs = {
+            DIMENSION_ALL: f"'{ALL_KEY}'",
+            DIMENSION_BOT: 'bot_source',
+            DIMENSION_SYMBOL: 'symbol',
+        }
+
+        for dimension, key_expr in key_exprs.items():
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO rollup_daily (
+                    day, dimension, key,
+                    closed_count, winners, losers, tp_count, sl_count, cancel_count,
+                    profit_sum, profit_sumsq, profit_best, profit_worst,
+                    duration_sum, duration_min, duration_max,
+                    tp1_closes, tp2_closes, tp3_closes, tp4_closes, tp5_closes,
+                    tp_level_sum, tp_level_count
+                )
+                SELECT
+                    DATE(closed_at, 'utc'), '{dimension}', {key_expr},
+                    COUNT(*),
+                    SUM(CASE WHEN profit_pct > 0 THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN profit_pct < 0 THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'TP' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'SL' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'CANCEL' THEN 1 ELSE 0 END),
+                    COALESCE(SUM(profit_pct), 0),
+                    COALESCE(SUM(profit_pct * profit_pct), 0),
+                    MAX(profit_pct),
+                    MIN(profit_pct),
+                    COALESCE(SUM(duration_seconds), 0),
+                    MIN(duration_seconds),
+                    MAX(duration_seconds),
+                    SUM(CASE WHEN close_reason = 'TP' AND current_tp_index = 0 THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'TP' AND current_tp_index = 1 THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'TP' AND current_tp_index = 2 THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'TP' AND current_tp_index = 3 THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'TP' AND current_tp_index >= 4 THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'TP' THEN current_tp_index + 1 ELSE 0 END),
+                    SUM(CASE WHEN close_reason = 'TP' THEN 1 ELSE 0 END)
+                FROM signals
+                WHERE status = 'CLOSED' AND closed_at IS NOT NULL
+                GROUP BY DATE(closed_at, 'utc'), {key_expr}
+            ''')
+
+        logger.info("✅ Performance rollups backfilled from signals table")
+
+    def _upsert(self, cursor: sqlite3.Cursor, day: str, bot_source: str, symbol: str, values: Dict):
+        """Merge a delta row into all three dimensions for the given day"""
+        columns = list(values.keys())
+        placeholders = ', '.join('?' for _ in columns)
+        updates = []
+        for col in columns:
+            if col in _SUM_COLUMNS:
+                updates.append(f"{col} = {col} + excluded.{col}")
+            elif col in ('profit_best', 'duration_max'):
+                updates.append(f"{col} = MAX(COALESCE({col}, excluded.{col}), excluded.{col})")
+            elif col in ('profit_worst', 'duration_min'):
+                updates.append(f"{col} = MIN(COALESCE({col}, excluded.{col}), excluded.{col})")
+
+        sql = f'''
+            INSERT INTO rollup_daily (day, dimension, key, {', '.join(columns)})
+            VALUES (?, ?, ?, {placeholders})
+            ON CONFLICT(day, dimension, key) DO UPDATE SET {', '.join(updates)}
+        '''
+
+        row_values = [values[col] for col in columns]
+        for dimension, key in (
+            (DIMENSION_ALL, ALL_KEY),
+            (DIMENSION_BOT, bot_source or ''),
+            (DIMENSION_SYMBOL, symbol)
+        ):
+            cursor.execute(sql, [day, dimension, key] + row_values)
+
+    def apply_close(
+        self,
+        cursor: sqlite3.Cursor,
+        closed_at: datetime,
+        bot_source: str,
+        symbol: str,
+        close_reason: str,
+        profit_pct: float,
+        duration_seconds: int,
+        tp_index: int
+    ):
+        """
+        Record a signal closure inside the tracker's transaction
+
+        Args:
+            cursor: Cursor of the tracker connection that closes the signal
+            closed_at: Closure time (day bucket = UTC date of closed_at)
+            bot_source: Bot that generated the signal
+            symbol: Trading symbol
+            close_reason: TP/SL/CANCEL/REVERSAL/TIMEOUT
+            profit_pct: Final profit percentage
+            duration_seconds: Signal lifetime in seconds
+            tp_index: Stored current_tp_index at closure
+        """
+        is_tp = close_reason == 'TP'
+        tp_bucket = min(max(tp_index or 0, 0), 4)
+
+        values = {
+            'closed_count': 1,
+            'winners': 1 if profit_pct > 0 else 0,
+            'losers': 1 if profit_pct < 0 else 0,
+            'tp_count': 1 if is_tp else 0,
+            'sl_count': 1 if close_reason == 'SL' else 0,
+            'cancel_count': 1 if close_reason == 'CANCEL' else 0,
+            'profit_sum': profit_pct,
+            'profit_sumsq': profit_pct * profit_pct,
+            'profit_best': profit_pct,
+            'profit_worst': profit_pct,
+            'duration_sum': duration_seconds,
+            'duration_min': duration_seconds,
+            'duration_max': duration_seconds,
+            'tp_level_sum': (tp_index or 0) + 1 if is_tp else 0,
+            'tp_level_count': 1 if is_tp else 0,
+        }
+        for i in range(5):
+            values[f'tp{i + 1}_closes'] = 1 if is_tp and tp_bucket == i else 0
+
+        self._upsert(cursor, utc_day(closed_at), bot_source, symbol, values)
+
+    def apply_tp_hit(
+        self,
+        cursor: sqlite3.Cursor,
+        hit_at: datetime,
+        bot_source: str,
+        symbol: str,
+        tp_number: int
+    ):
+        """Record a (partial or final) TP hit inside the tracker's transaction"""
+        bucket = min(max(tp_number, 1), 5)
+        values = {f'tp{i}_hits': 1 if i == bucket else 0 for i in range(1, 6)}
+        self._upsert(cursor, utc_day(hit_at), bot_source, symbol, values)
+
+    def record_fusion_stats(self, stats: Dict, now: Optional[datetime] = None):
+        """
+        Persist fusion engine counter deltas into the current UTC hour bucket
+
+        Args:
+            stats: FusionEngineBalanced.stats (cumulative counters)
+            now: Bucket time (defaults to utcnow)
+        """
+        if now is None:
+            now = datetime.utcnow()
+
+        deltas = {}
+        for counter, value in stats.items():
+            last = self._last_fusion_stats.get(counter, 0)
+            # Counters went backwards -> fusion stats were reset
+            delta = value - last if value >= last else value
+            if delta:
+                deltas[counter] = delta
+        self._last_fusion_stats = dict(stats)
+
+        if not deltas:
+            return
+
+        hour = now.strftime('%Y-%m-%dT%H:00')
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.executemany('''
+                INSERT INTO fusion_counters_hourly (hour, counter, count)
+                VALUES (?, ?, ?)
+                ON CONFLICT(hour, counter) DO UPDATE SET count = count + excluded.count
+            ''', [(hour, counter, delta) for counter, delta in deltas.items()])
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to persist fusion counters: {e}")
+
+    def get_daily_stats(self, date: Optional[str] = None) -> Dict:
+        """
+        Get performance statistics for a day from the 'all' rollup row
+        Same shape as the historical SignalTracker.get_daily_stats result
+
+        Args:
+            date: UTC date in YYYY-MM-DD format (defaults to today, UTC)
+        """
+        if date is None:
+            date = datetime.utcnow().strftime('%Y-%m-%d')
+
+        rows = self.get_breakdown(DIMENSION_ALL, date, date)
+        if not rows or rows[0]['closed_count'] == 0:
+            return {
+                'date': date,
+                'total_signals': 0,
+                'tp_count': 0,
+                'sl_count': 0,
+                'cancel_count': 0,
+                'win_rate': 0.0,
+                'avg_profit': 0.0,
+                'best_trade': 0.0,
+                'worst_trade': 0.0,
+                'avg_duration_minutes': 0,
+                'tp_breakdown': {'TP1': 0, 'TP2': 0, 'TP3': 0, 'TP4': 0, 'TP5': 0},
+                'avg_tp_level': 0.0
+            }
+
+        row = rows[0]
+        return {
+            'date': date,
+            'total_signals': row['closed_count'],
+            'tp_count': row['tp_count'],
+            'sl_count': row['sl_count'],
+            'cancel_count': row['cancel_count'],
+            'winners': row['winners'],
+            'losers': row['losers'],
+            'win_rate': row['win_rate'],
+            'avg_profit': row['avg_profit'],
+            'profit_stddev': row['profit_stddev'],
+            'best_trade': row['best_trade'],
+            'worst_trade': row['worst_trade'],
+            'avg_duration_minutes': int(row['avg_duration_seconds'] / 60),
+            'tp_breakdown': row['tp_breakdown'],
+            'tp_hits': row['tp_hits'],
+            'avg_tp_level': row['avg_tp_level']
+        }
+
+    def get_breakdown(
+        self,
+        dimension: str = DIMENSION_BOT,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Aggregate rollup rows per key over a date range
+
+        Args:
+            dimension: 'all', 'bot' or 'symbol'
+            date_from: First day (YYYY-MM-DD, inclusive, optional)
+            date_to: Last day (YYYY-MM-DD, inclusive, optional)
+
+        Returns:
+            One dictionary per key, sorted by closed signal count
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Invalid dimension: {dimension}. Must be one of {DIMENSIONS}")
+
+        sums = ', '.join(f'SUM({col})' for col in _SUM_COLUMNS)
+        query = f'''
+            SELECT key, {sums},
+                   MAX(profit_best), MIN(profit_worst),
+                   MIN(duration_min), MAX(duration_max)
+            FROM rollup_daily
+            WHERE dimension = ?
+        '''
+        params: List = [dimension]
+        if date_from:
+            query += ' AND day >= ?'
+            params.append(date_from)
+        if date_to:
+            query += ' AND day <= ?'
+            params.append(date_to)
+        query += ' GROUP BY key ORDER BY SUM(closed_count) DESC'
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to read rollups: {e}")
+            return []
+
+        return [self._format_row(row) for row in rows]
+
+    def _format_row(self, row) -> Dict:
+        """Turn an aggregated rollup row into derived statistics"""
+        key = row[0]
+        sums = dict(zip(_SUM_COLUMNS, (value or 0 for value in row[1:1 + len(_SUM_COLUMNS)])))
+        best, worst, duration_min, duration_max = row[1 + len(_SUM_COLUMNS):]
+
+        count = sums['closed_count']
+        mean = sums['profit_sum'] / count if count else 0.0
+        variance = sums['profit_sumsq'] / count - mean * mean if count else 0.0
+
+        return {
+            'key': key,
+            'closed_count': count,
+            'winners': sums['winners'],
+            'losers': sums['losers'],
+            'tp_count': sums['tp_count'],
+            'sl_count': sums['sl_count'],
+            'cancel_count': sums['cancel_count'],
+            'win_rate': (sums['winners'] / count * 100) if count else 0.0,
+            'avg_profit': mean,
+            'profit_stddev': math.sqrt(max(variance, 0.0)),
+            'total_profit': sums['profit_sum'],
+            'best_trade': best or 0.0,
+            'worst_trade': worst or 0.0,
+            'avg_duration_seconds': (sums['duration_sum'] / count) if count else 0,
+            'min_duration_seconds': duration_min or 0,
+            'max_duration_seconds': duration_max or 0,
+            'tp_breakdown': {f'TP{i}': sums[f'tp{i}_closes'] for i in range(1, 6)},
+            'tp_hits': {f'TP{i}': sums[f'tp{i}_hits'] for i in range(1, 6)},
+            'avg_tp_level': (
+                sums['tp_level_sum'] / sums['tp_level_count'] if sums['tp_level_count'] else 0.0
+            )
+        }
+
+    def get_fusion_counters(
+        self,
+        hour_from: Optional[str] = None,
+        hour_to: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Sum persisted fusion counters over an hour range
+
+        Args:
+            hour_from: First hour bucket ('YYYY-MM-DDTHH:00' or a day prefix)
+            hour_to: Last hour bucket (inclusive; a day prefix covers the whole day)
+        """
+        query = 'SELECT counter, SUM(count) FROM fusion_counters_hourly WHERE 1 = 1'
+        params: List = []
+        if hour_from:
+            query += ' AND hour >= ?'
+            params.append(hour_from)
+        if hour_to:
+            query += ' AND hour <= ?'
+            params.append(hour_to + ('T23:00' if len(hour_to) == 10 else ''))
+        query += ' GROUP BY counter'
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            counters = {counter: total for counter, total in cursor.fetchall()}
+            conn.close()
+            return counters
+        except Exception as e:
+            logger.error(f"Failed to read fusion counters: {e}")
+            return {}
@@ -16,7 +16,12 @@ from bots.ai_ml.ai_bot import AIBot
 from services.dispatcher import get_dispatcher
 from services.telegram_broadcaster import get_broadcaster
 from services.tracker import get_tracker
+from services.trend_state import get_trend_service
+from data_feed.live_data import get_market_feed
+from data_feed.order_book import OrderBookManager, BinanceDepthStream
 from core.fusion_engine import FusionEngineBalanced
+from core.state_snapshot import StateSnapshotter
+from common.startup_timer import startup_timer
 
 logger = logging.getLogger(__name__)
 
@@ -27,23 +32,44 @@ class BotScheduler:
     def __init__(self, config_path='./config/engine_settings.json'):
         self.config = self._load_config(config_path)
         self.watchlist = self._load_watchlist()
+        self.running = False
+        self.interval_scale = 1.0
+        
+        self._init_pipeline()
+        startup_timer.mark('services')
+        
+        self._init_bots()
+        startup_timer.mark('bots')
+        
+        # Warm restore of cooldowns/rate limits from the last snapshot
+        self.snapshotter = StateSnapshotter(self._snapshot_path())
+        self.restore_state()
+        startup_timer.mark('state restore')
+    
+    def _init_pipeline(self):
+        """Fusion, tracking, dispatch and broadcast (signal output side)"""
         self.dispatcher = get_dispatcher()
         self.broadcaster = get_broadcaster()
         self.tracker = get_tracker()
-        self.running = False
         
         # Initialize Master Fusion Engine v2.0
         self.fusion_engine = FusionEngineBalanced(self.config['master_engine'])
-        
-        # Initialize bots
+        logger.info("✅ Master Fusion Engine v2.0 initialized")
+    
+    def _init_bots(self):
+        """Strategy bots (scanning side)"""
+        # First bot creates the shared market feed
         self.scalping_bot = ScalpingBot(self.config['bots']['scalping'])
+        startup_timer.mark('market feed')
         self.trend_bot = TrendBot(self.config['bots']['trend'])
         self.qfl_bot = QFLBot(self.config['bots']['qfl'])
         self.ai_bot = AIBot(self.config['bots']['ai_ml'])
-        
-        logger.info("✅ Master Fusion Engine v2.0 initialized")
         logger.info("✅ All bots initialized")
     
+    def _snapshot_path(self) -> str:
+        """Where this process keeps its state snapshot"""
+        return self.config['master_engine'].get('snapshot_path', './data/engine_state.bin')
+    
     def _load_config(self, config_path: str) -> Dict:
         """Load engine configuration"""
         try:
@@ -73,6 +99,44 @@ class BotScheduler:
             }
         }
     
+    def _bots_by_key(self) -> Dict:
+        """Bots keyed by config name"""
+        return {
+            'scalping': self.scalping_bot,
+            'trend': self.trend_bot,
+            'qfl': self.qfl_bot,
+            'ai_ml': self.ai_bot
+        }
+    
+    def _export_state(self) -> Dict:
+        """State included in snapshots"""
+        return {
+            'fusion': self.fusion_engine.export_state(),
+            'bots': {key: bot.export_cooldowns() for key, bot in self._bots_by_key().items()}
+        }
+    
+    def _import_state(self, state: Dict):
+        """Apply a loaded snapshot"""
+        self.fusion_engine.import_state(state.get('fusion', {}))
+        for key, bot in self._bots_by_key().items():
+            bot.restore_cooldowns(state.get('bots', {}).get(key, {}))
+    
+    def save_state(self) -> bool:
+        """Snapshot fusion engine state and bot cooldowns to disk"""
+        return self.snapshotter.save(self._export_state())
+    
+    def restore_state(self):
+        """Restore fusion engine state and bot cooldowns from the last snapshot"""
+        try:
+            state = self.snapshotter.load()
+            if not state:
+                logger.info("No engine snapshot found, starting with empty cooldowns")
+                return
+            
+            self._import_state(state)
+        except Exception as e:
+            logger.error(f"Error restoring engine snapshot: {e}")
+    
     async def collect_candidates(self, bot, symbols: List[str], bot_name: str) -> List:
         """Collect signal candidates from a bot across all symbols"""
         candidates = []
@@ -88,6 +152,9 @@ class BotScheduler:
     
     async def process_and_dispatch_signals(self, all_candidates: List):
         """Process candidates through Fusion Engine and dispatch approved signals"""
+        # Every bot task ends its cycle here; the first one completes startup
+        startup_timer.report('first scan')
+        
         if not all_candidates:
             return
         
@@ -99,6 +166,12 @@ class BotScheduler:
         # Process through Fusion Engine
         approved_signals = self.fusion_engine.process_candidates(all_candidates)
         
+        # Persist fusion approval/rejection counters into hourly rollups
+        self.tracker.rollups.record_fusion_stats(self.fusion_engine.stats)
+        
+        # Cooldowns changed (bot + fusion); snapshot so a restart keeps them
+        self.save_state()
+        
         if not approved_signals:
             logger.debug("🔒 No signals approved by Fusion Engine this cycle")
             return
@@ -134,6 +207,10 @@ class BotScheduler:
             except Exception as e:
                 logger.error(f"Error processing signal {signal.signal_id}: {e}")
     
+    async def _sleep(self, seconds: float):
+        """Bot interval sleep (scaled; replay runs use 0 to go as fast as possible)"""
+        await asyncio.sleep(seconds * self.interval_scale)
+    
     async def scalping_task(self):
         """Scalping bot runs every 15 seconds"""
         while self.running:
@@ -141,10 +218,10 @@ class BotScheduler:
                 symbols = self.watchlist.get('scalping_whitelist', ['BTCUSDT', 'ETHUSDT'])
                 candidates = await self.collect_candidates(self.scalping_bot, symbols, 'Scalping Bot')
                 await self.process_and_dispatch_signals(candidates)
-                await asyncio.sleep(15)  # 15 seconds
+                await self._sleep(15)  # 15 seconds
             except Exception as e:
                 logger.error(f"Scalping task error: {e}")
-                await asyncio.sleep(15)
+                await self._sleep(15)
     
     async def trend_task(self):
         """Trend bot runs every 5 minutes"""
@@ -153,10 +230,10 @@ class BotScheduler:
                 symbols = self.watchlist.get('trend_whitelist', ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
                 candidates = await self.collect_candidates(self.trend_bot, symbols, 'Trend Bot')
                 await self.process_and_dispatch_signals(candidates)
-                await asyncio.sleep(300)  # 5 minutes
+                await self._sleep(300)  # 5 minutes
             except Exception as e:
                 logger.error(f"Trend task error: {e}")
-                await asyncio.sleep(300)
+                await self._sleep(300)
     
     async def qfl_task(self):
         """QFL bot runs every 20 seconds"""
@@ -165,22 +242,43 @@ class BotScheduler:
                 symbols = self.watchlist.get('qfl_whitelist', ['BTCUSDT', 'ETHUSDT', 'BNBUSDT'])
                 candidates = await self.collect_candidates(self.qfl_bot, symbols, 'QFL Bot')
                 await self.process_and_dispatch_signals(candidates)
-                await asyncio.sleep(20)  # 20 seconds
+                await self._sleep(20)  # 20 seconds
             except Exception as e:
                 logger.error(f"QFL task error: {e}")
-                await asyncio.sleep(20)
+                await self._sleep(20)
     
     async def ai_task(self):
         """AI bot runs every 30 seconds"""
         while self.running:
             try:
                 symbols = self.watchlist.get('priority', ['BTCUSDT', 'ETHUSDT'])
-                candidates = await self.collect_candidates(self.ai_bot, symbols, 'AI/ML Bot')
+                # One feature matrix and one model call for all symbols
+                candidates = await self.ai_bot.analyze_batch(symbols)
                 await self.process_and_dispatch_signals(candidates)
-                await asyncio.sleep(30)  # 30 seconds
+                await self._sleep(30)  # 30 seconds
             except Exception as e:
                 logger.error(f"AI task error: {e}")
-                await asyncio.sleep(30)
+                await self._sleep(30)
+    
+    async def trend_state_task(self):
+        """Keep HTF trend state current and feed its bias to the Fusion Engine"""
+        trend_service = get_trend_service(self.config['bots']['trend'].get('primary_timeframe', '1h'))
+        # refresh() runs in a thread: hand bias changes back to the loop
+        loop = asyncio.get_running_loop()
+        trend_service.subscribe(
+            lambda symbol, direction, strength: loop.call_soon_threadsafe(
+                self.fusion_engine.update_trend_bias, symbol, direction, strength
+            )
+        )
+        
+        while self.running:
+            try:
+                symbols = self.watchlist.get('trend_whitelist', ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
+                # Only fetches for symbols whose hourly candle has closed (blocking ccxt calls)
+                await asyncio.to_thread(trend_service.refresh, symbols)
+            except Exception as e:
+                logger.error(f"Trend state task error: {e}")
+            await asyncio.sleep(60)
     
     async def reconciliation_task(self):
         """
@@ -251,6 +349,45 @@ class BotScheduler:
             except Exception as e:
                 logger.error(f"Reconciliation task error: {e}")
     
+    async def snapshot_task(self):
+        """Periodic state snapshot (safety net on top of per-cycle saves)"""
+        interval = self.config['master_engine'].get('snapshot_interval_seconds', 60)
+        while self.running:
+            await asyncio.sleep(interval)
+            self.save_state()
+    
+    async def order_book_task(self):
+        """Maintain local order books for every watchlist symbol (depth diff stream)"""
+        settings = self.config.get('order_book', {})
+        feed = get_market_feed()
+        if feed.exchange_name != 'binance':
+            logger.warning(f"⚠️ Local order books not supported on {feed.exchange_name}")
+            return
+        
+        symbols = sorted({s for symbols in self.watchlist.values() if isinstance(symbols, list) for s in symbols})
+        manager = OrderBookManager(
+            feed.exchange,
+            BinanceDepthStream(symbols, speed=settings.get('update_speed', '100ms')),
+            symbols,
+            snapshot_limit=settings.get('snapshot_limit', 500),
+            max_levels=settings.get('max_levels', 1000)
+        )
+        feed.attach_order_books(manager)
+        logger.info(f"📚 Local order books enabled for {len(symbols)} symbols")
+        
+        try:
+            await manager.run()
+        except Exception as e:
+            logger.error(f"Order book task error: {e}")
+        finally:
+            feed.attach_order_books(None)
+    
+    def _order_book_tasks(self) -> List[asyncio.Task]:
+        """Order book task when enabled in config"""
+        if not self.config.get('order_book', {}).get('enabled', False):
+            return []
+        return [asyncio.create_task(self.order_book_task())]
+    
     async def stats_task(self):
         """Print statistics every 5 minutes"""
         while self.running:
@@ -294,10 +431,28 @@ class BotScheduler:
         logger.info("🚀 Starting VerzekSignalEngine v2.0 - Master Fusion Engine")
         logger.info("=" * 60)
         
-        # Send startup notification
-        await self.broadcaster.send_startup_notification()
+        tasks = self._create_bot_tasks() + self._create_service_tasks()
+        
+        logger.info("=" * 60)
+        logger.info("🔥 All bots running. Press Ctrl+C to stop.")
         
-        # Create tasks for each bot
+        # Run all tasks concurrently
+        try:
+            await asyncio.gather(*tasks)
+        except KeyboardInterrupt:
+            logger.info("\n⚠️ Shutdown signal received")
+            self.running = False
+            
+            # Cancel all tasks
+            for task in tasks:
+                task.cancel()
+            
+            self.save_state()
+            
+            logger.info("✅ VerzekSignalEngine stopped gracefully")
+    
+    def _create_bot_tasks(self) -> List[asyncio.Task]:
+        """Create one scanning task per enabled bot"""
         tasks = []
         
         if self.config['bots']['scalping'].get('enabled', True):
@@ -316,28 +471,29 @@ class BotScheduler:
             tasks.append(asyncio.create_task(self.ai_task()))
             logger.info("✅ AI/ML Bot started (30s interval)")
         
+        return tasks
+    
+    def _create_service_tasks(self) -> List[asyncio.Task]:
+        """Create notification, stats, snapshot and reconciliation tasks"""
+        # Send startup notification (in background so scanning starts immediately)
+        self._startup_notification = asyncio.create_task(self.broadcaster.send_startup_notification())
+        
         # Add stats task
-        tasks.append(asyncio.create_task(self.stats_task()))
+        tasks = [asyncio.create_task(self.stats_task())]
+        
+        # Add state snapshot task
+        tasks.append(asyncio.create_task(self.snapshot_task()))
+        
+        # Add HTF trend bias task
+        tasks.append(asyncio.create_task(self.trend_state_task()))
         
         # Add reconciliation task (polling backup)
         tasks.append(asyncio.create_task(self.reconciliation_task()))
         logger.info("✅ Reconciliation task started (30m interval)")
         
-        logger.info("=" * 60)
-        logger.info("🔥 All bots running. Press Ctrl+C to stop.")
+        tasks.extend(self._order_book_tasks())
         
-        # Run all tasks concurrently
-        try:
-            await asyncio.gather(*tasks)
-        except KeyboardInterrupt:
-            logger.info("\n⚠️ Shutdown signal received")
-            self.running = False
-            
-            # Cancel all tasks
-            for task in tasks:
-                task.cancel()
-            
-            logger.info("✅ VerzekSignalEngine stopped gracefully")
+        return tasks
 
 
 def run_signal_engine():
@@ -0,0 +1,192 @@
+"""
+Sharded Signal Engine
+N scanner worker processes each run the bots on a hash-partition of the
+watchlist and stream candidates to one coordinator process, which owns the
+Fusion Engine, tracker, dispatch and Telegram broadcast (so cooldowns and
+global rate limits stay global).
+
+All processes share one request budget per venue (data_feed/shared_rate_limit.py),
+so adding shards doesn't multiply the request rate sent to the exchange.
+
+Enable with SIGNAL_ENGINE_SHARDS=<workers> (see main.py).
+"""
+import os
+import sys
+import asyncio
+import logging
+import multiprocessing
+from typing import Dict, List, Optional
+
+from services.scheduler import BotScheduler
+from services.sharding import CandidateClient, CandidateServer, partition_watchlist, DEFAULT_SOCKET_PATH
+from data_feed.shared_rate_limit import SharedRateLimiter, install_rate_limiters
+from common.startup_timer import startup_timer
+
+logger = logging.getLogger(__name__)
+
+
+class ShardWorker(BotScheduler):
+    """Scanner process: runs all bots on its share of the watchlist"""
+
+    def __init__(self, shard_index: int, shard_count: int, socket_path: str = DEFAULT_SOCKET_PATH,
+                 config_path='./config/engine_settings.json'):
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.socket_path = socket_path
+        super().__init__(config_path)
+
+        self.watchlist = partition_watchlist(self.watchlist, shard_index, shard_count)
+        total = len({s for symbols in self.watchlist.values() if isinstance(symbols, list) for s in symbols})
+        logger.info(f"🧩 Shard {shard_index + 1}/{shard_count}: {total} symbols")
+
+    def _init_pipeline(self):
+        """Candidates go to the coordinator instead of a local fusion engine"""
+        self.channel = CandidateClient(self.shard_index, self.socket_path)
+
+    def _snapshot_path(self) -> str:
+        base = super()._snapshot_path()
+        root, ext = os.path.splitext(base)
+        return f"{root}.shard{self.shard_index}{ext}"
+
+    def _export_state(self) -> Dict:
+        return {'bots': {key: bot.export_cooldowns() for key, bot in self._bots_by_key().items()}}
+
+    def _import_state(self, state: Dict):
+        for key, bot in self._bots_by_key().items():
+            bot.restore_cooldowns(state.get('bots', {}).get(key, {}))
+
+    async def process_and_dispatch_signals(self, all_candidates: List):
+        """Forward candidates to the coordinator"""
+        startup_timer.report('first scan')
+        if not all_candidates:
+            return
+
+        await self.channel.send(all_candidates)
+        self.save_state()
+
+    def _create_service_tasks(self) -> List[asyncio.Task]:
+        """Workers snapshot their bot cooldowns and keep books for their symbols"""
+        return [asyncio.create_task(self.snapshot_task())] + self._order_book_tasks()
+
+
+class FusionCoordinator(BotScheduler):
+    """Coordinator process: fusion, tracking, dispatch and broadcast for all shards"""
+
+    def __init__(self, shard_count: int, socket_path: str = DEFAULT_SOCKET_PATH,
+                 config_path='./config/engine_settings.json'):
+        self.shard_count = shard_count
+        self.socket_path = socket_path
+        self.workers: Dict[int, multiprocessing.Process] = {}
+        self.batch_window = 0.2  # seconds to gather candidates arriving together
+
+        # One request budget per venue for the coordinator and every worker
+        venues = [v.strip() for v in os.getenv('MARKET_FEED_VENUES', '').split(',') if v.strip()] or ['binance']
+        context = multiprocessing.get_context('spawn')
+        self.rate_limiters = {venue: SharedRateLimiter(context) for venue in venues}
+        install_rate_limiters(self.rate_limiters)
+        super().__init__(config_path)
+
+        self.queue: asyncio.Queue = None
+        self.server = CandidateServer(self._on_candidates, socket_path)
+
+    def _init_bots(self):
+        """Bots run in the shard workers"""
+        logger.info(f"✅ Coordinator mode: bots run in {self.shard_count} shard workers")
+
+    def _bots_by_key(self) -> Dict:
+        return {}
+
+    def _order_book_tasks(self) -> List[asyncio.Task]:
+        """Order books are kept by the shard workers, next to the bots"""
+        return []
+
+    async def _on_candidates(self, shard: int, candidates: List):
+        """Called by the IPC server for every received batch"""
+        for candidate in candidates:
+            self.queue.put_nowait(candidate)
+
+    async def fusion_task(self):
+        """Run fusion on candidates from all shards in small time batches"""
+        while self.running:
+            try:
+                batch = [await self.queue.get()]
+                await asyncio.sleep(self.batch_window)
+                while not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+
+                await self.process_and_dispatch_signals(batch)
+            except Exception as e:
+                logger.error(f"Fusion task error: {e}")
+
+    def _start_worker(self, shard_index: int):
+        """Spawn one scanner worker process"""
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(
+            target=run_shard_worker,
+            args=(shard_index, self.shard_count, self.socket_path, self.rate_limiters),
+            name=f'signal-engine-shard-{shard_index}',
+            daemon=True
+        )
+        process.start()
+        self.workers[shard_index] = process
+        logger.info(f"🚀 Started shard worker {shard_index} (pid {process.pid})")
+
+    async def supervise_workers_task(self):
+        """Restart worker processes that exit"""
+        while self.running:
+            await asyncio.sleep(10)
+            for shard_index, process in list(self.workers.items()):
+                if not process.is_alive():
+                    logger.error(f"⚠️ Shard worker {shard_index} exited (code {process.exitcode}), restarting")
+                    self._start_worker(shard_index)
+
+    def _create_bot_tasks(self) -> List[asyncio.Task]:
+        """Start shard workers plus the fusion and supervisor tasks"""
+        for shard_index in range(self.shard_count):
+            self._start_worker(shard_index)
+
+        return [
+            asyncio.create_task(self.fusion_task()),
+            asyncio.create_task(self.supervise_workers_task())
+        ]
+
+    async def start(self):
+        """Listen for shard candidates, then run the normal service tasks"""
+        self.queue = asyncio.Queue()
+        await self.server.start()
+        try:
+            await super().start()
+        finally:
+            await self.server.close()
+            for process in self.workers.values():
+                if process.is_alive():
+                    process.terminate()
+
+
+def run_shard_worker(shard_index: int, shard_count: int, socket_path: str = DEFAULT_SOCKET_PATH,
+                     rate_limiters: Optional[Dict[str, SharedRateLimiter]] = None):
+    """Entry point of a worker process"""
+    import uvloop
+
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stdout,
+        format=f'%(asctime)s | %(levelname)-8s | shard{shard_index:<2} %(name)-14s | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    if rate_limiters:
+        install_rate_limiters(rate_limiters)  # before the worker creates its market feed
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    worker = ShardWorker(shard_index, shard_count, socket_path)
+    asyncio.run(worker.start())
+
+
+def run_sharded_engine(shard_count: int, socket_path: str = DEFAULT_SOCKET_PATH):
+    """Main entry point for sharded mode (coordinator + shard workers)"""
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    coordinator = FusionCoordinator(shard_count, socket_path)
+    asyncio.run(coordinator.start())
@@ -0,0 +1,157 @@
+"""
+Sharded Engine IPC
+Watchlist partitioning and the local Unix socket channel that carries
+signal candidates from scanner workers to the fusion coordinator.
+
+Wire format: 4-byte big-endian length + JSON message
+    {"type": "candidates", "shard": 0, "candidates": [SignalCandidate.to_dict(), ...]}
+"""
+import os
+import json
+import zlib
+import struct
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+import logging
+
+from core.models import SignalCandidate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = os.getenv('SIGNAL_ENGINE_SOCKET', './data/signal_engine.sock')
+MAX_MESSAGE_BYTES = 8 * 1024 * 1024
+
+_LENGTH = struct.Struct('>I')
+
+
+def shard_for(symbol: str, shard_count: int) -> int:
+    """Stable shard index for a symbol (same in every process and restart)"""
+    normalized = symbol.replace('/', '').upper()
+    return zlib.crc32(normalized.encode()) % shard_count
+
+
+def partition_watchlist(watchlist: Dict, shard_index: int, shard_count: int) -> Dict:
+    """Keep only this shard's symbols in every watchlist list"""
+    return {
+        key: [s for s in symbols if shard_for(s, shard_count) == shard_index]
+        if isinstance(symbols, list) else symbols
+        for key, symbols in watchlist.items()
+    }
+
+
+async def _read_message(reader: asyncio.StreamReader) -> Optional[Dict]:
+    """Read one framed message, or None at EOF"""
+    try:
+        header = await reader.readexactly(_LENGTH.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f"IPC message too large: {length} bytes")
+    return json.loads(await reader.readexactly(length))
+
+
+def _frame(message: Dict) -> bytes:
+    payload = json.dumps(message, separators=(',', ':')).encode()
+    return _LENGTH.pack(len(payload)) + payload
+
+
+class CandidateClient:
+    """Worker side: sends candidates to the coordinator (reconnects on demand)"""
+
+    def __init__(self, shard_index: int, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.shard_index = shard_index
+        self.socket_path = socket_path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self.sent = 0
+        self.dropped = 0
+
+    async def _connect(self):
+        _, self._writer = await asyncio.open_unix_connection(self.socket_path)
+        logger.info(f"🔌 Shard {self.shard_index} connected to coordinator ({self.socket_path})")
+
+    async def send(self, candidates: List[SignalCandidate]) -> bool:
+        """
+        Send one batch of candidates
+
+        Candidates are time-sensitive, so a batch that cannot be delivered
+        is dropped (logged) rather than queued.
+        """
+        if not candidates:
+            return True
+
+        frame = _frame({
+            'type': 'candidates',
+            'shard': self.shard_index,
+            'candidates': [c.to_dict() for c in candidates]
+        })
+
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None or self._writer.is_closing():
+                        await self._connect()
+                    self._writer.write(frame)
+                    await self._writer.drain()
+                    self.sent += len(candidates)
+                    return True
+                except (ConnectionError, FileNotFoundError, OSError) as e:
+                    self._writer = None
+                    if attempt:
+                        logger.error(f"❌ Shard {self.shard_index}: coordinator unreachable, dropped {len(candidates)} candidates: {e}")
+
+        self.dropped += len(candidates)
+        return False
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class CandidateServer:
+    """Coordinator side: accepts worker connections and hands candidates on"""
+
+    def __init__(self, on_candidates: Callable[[int, List[SignalCandidate]], Awaitable[None]],
+                 socket_path: str = DEFAULT_SOCKET_PATH):
+        self.on_candidates = on_candidates
+        self.socket_path = socket_path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.received = 0
+
+    async def start(self):
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # stale socket from a previous run
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info(f"🧭 Coordinator listening on {self.socket_path}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                message = await _read_message(reader)
+                if message is None:
+                    break
+                if message.get('type') != 'candidates':
+                    continue
+
+                candidates = []
+                for data in message.get('candidates', []):
+                    try:
+                        candidates.append(SignalCandidate.from_dict(data))
+                    except Exception as e:
+                        logger.warning(f"Ignoring invalid candidate from shard {message.get('shard')}: {e}")
+
+                self.received += len(candidates)
+                await self.on_candidates(message.get('shard', -1), candidates)
+        except Exception as e:
+            logger.error(f"Coordinator connection error: {e}")
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
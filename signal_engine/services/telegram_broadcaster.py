@@ -6,10 +6,13 @@ import os
 import logging
 from typing import Optional
 from dotenv import load_dotenv
-from telegram import Bot
-from telegram.error import TelegramError
 import asyncio
 
+from common.lazy_imports import lazy_import
+
+# python-telegram-bot is heavy; only imported when a bot is created
+telegram = lazy_import('telegram')
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -29,7 +32,7 @@ class TelegramBroadcaster:
         self.messages_failed = 0
         
         if self.token:
-            self.bot = Bot(token=self.token)
+            self.bot = telegram.Bot(token=self.token)
             logger.info("✅ Telegram broadcaster initialized")
         else:
             logger.warning("⚠️ Telegram bot token not found. Broadcast disabled.")
@@ -97,7 +100,7 @@ class TelegramBroadcaster:
             )
             return True
             
-        except TelegramError as e:
+        except telegram.error.TelegramError as e:
             logger.error(f"Telegram error sending to {chat_id}: {e}")
             return False
         except Exception as e:
@@ -10,6 +10,7 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from core.models import SignalCandidate, SignalOutcome
+from services.rollups import PerformanceRollups
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,7 @@ class SignalTracker:
     
     def __init__(self, db_path='./data/signals.db'):
         self.db_path = db_path
+        self.rollups = PerformanceRollups(db_path)
         self._ensure_db_directory()
         self._init_database()
         logger.info(f"✅ Signal Tracker initialized (DB: {db_path})")
@@ -86,6 +88,9 @@ class SignalTracker:
         except Exception as e:
             logger.error(f"Migration error: {e}")
         
+        # Incremental performance rollups (same database file)
+        self.rollups.init_schema(cursor)
+        
         conn.commit()
         conn.close()
     
@@ -173,7 +178,7 @@ class SignalTracker:
             
             # Get signal data
             cursor.execute('''
-                SELECT symbol, side, entry_price, opened_at, bot_source
+                SELECT symbol, side, entry_price, opened_at, bot_source, current_tp_index
                 FROM signals WHERE signal_id = ? AND status = 'ACTIVE'
             ''', (signal_id,))
             
@@ -183,7 +188,7 @@ class SignalTracker:
                 conn.close()
                 return None
             
-            symbol, side, entry_price, opened_at, bot_source = row
+            symbol, side, entry_price, opened_at, bot_source, current_tp_index = row
             
             # Calculate profit percentage
             if side in ['LONG', 'BUY']:
@@ -215,6 +220,12 @@ class SignalTracker:
                 signal_id
             ))
             
+            # Update rollups in the same transaction
+            self.rollups.apply_close(
+                cursor, closed_time, bot_source, symbol, close_reason,
+                profit_pct, duration_seconds, current_tp_index
+            )
+            
             conn.commit()
             conn.close()
             
@@ -352,6 +363,11 @@ class SignalTracker:
                     signal_id
                 ))
                 
+                self.rollups.apply_close(
+                    cursor, current_time, bot_source, symbol, 'TP',
+                    profit_pct, duration_seconds, new_tp_index
+                )
+                
                 logger.info(
                     f"🎯 TP5 HIT (FINAL): {signal_id[:8]} ({symbol} {side}) "
                     f"{profit_pct:+.2f}% - SIGNAL CLOSED"
@@ -374,6 +390,8 @@ class SignalTracker:
                     f"{profit_pct:+.2f}% - Signal still ACTIVE"
                 )
             
+            self.rollups.apply_tp_hit(cursor, current_time, bot_source, symbol, new_tp_index)
+            
             conn.commit()
             conn.close()
             
@@ -478,115 +496,15 @@ class SignalTracker:
     def get_daily_stats(self, date: Optional[str] = None) -> Dict:
         """
         Get performance statistics for a specific day with TP1-TP5 breakdown
+        Served from incremental rollups (no scan of the signals table)
         
         Args:
-            date: Date in YYYY-MM-DD format (defaults to today)
+            date: UTC date in YYYY-MM-DD format (defaults to today, UTC)
             
         Returns:
             Dictionary with daily statistics including TP level breakdown
         """
-        if date is None:
-            date = datetime.now().strftime('%Y-%m-%d')
-        
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get all closed signals for the day
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total_signals,
-                    SUM(CASE WHEN close_reason = 'TP' THEN 1 ELSE 0 END) as tp_count,
-                    SUM(CASE WHEN close_reason = 'SL' THEN 1 ELSE 0 END) as sl_count,
-                    SUM(CASE WHEN close_reason = 'CANCEL' THEN 1 ELSE 0 END) as cancel_count,
-                    AVG(profit_pct) as avg_profit,
-                    MAX(profit_pct) as best_trade,
-                    MIN(profit_pct) as worst_trade,
-                    AVG(duration_seconds) as avg_duration,
-                    SUM(CASE WHEN profit_pct > 0 THEN 1 ELSE 0 END) as winners,
-                    SUM(CASE WHEN profit_pct < 0 THEN 1 ELSE 0 END) as losers
-                FROM signals
-                WHERE status = 'CLOSED'
-                AND DATE(closed_at) = ?
-            ''', (date,))
-            
-            row = cursor.fetchone()
-            
-            if not row or row[0] == 0:
-                conn.close()
-                return {
-                    'date': date,
-                    'total_signals': 0,
-                    'tp_count': 0,
-                    'sl_count': 0,
-                    'cancel_count': 0,
-                    'win_rate': 0.0,
-                    'avg_profit': 0.0,
-                    'best_trade': 0.0,
-                    'worst_trade': 0.0,
-                    'avg_duration_minutes': 0,
-                    'tp_breakdown': {'TP1': 0, 'TP2': 0, 'TP3': 0, 'TP4': 0, 'TP5': 0},
-                    'avg_tp_level': 0.0
-                }
-            
-            total, tp, sl, cancel, avg_profit, best, worst, avg_dur, winners, losers = row
-            
-            # Get TP1-TP5 breakdown for signals closed with TP
-            cursor.execute('''
-                SELECT
-                    SUM(CASE WHEN current_tp_index = 0 THEN 1 ELSE 0 END) as tp1_count,
-                    SUM(CASE WHEN current_tp_index = 1 THEN 1 ELSE 0 END) as tp2_count,
-                    SUM(CASE WHEN current_tp_index = 2 THEN 1 ELSE 0 END) as tp3_count,
-                    SUM(CASE WHEN current_tp_index = 3 THEN 1 ELSE 0 END) as tp4_count,
-                    SUM(CASE WHEN current_tp_index >= 4 THEN 1 ELSE 0 END) as tp5_count,
-                    AVG(current_tp_index + 1) as avg_tp_level
-                FROM signals
-                WHERE status = 'CLOSED'
-                AND close_reason = 'TP'
-                AND DATE(closed_at) = ?
-            ''', (date,))
-            
-            tp_row = cursor.fetchone()
-            conn.close()
-            
-            # Parse TP breakdown
-            if tp_row:
-                tp1, tp2, tp3, tp4, tp5, avg_tp = tp_row
-                tp_breakdown = {
-                    'TP1': tp1 or 0,
-                    'TP2': tp2 or 0,
-                    'TP3': tp3 or 0,
-                    'TP4': tp4 or 0,
-                    'TP5': tp5 or 0
-                }
-                avg_tp_level = avg_tp or 0.0
-            else:
-                tp_breakdown = {'TP1': 0, 'TP2': 0, 'TP3': 0, 'TP4': 0, 'TP5': 0}
-                avg_tp_level = 0.0
-            
-            win_rate = (winners / total * 100) if total > 0 else 0.0
-            avg_duration_minutes = int(avg_dur / 60) if avg_dur else 0
-            
-            return {
-                'date': date,
-                'total_signals': total,
-                'tp_count': tp or 0,
-                'sl_count': sl or 0,
-                'cancel_count': cancel or 0,
-                'winners': winners or 0,
-                'losers': losers or 0,
-                'win_rate': win_rate,
-                'avg_profit': avg_profit or 0.0,
-                'best_trade': best or 0.0,
-                'worst_trade': worst or 0.0,
-                'avg_duration_minutes': avg_duration_minutes,
-                'tp_breakdown': tp_breakdown,
-                'avg_tp_level': avg_tp_level
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to get daily stats: {e}")
-            return {}
+        return self.rollups.get_daily_stats(date)
 
 
 # Singleton instance
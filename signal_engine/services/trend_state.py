@@ -0,0 +1,137 @@
+"""
+Trend State Service
+Shared higher-timeframe trend state per symbol. A symbol's state is only
+refreshed when a new hourly candle has closed (a few candles are fetched and
+committed incrementally), and every change is published as a continuous
+bias (LONG/SHORT/NEUTRAL with strength) to subscribers such as the Fusion
+Engine. TrendBot reads the same state instead of recomputing indicators.
+"""
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+import logging
+
+from common.trend_state import TrendState
+from data_feed.live_data import get_market_feed
+
+logger = logging.getLogger(__name__)
+
+_TIMEFRAME_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """'1h' -> 3600"""
+    return int(timeframe[:-1]) * _TIMEFRAME_SECONDS[timeframe[-1]]
+
+
+class TrendStateService:
+    """Owns one TrendState per symbol and publishes bias changes"""
+
+    def __init__(self, timeframe: str = '1h', history_candles: int = 250, recent_candles: int = 5):
+        self.timeframe = timeframe
+        self.candle = timedelta(seconds=timeframe_seconds(timeframe))
+        self.history_candles = history_candles
+        self.recent_candles = recent_candles
+        self.states: Dict[str, TrendState] = {}
+        self.subscribers: List[Callable[[str, str, float], None]] = []
+        self.stats = {'full_loads': 0, 'incremental_updates': 0, 'skipped': 0}
+        self._lock = threading.Lock()  # refresh() runs off the event loop, TrendBot on it
+
+    def subscribe(self, callback: Callable[[str, str, float], None]):
+        """Call callback(symbol, direction, strength) whenever a symbol's state advances"""
+        if callback in self.subscribers:
+            return
+        self.subscribers.append(callback)
+
+        # Catch the subscriber up on states loaded before it subscribed
+        for symbol, state in self.states.items():
+            if state.is_warm:
+                callback(symbol, *state.bias())
+
+    def _candle_due(self, state: TrendState, now_ms: int) -> bool:
+        """True if a candle after the last committed one has closed by now_ms (feed clock)"""
+        # last_timestamp is the open time of the last closed candle (UTC)
+        next_close = state.last_timestamp + 2 * self.candle
+        return now_ms >= next_close.value // 1_000_000
+
+    def get(self, symbol: str) -> Optional[TrendState]:
+        """Current warm state without fetching anything"""
+        state = self.states.get(symbol)
+        return state if state is not None and state.is_warm else None
+
+    def ensure(self, symbol: str) -> Optional[TrendState]:
+        """
+        State for a symbol, fetching candles only when an hourly candle closed
+
+        Returns:
+            Warm TrendState, or None if data is unavailable
+        """
+        with self._lock:
+            return self._ensure(symbol)
+
+    def _ensure(self, symbol: str) -> Optional[TrendState]:
+        feed = get_market_feed()
+        state = self.states.get(symbol)
+
+        try:
+            if state is not None and state.is_warm:
+                # The feed's clock, so replays see candles close in replay time
+                if not self._candle_due(state, feed.exchange.milliseconds()):
+                    self.stats['skipped'] += 1
+                    return state
+
+                df = feed.get_ohlcv(symbol, self.timeframe, limit=self.recent_candles)
+                if df is None:
+                    return state  # keep serving the last closed candle
+                before = state.count
+                if state.sync(df):
+                    if state.count != before:
+                        self.stats['incremental_updates'] += 1
+                        self._publish(symbol, state)
+                    return state
+                logger.debug(f"Trend state gap for {symbol}, rebuilding")
+
+            df = feed.get_ohlcv(symbol, self.timeframe, limit=self.history_candles)
+            if df is None:
+                return None
+
+            state = TrendState()
+            if not state.sync(df) or not state.is_warm:
+                logger.warning(f"Insufficient {self.timeframe} history for {symbol} trend state")
+                return None
+
+            self.states[symbol] = state
+            self.stats['full_loads'] += 1
+            self._publish(symbol, state)
+            return state
+
+        except Exception as e:
+            logger.error(f"Error updating trend state for {symbol}: {e}")
+            return self.get(symbol)
+
+    def refresh(self, symbols: List[str]) -> int:
+        """
+        Bring all symbols up to date (cheap between hourly closes)
+
+        Returns:
+            Number of symbols with a warm state
+        """
+        return sum(1 for symbol in symbols if self.ensure(symbol) is not None)
+
+    def _publish(self, symbol: str, state: TrendState):
+        direction, strength = state.bias()
+        for callback in self.subscribers:
+            try:
+                callback(symbol, direction, strength)
+            except Exception as e:
+                logger.error(f"Error publishing trend bias for {symbol}: {e}")
+
+
+# Shared instances (one per timeframe)
+_trend_service_instances: Dict[str, TrendStateService] = {}
+
+def get_trend_service(timeframe: str = '1h') -> TrendStateService:
+    """Get or create the shared trend state service for a timeframe"""
+    if timeframe not in _trend_service_instances:
+        _trend_service_instances[timeframe] = TrendStateService(timeframe)
+    return _trend_service_instances[timeframe]
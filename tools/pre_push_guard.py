@@ -159,6 +159,27 @@ class PrePushGuard:
                 self.log_info("Regenerating manifest...")
                 os.system('bash tools/generate_manifest.sh')
     
+    def check_shared_copies(self):
+        """Check that modules copied into the standalone backend are identical"""
+        print("\n🔗 Checking Shared Module Copies...")
+        
+        shared_copies = [
+            ('modules/trigger_index.py', 'backend/trading/trigger_index.py'),
+        ]
+        
+        drifted = []
+        
+        for source, copy in shared_copies:
+            with open(source, 'rb') as f_source, open(copy, 'rb') as f_copy:
+                if f_source.read() != f_copy.read():
+                    drifted.append(f"{source} != {copy}")
+        
+        if drifted:
+            self.log_error(f"Shared module copies differ: {', '.join(drifted)}")
+            self.log_info("Apply the change to both files")
+        else:
+            self.log_success("Shared module copies are identical")
+    
     def check_version_sync(self):
         """Check if backend and mobile versions are in sync"""
         print("\n🔄 Checking Version Sync...")
@@ -233,6 +254,7 @@ class PrePushGuard:
         self.check_fernet_key()
         self.check_critical_files()
         self.check_manifest_drift()
+        self.check_shared_copies()
         self.check_version_sync()
         self.check_api_url_consistency()
         self.check_git_status()